@@ -1,5 +1,6 @@
 from flask import Flask, redirect, url_for
-from app.config import SECRET_KEY
+from app.config import SECRET_KEY, METRICS_ENABLED
+from app.utils.exceptions import PoolTimeoutError
 
 
 def create_app():
@@ -7,6 +8,14 @@ def create_app():
 
     app.secret_key = SECRET_KEY
 
+    from app.db import init_app
+
+    init_app(app)
+
+    from app.sessions import init_sessions
+
+    init_sessions(app)
+
     from app.cli import register_cli_commands, register_default_admin
 
     register_cli_commands(app)
@@ -20,17 +29,37 @@ def create_app():
     def home():
         return redirect(url_for("auth.login"))
 
+    @app.errorhandler(PoolTimeoutError)
+    def database_busy(e):
+        return "Service is busy, please try again.", 503, {"Retry-After": "1"}
+
     from app.routes import auth
     from app.routes import user
     from app.routes import artist
     from app.routes import music
+    from app.routes import job
     from app.routes.dashboard import register_dashboard_routes
 
     register_dashboard_routes(app)
 
+    if METRICS_ENABLED:
+        from app.routes.metrics import register_metrics_routes
+
+        register_metrics_routes(app)
+
     app.register_blueprint(auth.bp)
     app.register_blueprint(user.bp)
     app.register_blueprint(artist.bp)
     app.register_blueprint(music.bp)
+    app.register_blueprint(job.bp)
+
+    from app.utils.export import available_export_formats
+
+    app.jinja_env.globals["export_formats"] = available_export_formats
+
+    # after every route is registered, the registry is checked against them
+    from app.permissions import init_permissions
+
+    init_permissions(app)
 
     return app
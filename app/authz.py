@@ -0,0 +1,170 @@
+import os
+import select
+import threading
+import time
+import traceback
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.extras import RealDictCursor
+from flask import g, session
+
+from app.cache import TTLCache
+from app.config import AUTHZ_LISTEN, AUTHZ_CHANNEL, AUTHZ_CACHE_TTL, AUTHZ_CACHE_SIZE
+from app.db import DATABASE_URL, get_connection
+
+# user_id -> {"id", "role", "authz_version"}
+_principals = TTLCache(AUTHZ_CACHE_SIZE, AUTHZ_CACHE_TTL)
+
+# bumped on every invalidation; a row read while it changed may already be
+# stale and is not cached.
+_generation = 0
+_listener_lock = threading.Lock()
+_listener_pid = None
+_listening = threading.Event()
+
+
+def notify_authz_changed(cursor, user_id: int):
+    """Tell every process to drop its cached principal of user_id (sent on commit)."""
+    cursor.execute("SELECT pg_notify(%s, %s)", (AUTHZ_CHANNEL, str(user_id)))
+
+
+def forget_principal(user_id: int | None = None):
+    """Drop one cached principal, or all of them when user_id is None."""
+    global _generation
+    _generation += 1
+    if user_id is None:
+        _principals.clear()
+    else:
+        _principals.delete(int(user_id))
+
+
+# seconds without notifications after which the LISTEN connection is
+# pinged; keepalives make a peer that vanished (half-open TCP) fail the
+# ping in about a minute instead of the kernel's retransmission timeout.
+LISTEN_PING_INTERVAL = 60
+LISTEN_KEEPALIVES = {
+    "keepalives": 1,
+    "keepalives_idle": 30,
+    "keepalives_interval": 10,
+    "keepalives_count": 3,
+}
+
+
+def _forget_notified(conn):
+    while conn.notifies:
+        notify = conn.notifies.pop(0)
+        try:
+            forget_principal(int(notify.payload))
+        except ValueError:
+            forget_principal()
+
+
+def _listen_forever():
+    while True:
+        conn = None
+        try:
+            conn = psycopg2.connect(DATABASE_URL, **LISTEN_KEEPALIVES)
+            conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {AUTHZ_CHANNEL}")
+            # anything cached before LISTEN was running may have missed a notification
+            forget_principal()
+            _listening.set()
+
+            while True:
+                if select.select([conn], [], [], LISTEN_PING_INTERVAL) == ([], [], []):
+                    # quiet or dead: a dead connection raises here and is
+                    # replaced below instead of silently missing notifications
+                    with conn.cursor() as cursor:
+                        cursor.execute("SELECT 1")
+                else:
+                    conn.poll()
+                _forget_notified(conn)
+        except Exception:
+            print("authz listener lost its connection, cached roles are bypassed until it reconnects")
+            traceback.print_exc()
+        finally:
+            _listening.clear()
+            forget_principal()
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+        time.sleep(5)
+
+
+def _ensure_listener():
+    """Start the LISTEN thread once per process (gunicorn workers are forked)."""
+    global _listener_pid
+    if _listener_pid == os.getpid():
+        return
+    with _listener_lock:
+        if _listener_pid == os.getpid():
+            return
+        _listening.clear()
+        threading.Thread(
+            target=_listen_forever, name="authz-listener", daemon=True
+        ).start()
+        _listener_pid = os.getpid()
+
+
+def _fetch_principal(user_id: int):
+    with get_connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(
+                "SELECT id, role, authz_version FROM users WHERE id = %s",
+                (user_id,),
+            )
+            row = cursor.fetchone()
+            return dict(row) if row else None
+
+
+def get_principal(user_id: int):
+    """
+    Role and authz_version of user_id, from the process cache when it can
+    be trusted, otherwise with one primary key lookup.
+    Returns None for a deleted user.
+    """
+    if AUTHZ_LISTEN:
+        _ensure_listener()
+        use_cache = _listening.is_set()
+    else:
+        # without notifications only this process' own changes invalidate,
+        # other workers catch up after AUTHZ_CACHE_TTL.
+        use_cache = True
+
+    if use_cache:
+        principal = _principals.get(user_id)
+        if principal is not None:
+            return principal
+
+    generation = _generation
+    principal = _fetch_principal(user_id)
+    if principal is not None and use_cache and generation == _generation:
+        _principals.set(user_id, principal)
+    return principal
+
+
+def load_principal():
+    """
+    Principal of the logged in user for this request (cached on g), or None.
+    A deleted user is logged out; a changed role is written back to the
+    session so templates reading session["role"] stay correct.
+    """
+    if "principal" in g:
+        return g.principal
+
+    principal = None
+    user_id = session.get("user_id")
+    if user_id is not None:
+        principal = get_principal(user_id)
+        if principal is None:
+            session.clear()
+        elif session.get("authz_version") != principal["authz_version"]:
+            session["role"] = principal["role"]
+            session["authz_version"] = principal["authz_version"]
+
+    g.principal = principal
+    return principal
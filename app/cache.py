@@ -0,0 +1,235 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from app.config import CACHE_BACKEND, CACHE_TTL, CACHE_MAX_ENTRIES, CACHE_PATH
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread safe in-process LRU cache. Entries expire `ttl` seconds after
+    they were set and the least recently used entry is evicted once
+    `maxsize` entries are stored.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float | None = None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_where(self, predicate):
+        """Drop every entry whose key matches predicate(key)."""
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+class MemoryStore:
+    """Per process store. Other worker processes only see changes once their own copy expires."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize, ttl)
+
+    def get(self, namespace, key):
+        return self._cache.get((namespace, key), _MISSING)
+
+    def set(self, namespace, key, value):
+        self._cache.set((namespace, key), value)
+
+    def delete(self, namespace, key):
+        self._cache.delete((namespace, key))
+
+    def clear(self, namespace):
+        self._cache.delete_where(lambda cache_key: cache_key[0] == namespace)
+
+
+class SqliteStore:
+    """
+    Store shared by every process opening the same SQLite file (WAL mode),
+    so an invalidation in one gunicorn worker or job worker is seen by all
+    of them. The file must be on a local filesystem (containers of one
+    host can share it through a volume), WAL doesn't work over NFS.
+    Every `prune_every` writes of a process, expired rows are deleted and
+    the rows expiring first are evicted down to `maxsize`.
+    """
+
+    def __init__(self, path: str, ttl: float, maxsize: int, prune_every: int = 256):
+        self.path = path
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.prune_every = prune_every
+        self._writes = 0
+        self._local = threading.local()
+
+    def _connection(self):
+        # sqlite connections can't cross threads or forks
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    expires REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, namespace, key):
+        row = (
+            self._connection()
+            .execute(
+                "SELECT value, expires FROM cache WHERE namespace = ? AND key = ?",
+                (namespace, str(key)),
+            )
+            .fetchone()
+        )
+        if row is None or row[1] < time.time():
+            return _MISSING
+        return pickle.loads(row[0])
+
+    def set(self, namespace, key, value):
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, value, expires) VALUES (?, ?, ?, ?)",
+            (namespace, str(key), pickle.dumps(value), time.time() + self.ttl),
+        )
+        # unsynchronised counter: a lost increment only delays a prune
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            self.prune(conn)
+
+    def prune(self, conn=None):
+        """Delete expired rows, then the ones expiring first above maxsize."""
+        conn = conn or self._connection()
+        conn.execute("DELETE FROM cache WHERE expires < ?", (time.time(),))
+        excess = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.maxsize
+        if excess > 0:
+            conn.execute(
+                """
+                DELETE FROM cache WHERE (namespace, key) IN (
+                    SELECT namespace, key FROM cache ORDER BY expires LIMIT ?
+                )
+                """,
+                (excess,),
+            )
+
+    def delete(self, namespace, key):
+        self._connection().execute(
+            "DELETE FROM cache WHERE namespace = ? AND key = ?", (namespace, str(key))
+        )
+
+    def clear(self, namespace):
+        self._connection().execute("DELETE FROM cache WHERE namespace = ?", (namespace,))
+
+
+class NullStore:
+    def get(self, namespace, key):
+        return _MISSING
+
+    def set(self, namespace, key, value):
+        pass
+
+    def delete(self, namespace, key):
+        pass
+
+    def clear(self, namespace):
+        pass
+
+
+def create_store(backend: str = CACHE_BACKEND):
+    if backend == "memory":
+        return MemoryStore(CACHE_MAX_ENTRIES, CACHE_TTL)
+    if backend == "sqlite":
+        return SqliteStore(CACHE_PATH, CACHE_TTL, CACHE_MAX_ENTRIES)
+    if backend == "none":
+        return NullStore()
+    raise ValueError(f"Unknown CACHE_BACKEND '{backend}'")
+
+
+store = create_store()
+
+
+def cached(namespace: str):
+    """
+    Read-through cache for single row lookups `fn(key)`; calls with extra
+    arguments bypass the cache. Rows are stored as plain dicts and a copy
+    is returned so callers can't modify the cached value. Missing rows
+    (None) are not cached.
+    """
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(key, *args, **kwargs):
+            if args or kwargs:
+                return fn(key, *args, **kwargs)
+
+            value = store.get(namespace, str(key))
+            if value is not _MISSING:
+                return dict(value)
+
+            value = fn(key)
+            if value is not None:
+                value = dict(value)
+                store.set(namespace, str(key), value)
+                return dict(value)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate(namespace: str, key=None):
+    """Drop one cached row, or the whole namespace when key is None."""
+    if key is None:
+        store.clear(namespace)
+    else:
+        store.delete(namespace, str(key))
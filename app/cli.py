@@ -1,9 +1,29 @@
 import click
+import subprocess
+import sys
+import time
+from app.db import DATABASE_URL, get_connection, commit, rollback
+from app.migrations import upgrade, status
+from app.counts import refresh_counts
 from app.models import register_user, get_user_with_email
+from app.services.password import hash_password
 from app.utils.exceptions import ValidationError
 from app.services.auth import validate_registration_field
 
 
+# run by `flask startup-report` in a fresh interpreter
+STARTUP_PROBE = """
+import time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+create_app()
+done = time.perf_counter()
+import app.db
+print((imported - started) * 1000, (done - imported) * 1000, app.db.pool_stats() is not None)
+"""
+
+
 def register_cli_commands(app):
 
     @app.cli.command("create-super-admin")
@@ -63,7 +83,7 @@ def register_cli_commands(app):
         data["role"] = "super_admin"
 
         try:
-            user_id = register_user(data)
+            user_id = register_user(data, hash_password(data["password"]))
 
             click.echo(
                 click.style(
@@ -85,6 +105,283 @@ def register_cli_commands(app):
         except Exception as e:
             click.echo(click.style(f"Error: {e}", fg="red"))
 
+    @app.cli.command("refresh-counts")
+    def refresh_counts_command():
+        """Rebuild the row_counts table used for list and dashboard totals."""
+
+        with get_connection() as conn:
+            try:
+                with conn.cursor() as cursor:
+                    refresh_counts(cursor)
+                commit(conn)
+            except Exception:
+                rollback(conn)
+                raise
+
+        click.echo(click.style("Row counts refreshed.", fg="green"))
+
+    @app.cli.group("db")
+    def db_group():
+        """Schema migrations."""
+
+    @db_group.command("upgrade")
+    @click.option("--target", type=int, default=None, help="Stop after this version.")
+    def db_upgrade(target):
+        """Apply pending migrations from app/migrations."""
+        applied = upgrade(DATABASE_URL, target, echo=click.echo)
+        if applied:
+            click.echo(click.style(f"Applied {len(applied)} migrations.", fg="green"))
+        else:
+            click.echo(click.style("Schema is up to date.", fg="green"))
+
+    @db_group.command("status")
+    def db_status():
+        """List migrations and whether they are applied."""
+        for version, name, applied in status(DATABASE_URL):
+            state = click.style("applied", fg="green") if applied else "pending"
+            click.echo(f"{version:04d}_{name:<40}{state}")
+
+    @app.cli.command("sweep-sessions")
+    @click.option("--batch-size", type=int, default=10000, help="Rows deleted per transaction.")
+    def sweep_sessions_command(batch_size):
+        """Delete expired server side sessions."""
+        from app.sessions import sweep_expired_sessions
+
+        with get_connection() as conn:
+            try:
+                deleted = sweep_expired_sessions(conn, batch_size)
+            except Exception:
+                rollback(conn)
+                raise
+
+        click.echo(click.style(f"Deleted {deleted} expired sessions.", fg="green"))
+
+    @app.cli.command("sweep-jobs")
+    @click.option(
+        "--older-than",
+        type=float,
+        default=None,
+        help="Seconds since the job finished (JOB_RETENTION by default).",
+    )
+    def sweep_jobs_command(older_than):
+        """Delete old finished jobs, their files and orphaned job files."""
+        from app.config import JOB_RETENTION
+        from app.jobs import sweep_job_files
+
+        files, orphans = sweep_job_files(JOB_RETENTION if older_than is None else older_than)
+        click.echo(
+            click.style(
+                f"Deleted {files} files of old jobs and {orphans} orphaned files.",
+                fg="green",
+            )
+        )
+
+    @app.cli.command("startup-report")
+    @click.option("--budget-ms", type=float, default=None, help="Fail above this total.")
+    @click.option("--top", type=int, default=20, help="Number of modules listed.")
+    def startup_report(budget_ms, top):
+        """Report import and create_app time per app module."""
+
+        # a fresh interpreter, this process has already imported everything
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", STARTUP_PROBE],
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            click.echo(click.style(result.stderr, fg="red"))
+            raise SystemExit(1)
+
+        import_ms, create_app_ms, pool_created = result.stdout.split()[-3:]
+        import_ms, create_app_ms = float(import_ms), float(create_app_ms)
+
+        modules = []
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            self_us, cumulative_us, name = (
+                part.strip() for part in line[len("import time:") :].split("|")
+            )
+            if name == "app" or name.startswith("app."):
+                modules.append((name, int(self_us) / 1000, int(cumulative_us) / 1000))
+
+        modules.sort(key=lambda module: module[2], reverse=True)
+        click.echo(f"{'module':<32}{'self ms':>10}{'cumulative ms':>16}")
+        for name, self_ms, cumulative_ms in modules[:top]:
+            click.echo(f"{name:<32}{self_ms:>10.1f}{cumulative_ms:>16.1f}")
+
+        total_ms = import_ms + create_app_ms
+        click.echo("")
+        click.echo(f"import app:       {import_ms:.1f} ms")
+        click.echo(f"create_app():     {create_app_ms:.1f} ms")
+        click.echo(f"total:            {total_ms:.1f} ms")
+        click.echo(f"database touched: {'yes' if pool_created == 'True' else 'no'}")
+
+        if budget_ms is not None and total_ms > budget_ms:
+            click.echo(
+                click.style(f"Startup exceeds budget of {budget_ms:.0f} ms", fg="red")
+            )
+            raise SystemExit(1)
+
+    @app.cli.command("hash-benchmark")
+    @click.option(
+        "--method",
+        "methods",
+        multiple=True,
+        help="Hash method to measure, repeatable (default: a few common settings).",
+    )
+    @click.option("--count", type=int, default=20, help="Hashes per setting.")
+    def hash_benchmark(methods, count):
+        """Report password hashes/sec per setting, inline and through the process pool."""
+        from concurrent.futures import ThreadPoolExecutor
+        from app.config import PASSWORD_HASH_METHOD, PASSWORD_HASH_WORKERS
+        from app.services.password import method_prefix
+        from werkzeug.security import generate_password_hash
+
+        methods = methods or (
+            PASSWORD_HASH_METHOD,
+            "scrypt:16384:8:1",
+            "pbkdf2:sha256:600000",
+            "pbkdf2:sha256:260000",
+        )
+        # warm the pool up so process start up is not measured
+        hash_password("warm up")
+
+        click.echo(f"{'method':<28}{'ms/hash':>10}{'inline/s':>12}{'pool/s':>12}")
+        for method in dict.fromkeys(methods):
+            method = method_prefix(method)
+
+            started = time.perf_counter()
+            for _ in range(count):
+                generate_password_hash("benchmark password", method)
+            inline = time.perf_counter() - started
+
+            # as many concurrent callers as the pool has workers
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max(PASSWORD_HASH_WORKERS, 1)) as callers:
+                list(
+                    callers.map(
+                        lambda _: hash_password("benchmark password", method),
+                        range(count),
+                    )
+                )
+            pooled = time.perf_counter() - started
+
+            current = " (current)" if method == method_prefix(PASSWORD_HASH_METHOD) else ""
+            click.echo(
+                f"{method + current:<28}{inline / count * 1000:>10.1f}"
+                f"{count / inline:>12.1f}{count / pooled:>12.1f}"
+            )
+
+    @app.cli.command("validator-benchmark")
+    @click.option("--rows", type=int, default=50000, help="Rows to validate.")
+    def validator_benchmark(rows):
+        """Compare interpreted, compiled and columnar validation of artist rows."""
+        from app.services.artist import ARTIST_RULES, COMPILED_ARTIST_RULES
+        from app.utils.validator import Validator
+
+        # one row in ten is invalid in several fields
+        data = []
+        for i in range(rows):
+            if i % 10:
+                data.append(
+                    {
+                        "name": f"Artist {i}",
+                        "dob": f"{1950 + i % 50}-{1 + i % 12:02d}-{1 + i % 28:02d}",
+                        "gender": "mfo"[i % 3],
+                        "address": f"{i} Main Street",
+                        "first_release_year": str(1970 + i % 50),
+                        "no_of_albums": str(i % 20),
+                    }
+                )
+            else:
+                data.append(
+                    {
+                        "name": "Al",
+                        "dob": f"1990-02-{29 + i % 3}",
+                        "gender": "x",
+                        "address": "",
+                        "first_release_year": "20x2",
+                        "no_of_albums": str(i % 20),
+                    }
+                )
+        columns = {field: [row[field] for row in data] for field in ARTIST_RULES}
+
+        started = time.perf_counter()
+        interpreted = {}
+        for index, row in enumerate(data):
+            validator = Validator(row, ARTIST_RULES)
+            if not validator.validate():
+                interpreted[index] = validator.errors
+        interpreted_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        per_row = {}
+        for index, row in enumerate(data):
+            errors = COMPILED_ARTIST_RULES.errors(row)
+            if errors:
+                per_row[index] = errors
+        per_row_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        batch = COMPILED_ARTIST_RULES.validate_many(data)
+        batch_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        columnar = COMPILED_ARTIST_RULES.validate_columns(columns, rows)
+        columnar_time = time.perf_counter() - started
+
+        if not interpreted == per_row == batch == columnar:
+            raise click.ClickException("Compiled rules disagree with Validator")
+
+        click.echo(f"{'path':<24}{'rows/s':>14}{'speed up':>10}")
+        for name, elapsed in (
+            ("Validator", interpreted_time),
+            ("compiled, per row", per_row_time),
+            ("compiled, batch", batch_time),
+            ("compiled, columnar", columnar_time),
+        ):
+            click.echo(
+                f"{name:<24}{rows / elapsed:>14,.0f}{interpreted_time / elapsed:>9.1f}x"
+            )
+
+    @app.cli.command("permissions")
+    @click.option("--role", default=None, help="Only show this role.")
+    @click.option("--endpoint", default=None, help="Only show this endpoint.")
+    def permissions_command(role, endpoint):
+        """Show the compiled role/permission/endpoint tables."""
+        table = app.extensions["permissions"]
+
+        if endpoint is None:
+            click.echo(click.style("roles", bold=True))
+            for name, mask in table.role_masks.items():
+                if role is not None and name != role:
+                    continue
+                click.echo(f"{name:<20}{mask:#06x}  {', '.join(table.names(mask))}")
+            click.echo("")
+
+        click.echo(click.style("endpoints", bold=True))
+        for name, required in sorted(table.endpoint_masks.items()):
+            if endpoint is not None and name != endpoint:
+                continue
+            roles = table.roles_for(required)
+            if role is not None and role not in roles:
+                continue
+            click.echo(
+                f"{name:<40}{', '.join(table.names(required)):<28}{', '.join(roles)}"
+            )
+
+    @app.cli.command("run-worker")
+    @click.option("--poll-interval", type=float, default=None, help="Seconds between polls.")
+    @click.option("--once", is_flag=True, help="Exit once the queue is empty.")
+    def run_worker_command(poll_interval, once):
+        """Run background import/export jobs."""
+        from app.jobs import run_worker
+        from app.config import JOB_POLL_INTERVAL
+
+        click.echo(click.style("Job worker started.", fg="green"))
+        run_worker(poll_interval or JOB_POLL_INTERVAL, once=once)
+
 
 def register_default_admin(app):
 
@@ -113,7 +410,7 @@ def register_default_admin(app):
         }
 
         try:
-            user_id = register_user(data)
+            user_id = register_user(data, hash_password(data["password"]))
             print(f"Super-admin created successfully! ID: {user_id}")
         except Exception as e:
             print(f"Error creating super-admin: {e}")
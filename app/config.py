@@ -13,3 +13,121 @@ DB_CONFIG = {
     "user": os.getenv("DB_USER"),
     "password": os.getenv("DB_PASSWORD"),
 }
+
+# Row counts for paginators and the dashboard.
+# exact    -> SELECT COUNT(*) on every request
+# counter  -> read totals maintained by triggers in the row_counts table
+# estimate -> pg_class.reltuples, falling back to an exact count for tables
+#             smaller than COUNT_EXACT_THRESHOLD rows
+COUNT_STRATEGY = os.getenv("COUNT_STRATEGY", "counter")
+COUNT_EXACT_THRESHOLD = int(os.getenv("COUNT_EXACT_THRESHOLD", "10000"))
+
+# rows validated and loaded per COPY batch during CSV imports
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "5000"))
+
+# background jobs: uploads and results are kept here, it must be shared by
+# the web app and the `flask run-worker` processes.
+JOB_STORAGE_DIR = os.getenv("JOB_STORAGE_DIR", os.path.join(os.getcwd(), "instance", "jobs"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))
+# a running job whose progress hasn't moved for JOB_STALE_AFTER seconds is
+# taken as abandoned by a dead worker: jobs safe to re-run go back to the
+# queue (at most JOB_MAX_ATTEMPTS runs), the others fail. Finished jobs and
+# their files are deleted after JOB_RETENTION seconds by `flask sweep-jobs`.
+JOB_STALE_AFTER = float(os.getenv("JOB_STALE_AFTER", "900"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETENTION = float(os.getenv("JOB_RETENTION", str(7 * 24 * 3600)))
+
+# connection pool: wait up to DB_POOL_TIMEOUT seconds for a free connection
+# (503 afterwards), recycle connections after DB_POOL_MAX_USES checkouts or
+# DB_POOL_MAX_IDLE idle seconds (0 disables either).
+# Connection budget: every gunicorn worker opens up to DB_POOL_MAX
+# connections plus one LISTEN connection (AUTHZ_LISTEN), every
+# `flask run-worker` up to DB_POOL_MAX. Keep
+#     WEB_WORKERS * (DB_POOL_MAX + 1) + job workers * DB_POOL_MAX
+# well below PostgreSQL's max_connections (100 by default), e.g. 4 web
+# workers and one job worker with the defaults use at most 54.
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+DB_POOL_MAX_USES = int(os.getenv("DB_POOL_MAX_USES", "5000"))
+DB_POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", "300"))
+
+# /metrics (pool internals) is off by default; when enabled it answers
+# requests carrying "Authorization: Bearer <METRICS_TOKEN>" (scrapers) and
+# logged in users holding metrics.view.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "False") == "True"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# production server (gunicorn -c app/gunicorn_config.py). Each worker
+# serves WEB_THREADS requests at once, so a few workers go a long way; the
+# default is one per CPU, at most 4, which keeps the connection budget
+# above bounded on large hosts.
+CPU_COUNT = os.cpu_count() or 1
+WEB_BIND = os.getenv("WEB_BIND", "0.0.0.0:5000")
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", str(min(CPU_COUNT, 4))))
+WEB_THREADS = int(os.getenv("WEB_THREADS", "4"))
+WEB_TIMEOUT = int(os.getenv("WEB_TIMEOUT", "60"))
+WEB_GRACEFUL_TIMEOUT = int(os.getenv("WEB_GRACEFUL_TIMEOUT", "30"))
+WEB_MAX_REQUESTS = int(os.getenv("WEB_MAX_REQUESTS", "2000"))
+
+# cache for get_*_by_id lookups
+# sqlite -> SQLite file at CACHE_PATH, at most CACHE_MAX_ENTRIES rows; an
+#           invalidation only reaches the processes opening the same file,
+#           so the gunicorn workers and `flask run-worker` (imports
+#           invalidate artists and music) must share its directory, e.g.
+#           the cache_data volume of docker-compose.yml. Processes on
+#           other hosts keep serving their copy until CACHE_TTL.
+# memory -> per process LRU, only for single process runs (flask run):
+#           other processes keep serving their copy until CACHE_TTL
+# none   -> disabled
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite")
+CACHE_TTL = float(os.getenv("CACHE_TTL", "60"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_PATH = os.getenv(
+    "CACHE_PATH", os.path.join(os.getcwd(), "instance", "cache", "cache.sqlite3")
+)
+
+# cached user roles are dropped when a LISTEN/NOTIFY message arrives on
+# AUTHZ_CHANNEL; AUTHZ_CACHE_TTL is only a safety net.
+AUTHZ_LISTEN = os.getenv("AUTHZ_LISTEN", "True") == "True"
+AUTHZ_CHANNEL = "authz_changed"
+AUTHZ_CACHE_TTL = float(os.getenv("AUTHZ_CACHE_TTL", "300"))
+AUTHZ_CACHE_SIZE = int(os.getenv("AUTHZ_CACHE_SIZE", "10000"))
+
+# password hashing (werkzeug method string, e.g. "scrypt:32768:8:1" or
+# "pbkdf2:sha256:600000"); stored hashes made with other settings are
+# upgraded on the next successful login. Hashes run in PASSWORD_HASH_WORKERS
+# processes per web worker (0 = on the request thread), by default the CPUs
+# split between the WEB_WORKERS, rounded down so all of them together use
+# each CPU at most once. With more WEB_WORKERS than CPUs a share rounds
+# down to 0 and hashes run on the request threads instead of adding a
+# process per worker; compare settings with `flask hash-benchmark`.
+PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt")
+PASSWORD_HASH_WORKERS = int(
+    os.getenv("PASSWORD_HASH_WORKERS", str(CPU_COUNT // WEB_WORKERS))
+)
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", "10"))
+
+# login throttling: sliding windows of LOGIN_LIMIT_WINDOW seconds allowing
+# LOGIN_LIMIT_PER_IP attempts per client address and LOGIN_LIMIT_PER_EMAIL
+# failed attempts per account.
+# memory   -> per process counters (at most LOGIN_LIMIT_MAX_KEYS keys)
+# postgres -> shared by all workers through the unlogged login_attempts table
+LOGIN_LIMIT_BACKEND = os.getenv("LOGIN_LIMIT_BACKEND", "memory")
+LOGIN_LIMIT_WINDOW = float(os.getenv("LOGIN_LIMIT_WINDOW", "300"))
+LOGIN_LIMIT_PER_IP = int(os.getenv("LOGIN_LIMIT_PER_IP", "30"))
+LOGIN_LIMIT_PER_EMAIL = int(os.getenv("LOGIN_LIMIT_PER_EMAIL", "5"))
+LOGIN_LIMIT_MAX_KEYS = int(os.getenv("LOGIN_LIMIT_MAX_KEYS", "100000"))
+
+# sessions
+# postgres -> server side, the cookie only holds an id (rows in the unlogged
+#             sessions table, cached per process for SESSION_CACHE_TTL
+#             seconds; run `flask sweep-sessions` to purge expired rows)
+# cookie   -> flask's signed cookie session
+# Logged in sessions live SESSION_LIFETIME seconds, sessions without a user
+# (flashed messages before login) SESSION_ANONYMOUS_LIFETIME seconds.
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "postgres")
+SESSION_LIFETIME = float(os.getenv("SESSION_LIFETIME", str(7 * 24 * 3600)))
+SESSION_ANONYMOUS_LIFETIME = float(os.getenv("SESSION_ANONYMOUS_LIFETIME", "900"))
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+SESSION_CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL", "30"))
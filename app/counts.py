@@ -0,0 +1,170 @@
+from app.config import COUNT_STRATEGY, COUNT_EXACT_THRESHOLD
+
+# table -> column used for scoped counts (music per artist)
+COUNTED_TABLES = {
+    "users": None,
+    "artist": None,
+    "music": "artist_id",
+}
+
+# row_counts.table_name used for the per scope totals
+SCOPED_COUNTER_NAMES = {
+    "music": "music_by_artist",
+}
+
+
+def _exact_count(cursor, table: str, scope_id: int | None = None):
+    scope_column = COUNTED_TABLES[table]
+    if scope_id is not None and scope_column:
+        cursor.execute(
+            f"SELECT COUNT(*) AS total FROM {table} WHERE {scope_column} = %s",
+            (scope_id,),
+        )
+    else:
+        cursor.execute(f"SELECT COUNT(*) AS total FROM {table}")
+    return _values(cursor.fetchone())[0]
+
+
+def _values(row):
+    """Row values as a tuple for both plain and RealDictCursor rows."""
+    if row is None:
+        return (None,)
+    if isinstance(row, dict):
+        return tuple(row.values())
+    return tuple(row)
+
+
+def count_rows(cursor, table: str, scope_id: int | None = None):
+    """
+    Total rows of `table` (optionally only the rows belonging to scope_id,
+    e.g. music of one artist) using the configured COUNT_STRATEGY.
+    """
+    if table not in COUNTED_TABLES:
+        raise ValueError(f"Counting is not supported for table '{table}'")
+
+    if COUNT_STRATEGY == "exact":
+        return _exact_count(cursor, table, scope_id)
+
+    if scope_id is None:
+        return count_tables(cursor, (table,))[table]
+
+    # reltuples can't answer a filtered count, so scoped counts always come
+    # from the counter table.
+    cursor.execute(
+        """
+        SELECT total FROM row_counts
+        WHERE table_name = %s AND scope_id = %s
+        """,
+        (SCOPED_COUNTER_NAMES[table], scope_id),
+    )
+    total = _values(cursor.fetchone())[0]
+    if total is None:
+        return _exact_count(cursor, table, scope_id)
+    return total
+
+
+def count_matching(cursor, table: str, conditions: list, params: list):
+    """
+    Rows of `table` matching the ANDed `conditions` (filtered lists).
+    Unless COUNT_STRATEGY is "exact" the planner's row estimate is used
+    when it is at least COUNT_EXACT_THRESHOLD, counting a large filtered
+    set exactly costs as much as scanning it.
+    """
+    where = " AND ".join(conditions) or "TRUE"
+    if COUNT_STRATEGY != "exact":
+        cursor.execute(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM {table} WHERE {where}", params)
+        plan = _values(cursor.fetchone())[0]
+        estimate = int(plan[0]["Plan"]["Plan Rows"])
+        if estimate >= COUNT_EXACT_THRESHOLD:
+            return estimate
+
+    cursor.execute(f"SELECT COUNT(*) AS total FROM {table} WHERE {where}", params)
+    return _values(cursor.fetchone())[0]
+
+
+def scoped_count_sql(table: str, scope_expression: str):
+    """
+    SQL expression for the scoped total count_rows(cursor, table, scope_id)
+    would return, to embed in a bigger statement (scope_expression is
+    usually a column of the outer query, e.g. "artist.id").
+    """
+    scope_column = COUNTED_TABLES[table]
+    exact = f"(SELECT COUNT(*) FROM {table} WHERE {scope_column} = {scope_expression})"
+    if COUNT_STRATEGY == "exact":
+        return exact
+    # COALESCE only runs the exact count when the counter row is missing
+    return f"""COALESCE(
+        (SELECT total FROM row_counts
+         WHERE table_name = '{SCOPED_COUNTER_NAMES[table]}'
+           AND scope_id = {scope_expression}),
+        {exact}
+    )"""
+
+
+def count_tables(cursor, tables):
+    """
+    Whole table totals for several tables in a single round-trip.
+    Returns {table: total}.
+    """
+    for table in tables:
+        if table not in COUNTED_TABLES:
+            raise ValueError(f"Counting is not supported for table '{table}'")
+
+    if COUNT_STRATEGY == "exact":
+        return {table: _exact_count(cursor, table) for table in tables}
+
+    if COUNT_STRATEGY == "estimate":
+        cursor.execute(
+            """
+            SELECT relname AS table_name, reltuples::BIGINT AS total
+            FROM pg_class
+            WHERE relname = ANY(%s) AND relkind = 'r'
+              AND relnamespace = 'public'::regnamespace
+            """,
+            (list(tables),),
+        )
+        # never analysed tables report -1; small tables are cheap to count
+        # exactly and users notice when a total of 3 shows as 0.
+        known = {
+            table_name: total
+            for table_name, total in map(_values, cursor.fetchall())
+            if total >= COUNT_EXACT_THRESHOLD
+        }
+    else:
+        cursor.execute(
+            """
+            SELECT table_name, total FROM row_counts
+            WHERE table_name = ANY(%s) AND scope_id = 0
+            """,
+            (list(tables),),
+        )
+        known = dict(map(_values, cursor.fetchall()))
+
+    return {
+        table: known[table] if table in known else _exact_count(cursor, table)
+        for table in tables
+    }
+
+
+def refresh_counts(cursor):
+    """
+    Rebuild row_counts from the tables. The triggers keep it in sync
+    afterwards; this is only needed after installing them or if the
+    counters are suspected to have drifted.
+    """
+    cursor.execute("LOCK TABLE row_counts IN EXCLUSIVE MODE")
+    cursor.execute("DELETE FROM row_counts")
+    for table in COUNTED_TABLES:
+        cursor.execute(
+            f"""
+            INSERT INTO row_counts (table_name, scope_id, total)
+            SELECT %s, 0, COUNT(*) FROM {table}
+            """,
+            (table,),
+        )
+    cursor.execute("""
+        INSERT INTO row_counts (table_name, scope_id, total)
+        SELECT 'music_by_artist', artist_id, COUNT(*)
+        FROM music
+        GROUP BY artist_id
+    """)
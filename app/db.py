@@ -1,26 +1,187 @@
-from app.config import DB_CONFIG
-from psycopg2 import pool
+from app.config import (
+    DB_CONFIG,
+    DB_POOL_MIN,
+    DB_POOL_MAX,
+    DB_POOL_TIMEOUT,
+    DB_POOL_MAX_USES,
+    DB_POOL_MAX_IDLE,
+)
+from app.migrations import upgrade
+from app.pool import ConnectionPool
 from contextlib import contextmanager
+from flask import g, has_app_context
+import threading
 
 DATABASE_URL = f"postgresql://{DB_CONFIG['user']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['dbname']}"
 
-connection_pool = pool.ThreadedConnectionPool(minconn=1, maxconn=10, dsn=DATABASE_URL)
+# created on first use so importing the app (CLI, --help, workers booting)
+# never opens a socket to PostgreSQL.
+_connection_pool = None
+_pool_lock = threading.Lock()
+# pools inherited over fork, kept referenced so their connections are never
+# garbage collected (and closed) in the child.
+_inherited_pools = []
+
+
+def get_pool():
+    global _connection_pool
+    if _connection_pool is None:
+        with _pool_lock:
+            if _connection_pool is None:
+                _connection_pool = ConnectionPool(
+                    DATABASE_URL,
+                    minconn=DB_POOL_MIN,
+                    maxconn=DB_POOL_MAX,
+                    timeout=DB_POOL_TIMEOUT,
+                    max_uses=DB_POOL_MAX_USES,
+                    max_idle=DB_POOL_MAX_IDLE,
+                )
+    return _connection_pool
+
+
+def reset_pool():
+    """
+    Forget the pool inherited from a parent process (gunicorn post_fork).
+    The inherited connections are not closed: their sockets are still used
+    by the parent, closing them here would terminate its sessions.
+    """
+    global _connection_pool
+    with _pool_lock:
+        if _connection_pool is not None:
+            _inherited_pools.append(_connection_pool)
+        _connection_pool = None
+
+
+def close_pool():
+    global _connection_pool
+    with _pool_lock:
+        if _connection_pool is not None:
+            _connection_pool.closeall()
+        _connection_pool = None
+
+
+def pool_stats():
+    """Stats of the pool, or None while it has not been created yet."""
+    if _connection_pool is None:
+        return None
+    return _connection_pool.stats()
 
 
 @contextmanager
-def get_connection():
+def dedicated_connection():
     """
-    Get connection from pool.
+    Get connection from pool for the duration of the block only.
     Does NOT commit automatically.
     Caller is responsible for commit/rollback.
+    Use it for long lived work (streaming cursors) that must not share the
+    request connection.
     """
     conn = None
     try:
-        conn = connection_pool.getconn()
+        conn = get_pool().getconn()
         yield conn
     finally:
         if conn:
-            connection_pool.putconn(conn)
+            get_pool().putconn(conn)
+
+
+@contextmanager
+def get_connection():
+    """
+    Get the connection of the current app/request context.
+    The first call checks a connection out of the pool and keeps it on
+    `g`, every later call in the same request reuses it and
+    release_connection puts it back on teardown.
+    Outside an app context (e.g. `python -m app.setup_db`) it behaves like
+    dedicated_connection.
+    Does NOT commit automatically, use commit()/rollback().
+    """
+    if not has_app_context():
+        with dedicated_connection() as conn:
+            yield conn
+        return
+
+    if "db_conn" not in g:
+        g.db_conn = get_pool().getconn()
+    yield g.db_conn
+
+
+def release_connection(exception=None):
+    """Return the request connection to the pool (teardown handler)."""
+    conn = g.pop("db_conn", None)
+    g.pop("db_atomic_depth", None)
+    if conn is not None:
+        # the pool rolls back anything left open, e.g. read only queries
+        get_pool().putconn(conn)
+
+
+def in_atomic():
+    return has_app_context() and g.get("db_atomic_depth", 0) > 0
+
+
+def commit(conn):
+    """Commit unless an atomic() block will commit everything at its end."""
+    if not in_atomic():
+        conn.commit()
+
+
+def rollback(conn):
+    """Rollback unless inside atomic(), which rolls back when the error reaches it."""
+    if not in_atomic():
+        conn.rollback()
+
+
+def after_commit(callback):
+    """
+    Run callback once the current transaction is committed: right away
+    outside atomic(), at the end of the block inside it (dropped if the
+    block rolls back). Used for cache invalidation so no other request can
+    re-cache a row before the change is visible.
+    """
+    if in_atomic():
+        g.db_after_commit.append(callback)
+    else:
+        callback()
+
+
+@contextmanager
+def atomic():
+    """
+    Run several model calls in one transaction:
+
+    with atomic():
+        delete_artist(artist_id)
+        delete_user(user_id)
+
+    Commits when the block ends, rolls back everything if it raises.
+    Nested blocks join the outer transaction.
+    """
+    if not has_app_context():
+        raise RuntimeError("atomic() needs an application context")
+
+    with get_connection() as conn:
+        depth = g.get("db_atomic_depth", 0)
+        if depth == 0:
+            g.db_after_commit = []
+        g.db_atomic_depth = depth + 1
+        try:
+            yield conn
+        except Exception:
+            g.db_atomic_depth = depth
+            if depth == 0:
+                conn.rollback()
+                g.db_after_commit = []
+            raise
+        g.db_atomic_depth = depth
+        if depth == 0:
+            conn.commit()
+            callbacks, g.db_after_commit = g.db_after_commit, []
+            for callback in callbacks:
+                callback()
+
+
+def init_app(app):
+    app.teardown_appcontext(release_connection)
 
 
 # def get_connection():
@@ -28,93 +189,6 @@ def get_connection():
 
 
 def init_db():
-    with get_connection() as conn:
-        with conn.cursor() as cursor:
-            # --- Create ENUM types ---
-            cursor.execute("""
-            DO $$
-            BEGIN
-                IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'gender_enum') THEN
-                    CREATE TYPE gender_enum AS ENUM ('m','f','o');
-                END IF;
-            END$$;
-            """)
-
-            cursor.execute("""
-            DO $$
-            BEGIN
-                IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'user_role') THEN
-                    CREATE TYPE user_role AS ENUM ('super_admin','artist_manager','artist');
-                END IF;
-            END$$;
-            """)
-
-            cursor.execute("""
-            DO $$
-            BEGIN
-                IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'genre_enum') THEN
-                    CREATE TYPE genre_enum AS ENUM ('rnb','country','classic','rock','jazz');
-                END IF;
-            END$$;
-            """)
-
-            # --- Users table ---
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id SERIAL PRIMARY KEY,
-                first_name VARCHAR(255) NOT NULL,
-                last_name VARCHAR(255) NOT NULL,
-                email VARCHAR(255) NOT NULL UNIQUE,
-                password VARCHAR(255) NOT NULL,
-                phone VARCHAR(20) NOT NULL,
-                dob DATE NOT NULL,
-                gender gender_enum NOT NULL,
-                address VARCHAR(255) NOT NULL,
-                created_at TIMESTAMP DEFAULT NOW(),
-                updated_at TIMESTAMP DEFAULT NOW(),
-                role user_role NOT NULL
-            );
-            """)
-            print("Created User Table")
-
-            # --- Artist table ---
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS artist (
-                id SERIAL PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                dob DATE NOT NULL,
-                gender gender_enum NOT NULL,
-                address VARCHAR(255) NOT NULL,
-                first_release_year INT NULL,
-                no_of_albums INT DEFAULT 0,
-                created_at TIMESTAMP DEFAULT NOW(),
-                updated_at TIMESTAMP DEFAULT NOW(),
-                
-                user_id INT NULL,
-                CONSTRAINT fk_artist_user
-                    FOREIGN KEY (user_id)
-                    REFERENCES users(id)
-                    ON DELETE CASCADE
-            );
-            """)
-            print("Created Artist Table")
-
-            # --- Music table ---
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS music (
-                id SERIAL PRIMARY KEY,
-                artist_id INT NOT NULL,
-                title VARCHAR(255) NOT NULL,
-                album_name VARCHAR(255) NOT NULL,
-                genre genre_enum NOT NULL,
-                created_at TIMESTAMP DEFAULT NOW(),
-                updated_at TIMESTAMP DEFAULT NOW(),
-                CONSTRAINT fk_artist
-                    FOREIGN KEY (artist_id) 
-                    REFERENCES artist(id)
-                    ON DELETE CASCADE
-            );
-            """)
-            print("Created Music Table")
-
-        conn.commit()
+    """Create or update the schema, see app/migrations."""
+    applied = upgrade(DATABASE_URL)
+    print(f"Applied {len(applied)} migrations" if applied else "Schema is up to date")
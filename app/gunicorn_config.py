@@ -0,0 +1,52 @@
+"""
+Production server settings:
+
+    gunicorn -c app/gunicorn_config.py app.wsgi:app
+
+`kill -HUP <master pid>` reloads workers gracefully (new code included,
+the app is not preloaded in the master), in-flight requests get up to
+WEB_GRACEFUL_TIMEOUT seconds to finish.
+"""
+
+from app.config import (
+    WEB_BIND,
+    WEB_WORKERS,
+    WEB_THREADS,
+    WEB_TIMEOUT,
+    WEB_GRACEFUL_TIMEOUT,
+    WEB_MAX_REQUESTS,
+)
+
+bind = WEB_BIND
+workers = WEB_WORKERS
+threads = WEB_THREADS
+worker_class = "gthread" if WEB_THREADS > 1 else "sync"
+
+# a worker silent for this long is killed and replaced
+timeout = WEB_TIMEOUT
+graceful_timeout = WEB_GRACEFUL_TIMEOUT
+keepalive = 5
+
+# restart workers now and then so slow leaks can't accumulate
+max_requests = WEB_MAX_REQUESTS
+max_requests_jitter = WEB_MAX_REQUESTS // 10
+
+preload_app = False
+accesslog = "-"
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    # psycopg2 connections must never be shared between processes: drop
+    # anything inherited from the master so the worker opens its own pool.
+    from app.db import reset_pool
+
+    reset_pool()
+
+
+def worker_exit(server, worker):
+    from app.db import close_pool
+    from app.services.password import shutdown
+
+    close_pool()
+    shutdown()
@@ -0,0 +1,231 @@
+import csv
+import io
+import os
+import signal
+import time
+import traceback
+import uuid
+from functools import partial
+
+from app.config import (
+    JOB_STORAGE_DIR,
+    JOB_POLL_INTERVAL,
+    JOB_STALE_AFTER,
+    JOB_MAX_ATTEMPTS,
+    JOB_RETENTION,
+)
+from app.counts import count_tables
+from app.db import get_connection, release_connection
+from app.models import (
+    ARTIST_CSV_COLUMNS,
+    MUSIC_CSV_COLUMNS,
+    claim_next_job,
+    delete_finished_jobs,
+    fail_job,
+    finish_job,
+    iter_all_artists,
+    iter_all_music,
+    list_job_file_paths,
+    recover_stale_jobs,
+    update_job_progress,
+)
+from app.services.artist import import_artists
+from app.services.music import import_music
+from app.utils.export import iter_csv
+
+# rows written between two progress updates of an export job
+EXPORT_PROGRESS_EVERY = 10000
+
+
+def job_file_path(suffix: str):
+    """New unique file path inside JOB_STORAGE_DIR."""
+    os.makedirs(JOB_STORAGE_DIR, exist_ok=True)
+    return os.path.join(JOB_STORAGE_DIR, f"{uuid.uuid4().hex}{suffix}")
+
+
+def run_import(job, import_file):
+    """
+    Import the uploaded CSV with `import_file` (import_artists,
+    import_music). The result file is the per-row error report
+    (line, field, message) so the user can fix and re-upload only the bad rows.
+    """
+    with open(job["input_path"], "rb") as raw:
+        stream = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+        report = import_file(
+            stream, on_progress=lambda rows: update_job_progress(job["id"], rows)
+        )
+
+    result_path = job_file_path(".csv")
+    with open(result_path, "w", newline="", encoding="utf-8") as output:
+        writer = csv.writer(output)
+        writer.writerow(["line", "field", "message"])
+        for error in report["errors"]:
+            for field, message in error["errors"].items():
+                writer.writerow([error["line"], field, message])
+
+    os.remove(job["input_path"])
+    summary = {name: count for name, count in report.items() if name != "errors"}
+    summary["error_count"] = len(report["errors"])
+    return result_path, summary
+
+
+def run_artist_import(job):
+    return run_import(job, import_artists)
+
+
+def run_artist_upsert(job):
+    return run_import(job, partial(import_artists, mode="upsert"))
+
+
+def run_music_import(job):
+    return run_import(job, import_music)
+
+
+def run_export(job, table: str, header: tuple, rows):
+    """Write `rows` (an iterator of tuples) of `table` as CSV with progress."""
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            total = count_tables(cursor, (table,))[table]
+    update_job_progress(job["id"], 0, total)
+
+    def counted(rows):
+        for count, row in enumerate(rows, start=1):
+            if count % EXPORT_PROGRESS_EVERY == 0:
+                update_job_progress(job["id"], count)
+            yield row
+
+    result_path = job_file_path(".csv")
+    written = 0
+    with open(result_path, "w", newline="", encoding="utf-8") as output:
+        for chunk in iter_csv(list(header), counted(rows)):
+            output.write(chunk)
+        written = output.tell()
+
+    return result_path, {"bytes": written}
+
+
+def run_artist_export(job):
+    return run_export(job, "artist", ARTIST_CSV_COLUMNS, iter_all_artists())
+
+
+def run_music_export(job):
+    return run_export(job, "music", MUSIC_CSV_COLUMNS, iter_all_music())
+
+
+# job kind -> handler(job) returning (result_path, report)
+JOB_HANDLERS = {
+    "artist_import": run_artist_import,
+    "artist_upsert": run_artist_upsert,
+    "artist_export": run_artist_export,
+    "music_import": run_music_import,
+    "music_export": run_music_export,
+}
+
+# kinds that can run again from the start after a worker died half way:
+# exports rewrite their file, artist imports match rows already loaded by
+# (name, dob). A music import would insert its first batches twice.
+RETRYABLE_KINDS = ("artist_import", "artist_upsert", "artist_export", "music_export")
+
+STALE_JOB_ERROR = "The worker running this job stopped, please start it again."
+
+
+def remove_job_file(path: str | None):
+    if path:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def recover_jobs(stale_after: float = JOB_STALE_AFTER):
+    """
+    Re-queue or fail the running jobs whose worker stopped sending
+    progress (killed, OOM, lost host). Returns the recovered jobs.
+    """
+    jobs = recover_stale_jobs(stale_after, RETRYABLE_KINDS, JOB_MAX_ATTEMPTS, STALE_JOB_ERROR)
+    for job in jobs:
+        if job["status"] == "failed":
+            remove_job_file(job["input_path"])
+    return jobs
+
+
+def sweep_job_files(retention: float = JOB_RETENTION):
+    """
+    Delete jobs finished more than `retention` seconds ago with their
+    files, then files of JOB_STORAGE_DIR that no job references and that
+    are as old (an upload whose job was never created, the partial result
+    of a failed export). Returns (deleted jobs' files, orphaned files).
+    """
+    paths = delete_finished_jobs(retention)
+    for path in paths:
+        remove_job_file(path)
+
+    if not os.path.isdir(JOB_STORAGE_DIR):
+        return len(paths), 0
+    # listed before reading the referenced paths: a file created meanwhile
+    # is too recent to be removed anyway
+    entries = list(os.scandir(JOB_STORAGE_DIR))
+    referenced = {os.path.abspath(path) for path in list_job_file_paths()}
+    cutoff = time.time() - retention
+    orphans = 0
+    for entry in entries:
+        if (
+            entry.is_file()
+            and entry.stat().st_mtime < cutoff
+            and os.path.abspath(entry.path) not in referenced
+        ):
+            remove_job_file(entry.path)
+            orphans += 1
+    return len(paths), orphans
+
+
+def run_job(job):
+    handler = JOB_HANDLERS.get(job["kind"])
+    if handler is None:
+        fail_job(job["id"], f"Unknown job kind '{job['kind']}'")
+        return
+
+    try:
+        result_path, report = handler(job)
+        finish_job(job["id"], result_path, report)
+    except Exception as e:
+        traceback.print_exc()
+        fail_job(job["id"], str(e))
+        # a failed job is not run again, its upload is of no use any more
+        remove_job_file(job["input_path"])
+
+
+def run_worker(poll_interval: float = JOB_POLL_INTERVAL, once: bool = False):
+    """
+    Poll the jobs table and run jobs one at a time until stopped.
+    SIGTERM/SIGINT finish the current job before exiting. Jobs abandoned
+    by dead workers are recovered about once a minute.
+    Must run inside an app context (the `flask run-worker` command).
+    """
+    stopping = False
+    next_recovery = 0.0
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while not stopping:
+        if time.monotonic() >= next_recovery:
+            for recovered in recover_jobs():
+                print(f"Recovered stale job {recovered['id']} ({recovered['status']})")
+            next_recovery = time.monotonic() + min(60.0, JOB_STALE_AFTER)
+        job = claim_next_job()
+        if job:
+            print(f"Running job {job['id']} ({job['kind']})")
+            run_job(job)
+        # the CLI app context lives as long as the worker, hand the
+        # connection back instead of keeping it checked out while idle.
+        release_connection()
+        if job:
+            continue
+        if once:
+            break
+        time.sleep(poll_interval)
@@ -0,0 +1,68 @@
+-- users, artist and music tables
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'gender_enum') THEN
+        CREATE TYPE gender_enum AS ENUM ('m','f','o');
+    END IF;
+END$$;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'user_role') THEN
+        CREATE TYPE user_role AS ENUM ('super_admin','artist_manager','artist');
+    END IF;
+END$$;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'genre_enum') THEN
+        CREATE TYPE genre_enum AS ENUM ('rnb','country','classic','rock','jazz');
+    END IF;
+END$$;
+
+CREATE TABLE IF NOT EXISTS users (
+    id SERIAL PRIMARY KEY,
+    first_name VARCHAR(255) NOT NULL,
+    last_name VARCHAR(255) NOT NULL,
+    email VARCHAR(255) NOT NULL UNIQUE,
+    password VARCHAR(255) NOT NULL,
+    phone VARCHAR(20) NOT NULL,
+    dob DATE NOT NULL,
+    gender gender_enum NOT NULL,
+    address VARCHAR(255) NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW(),
+    role user_role NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS artist (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    dob DATE NOT NULL,
+    gender gender_enum NOT NULL,
+    address VARCHAR(255) NOT NULL,
+    first_release_year INT NULL,
+    no_of_albums INT DEFAULT 0,
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW(),
+
+    user_id INT NULL,
+    CONSTRAINT fk_artist_user
+        FOREIGN KEY (user_id)
+        REFERENCES users(id)
+        ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS music (
+    id SERIAL PRIMARY KEY,
+    artist_id INT NOT NULL,
+    title VARCHAR(255) NOT NULL,
+    album_name VARCHAR(255) NOT NULL,
+    genre genre_enum NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW(),
+    CONSTRAINT fk_artist
+        FOREIGN KEY (artist_id)
+        REFERENCES artist(id)
+        ON DELETE CASCADE
+);
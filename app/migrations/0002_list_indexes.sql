@@ -0,0 +1,22 @@
+-- migrate: no-transaction
+-- indexes used by the model queries, built without blocking writes
+--
+-- keyset pagination, ORDER BY created_at DESC, id DESC
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_created_at_id
+    ON users (created_at DESC, id DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_artist_created_at_id
+    ON artist (created_at DESC, id DESC);
+
+-- music of one artist (fetch_artist_detail) and the
+-- artist_id foreign key, ON DELETE CASCADE from artist
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_music_artist_created_at_id
+    ON music (artist_id, created_at DESC, id DESC);
+
+-- csv export, ORDER BY name, id
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_artist_name_id
+    ON artist (name, id);
+
+-- ownership predicate artist.user_id = %s and the user_id foreign key
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_artist_user_id
+    ON artist (user_id);
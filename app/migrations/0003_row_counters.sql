@@ -0,0 +1,129 @@
+-- row_counts: totals for paginators and the dashboard kept up to date by
+-- statement level triggers (app/counts.py)
+CREATE TABLE IF NOT EXISTS row_counts (
+    table_name VARCHAR(63) NOT NULL,
+    scope_id INT NOT NULL DEFAULT 0,
+    total BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (table_name, scope_id)
+);
+
+CREATE OR REPLACE FUNCTION count_rows_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO row_counts (table_name, scope_id, total)
+        SELECT TG_TABLE_NAME, 0, COUNT(*) FROM new_rows HAVING COUNT(*) > 0
+        ON CONFLICT (table_name, scope_id)
+        DO UPDATE SET total = row_counts.total + EXCLUDED.total;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO row_counts (table_name, scope_id, total)
+        SELECT TG_TABLE_NAME, 0, -COUNT(*) FROM old_rows HAVING COUNT(*) > 0
+        ON CONFLICT (table_name, scope_id)
+        DO UPDATE SET total = row_counts.total + EXCLUDED.total;
+    ELSIF TG_OP = 'TRUNCATE' THEN
+        UPDATE row_counts SET total = 0
+        WHERE table_name = TG_TABLE_NAME AND scope_id = 0;
+    END IF;
+    RETURN NULL;
+END$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION count_music_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        UPDATE row_counts SET total = 0
+        WHERE table_name = 'music' AND scope_id = 0;
+        DELETE FROM row_counts WHERE table_name = 'music_by_artist';
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO row_counts (table_name, scope_id, total)
+        SELECT 'music', 0, COUNT(*) FROM new_rows HAVING COUNT(*) > 0
+        UNION ALL
+        SELECT 'music_by_artist', artist_id, COUNT(*) FROM new_rows
+        GROUP BY artist_id
+        ON CONFLICT (table_name, scope_id)
+        DO UPDATE SET total = row_counts.total + EXCLUDED.total;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO row_counts (table_name, scope_id, total)
+        SELECT 'music', 0, -COUNT(*) FROM old_rows HAVING COUNT(*) > 0
+        UNION ALL
+        SELECT 'music_by_artist', artist_id, -COUNT(*) FROM old_rows
+        GROUP BY artist_id
+        ON CONFLICT (table_name, scope_id)
+        DO UPDATE SET total = row_counts.total + EXCLUDED.total;
+    ELSIF TG_OP = 'UPDATE' THEN
+        -- only moving a track to another artist changes a total
+        INSERT INTO row_counts (table_name, scope_id, total)
+        SELECT 'music_by_artist', artist_id, SUM(n)
+        FROM (
+            SELECT artist_id, 1 AS n FROM new_rows
+            UNION ALL
+            SELECT artist_id, -1 AS n FROM old_rows
+        ) delta
+        GROUP BY artist_id HAVING SUM(n) <> 0
+        ON CONFLICT (table_name, scope_id)
+        DO UPDATE SET total = row_counts.total + EXCLUDED.total;
+    END IF;
+    RETURN NULL;
+END$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS users_count_insert ON users;
+CREATE TRIGGER users_count_insert AFTER INSERT ON users
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION count_rows_trigger();
+
+DROP TRIGGER IF EXISTS users_count_delete ON users;
+CREATE TRIGGER users_count_delete AFTER DELETE ON users
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION count_rows_trigger();
+
+DROP TRIGGER IF EXISTS users_count_truncate ON users;
+CREATE TRIGGER users_count_truncate AFTER TRUNCATE ON users
+    FOR EACH STATEMENT EXECUTE FUNCTION count_rows_trigger();
+
+DROP TRIGGER IF EXISTS artist_count_insert ON artist;
+CREATE TRIGGER artist_count_insert AFTER INSERT ON artist
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION count_rows_trigger();
+
+DROP TRIGGER IF EXISTS artist_count_delete ON artist;
+CREATE TRIGGER artist_count_delete AFTER DELETE ON artist
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION count_rows_trigger();
+
+DROP TRIGGER IF EXISTS artist_count_truncate ON artist;
+CREATE TRIGGER artist_count_truncate AFTER TRUNCATE ON artist
+    FOR EACH STATEMENT EXECUTE FUNCTION count_rows_trigger();
+
+DROP TRIGGER IF EXISTS music_count_insert ON music;
+CREATE TRIGGER music_count_insert AFTER INSERT ON music
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION count_music_trigger();
+
+DROP TRIGGER IF EXISTS music_count_update ON music;
+CREATE TRIGGER music_count_update AFTER UPDATE ON music
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION count_music_trigger();
+
+DROP TRIGGER IF EXISTS music_count_delete ON music;
+CREATE TRIGGER music_count_delete AFTER DELETE ON music
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION count_music_trigger();
+
+DROP TRIGGER IF EXISTS music_count_truncate ON music;
+CREATE TRIGGER music_count_truncate AFTER TRUNCATE ON music
+    FOR EACH STATEMENT EXECUTE FUNCTION count_music_trigger();
+
+-- fill the counters from the existing rows (same as refresh_counts)
+LOCK TABLE row_counts IN EXCLUSIVE MODE;
+DELETE FROM row_counts;
+INSERT INTO row_counts (table_name, scope_id, total)
+SELECT 'users', 0, COUNT(*) FROM users;
+INSERT INTO row_counts (table_name, scope_id, total)
+SELECT 'artist', 0, COUNT(*) FROM artist;
+INSERT INTO row_counts (table_name, scope_id, total)
+SELECT 'music', 0, COUNT(*) FROM music;
+INSERT INTO row_counts (table_name, scope_id, total)
+SELECT 'music_by_artist', artist_id, COUNT(*)
+FROM music
+GROUP BY artist_id;
@@ -0,0 +1,27 @@
+-- background import/export jobs (app/jobs.py)
+CREATE TABLE IF NOT EXISTS jobs (
+    id SERIAL PRIMARY KEY,
+    kind VARCHAR(50) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    input_path VARCHAR(500) NULL,
+    result_path VARCHAR(500) NULL,
+    progress BIGINT NOT NULL DEFAULT 0,
+    total BIGINT NULL,
+    report JSONB NULL,
+    error TEXT NULL,
+    created_by INT NULL,
+    created_at TIMESTAMP DEFAULT NOW(),
+    started_at TIMESTAMP NULL,
+    finished_at TIMESTAMP NULL,
+    CONSTRAINT fk_job_user
+        FOREIGN KEY (created_by)
+        REFERENCES users(id)
+        ON DELETE SET NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_jobs_pending
+    ON jobs (id) WHERE status = 'pending';
+
+-- jobs.created_by foreign key, ON DELETE SET NULL from users
+CREATE INDEX IF NOT EXISTS idx_jobs_created_by
+    ON jobs (created_by);
@@ -0,0 +1,3 @@
+-- bumped whenever a user's permissions may have changed (app/authz.py)
+ALTER TABLE users
+    ADD COLUMN IF NOT EXISTS authz_version INT NOT NULL DEFAULT 0;
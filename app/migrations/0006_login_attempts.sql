@@ -0,0 +1,8 @@
+-- login throttling counters (LOGIN_LIMIT_BACKEND=postgres)
+-- unlogged: no WAL writes, emptied after a crash
+CREATE UNLOGGED TABLE IF NOT EXISTS login_attempts (
+    key VARCHAR(320) NOT NULL,
+    window_index BIGINT NOT NULL,
+    hits INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (key, window_index)
+);
@@ -0,0 +1,12 @@
+-- server side sessions (SESSION_BACKEND=postgres)
+CREATE UNLOGGED TABLE IF NOT EXISTS sessions (
+    sid VARCHAR(64) PRIMARY KEY,
+    version VARCHAR(16) NOT NULL,
+    user_id INT NULL,
+    data BYTEA NOT NULL,
+    expires_at TIMESTAMP NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON sessions (user_id);
+
+CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions (expires_at);
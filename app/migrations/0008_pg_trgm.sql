@@ -0,0 +1,6 @@
+-- search_artists / search_music (app/models.py): pg_trgm for typo
+-- tolerant and partial matches. Full text search indexes the
+-- to_tsvector() expressions directly (0009) instead of adding stored
+-- generated columns, which would rewrite artist and music under an
+-- ACCESS EXCLUSIVE lock.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
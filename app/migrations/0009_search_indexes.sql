@@ -0,0 +1,22 @@
+-- migrate: no-transaction
+-- search_artists / search_music (app/models.py): tsvector matches and
+-- trigram similarity (%) or ILIKE '%...%' on the searched columns. The
+-- tsvector indexes are on expressions, the queries must use exactly the
+-- same ones (ARTIST_SEARCH_VECTOR / MUSIC_SEARCH_VECTOR) to be served.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_artist_search_vector
+    ON artist USING GIN ((to_tsvector('simple', name)));
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_artist_name_trgm
+    ON artist USING GIN (name gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_music_search_vector
+    ON music USING GIN ((
+        setweight(to_tsvector('simple', title), 'A')
+        || setweight(to_tsvector('simple', album_name), 'B')
+    ));
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_music_title_trgm
+    ON music USING GIN (title gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_music_album_name_trgm
+    ON music USING GIN (album_name gin_trgm_ops);
@@ -0,0 +1,46 @@
+-- migrate: no-transaction
+-- filtered and sorted lists (USER_LIST, ARTIST_LIST, MUSIC_LIST in
+-- app/utils/listing.py): one index per equality filter and sort, so the
+-- page is read in order from the index and stops after LIMIT rows instead
+-- of sorting every match. Descending sorts scan the same index backwards.
+-- Two filters at once use the index of one of them and filter the other.
+--
+-- users: ?role=, ?gender= x newest/oldest, email
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_role_created_at_id
+    ON users (role, created_at DESC, id DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_role_email_id
+    ON users (role, email, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_gender_created_at_id
+    ON users (gender, created_at DESC, id DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_gender_email_id
+    ON users (gender, email, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_email_id
+    ON users (email, id);
+
+-- artist: ?gender=, ?first_release_year= x newest/oldest, name
+-- (unfiltered lists use idx_artist_created_at_id and idx_artist_name_id)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_artist_gender_created_at_id
+    ON artist (gender, created_at DESC, id DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_artist_gender_name_id
+    ON artist (gender, name, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_artist_release_year_created_at_id
+    ON artist (first_release_year, created_at DESC, id DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_artist_release_year_name_id
+    ON artist (first_release_year, name, id);
+
+-- music of one artist: ?genre= x newest/oldest, title
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_music_artist_genre_created_at_id
+    ON music (artist_id, genre, created_at DESC, id DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_music_artist_title_id
+    ON music (artist_id, title, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_music_artist_genre_title_id
+    ON music (artist_id, genre, title, id);
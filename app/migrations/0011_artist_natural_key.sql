@@ -0,0 +1,7 @@
+-- migrate: no-transaction
+-- (name, dob) identifies an artist for CSV imports (copy_artists_batch).
+-- A plain index, not a constraint: registration and the artist forms may
+-- still create artists sharing a name and date of birth, and databases
+-- that already hold such artists upgrade without changes.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_artist_name_dob
+    ON artist (name, dob);
@@ -0,0 +1,12 @@
+-- running jobs refresh heartbeat_at on every progress update, the worker
+-- re-queues or fails jobs whose heartbeat stopped (app.jobs.recover_jobs)
+ALTER TABLE jobs
+    ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP NULL,
+    ADD COLUMN IF NOT EXISTS attempts INT NOT NULL DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS idx_jobs_running
+    ON jobs (heartbeat_at) WHERE status = 'running';
+
+-- `flask sweep-jobs`: finished jobs past JOB_RETENTION
+CREATE INDEX IF NOT EXISTS idx_jobs_finished_at
+    ON jobs (finished_at) WHERE status IN ('done', 'failed');
@@ -0,0 +1,28 @@
+-- migrate: no-transaction
+-- the newest/oldest sorts (app/utils/listing.py) page by the keyset
+-- (created_at, id), which skips rows with a NULL created_at: backfill them
+-- and make the columns NOT NULL. The NOT VALID check is validated without
+-- blocking writes and lets SET NOT NULL skip its own full table scan.
+UPDATE users SET created_at = COALESCE(updated_at, NOW()) WHERE created_at IS NULL;
+ALTER TABLE users DROP CONSTRAINT IF EXISTS users_created_at_not_null;
+ALTER TABLE users ADD CONSTRAINT users_created_at_not_null
+    CHECK (created_at IS NOT NULL) NOT VALID;
+ALTER TABLE users VALIDATE CONSTRAINT users_created_at_not_null;
+ALTER TABLE users ALTER COLUMN created_at SET NOT NULL;
+ALTER TABLE users DROP CONSTRAINT users_created_at_not_null;
+
+UPDATE artist SET created_at = COALESCE(updated_at, NOW()) WHERE created_at IS NULL;
+ALTER TABLE artist DROP CONSTRAINT IF EXISTS artist_created_at_not_null;
+ALTER TABLE artist ADD CONSTRAINT artist_created_at_not_null
+    CHECK (created_at IS NOT NULL) NOT VALID;
+ALTER TABLE artist VALIDATE CONSTRAINT artist_created_at_not_null;
+ALTER TABLE artist ALTER COLUMN created_at SET NOT NULL;
+ALTER TABLE artist DROP CONSTRAINT artist_created_at_not_null;
+
+UPDATE music SET created_at = COALESCE(updated_at, NOW()) WHERE created_at IS NULL;
+ALTER TABLE music DROP CONSTRAINT IF EXISTS music_created_at_not_null;
+ALTER TABLE music ADD CONSTRAINT music_created_at_not_null
+    CHECK (created_at IS NOT NULL) NOT VALID;
+ALTER TABLE music VALIDATE CONSTRAINT music_created_at_not_null;
+ALTER TABLE music ALTER COLUMN created_at SET NOT NULL;
+ALTER TABLE music DROP CONSTRAINT music_created_at_not_null;
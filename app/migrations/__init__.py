@@ -0,0 +1,180 @@
+"""
+Versioned schema migrations.
+
+Each NNNN_name.sql file in this directory is applied once, in order, and
+recorded in the schema_version table. A file runs in a single transaction
+together with its schema_version row, unless its first line is
+
+    -- migrate: no-transaction
+
+in which case its statements run one by one in autocommit mode, which
+CREATE INDEX CONCURRENTLY requires (the index is built without blocking
+writes on a live table). Such a file must only contain statements that
+are safe to re-run, it is retried from the start if it fails half way.
+"""
+
+import os
+import re
+
+import psycopg2
+from psycopg2 import extensions
+
+MIGRATIONS_DIR = os.path.dirname(__file__)
+NO_TRANSACTION = "-- migrate: no-transaction"
+
+# pg_advisory_lock key, serialises web and worker containers starting together
+LOCK_KEY = 7_264_019_001
+
+_FILE_NAME = re.compile(r"^(\d+)_(\w+)\.sql$")
+_CONCURRENT_INDEX = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+IF\s+NOT\s+EXISTS\s+(\w+)",
+    re.IGNORECASE,
+)
+
+
+def list_migrations():
+    """[(version, name, path)] of every migration file, oldest first."""
+    migrations = []
+    for file_name in os.listdir(MIGRATIONS_DIR):
+        match = _FILE_NAME.match(file_name)
+        if match:
+            migrations.append(
+                (
+                    int(match.group(1)),
+                    match.group(2),
+                    os.path.join(MIGRATIONS_DIR, file_name),
+                )
+            )
+    migrations.sort()
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError("Two migration files share a version number")
+    return migrations
+
+
+def _split_statements(sql: str):
+    # only used for no-transaction files, which hold plain statements
+    # (no function bodies): a statement ends with ";" at the end of a line
+    statements, current = [], []
+    for line in sql.splitlines():
+        if line.strip().startswith("--"):
+            continue
+        current.append(line)
+        if line.rstrip().endswith(";"):
+            statement = "\n".join(current).strip()
+            if statement.rstrip(";").strip():
+                statements.append(statement)
+            current = []
+    if "\n".join(current).strip():
+        statements.append("\n".join(current).strip())
+    return statements
+
+
+def _ensure_version_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+        );
+    """)
+
+
+def applied_versions(cursor):
+    cursor.execute("SELECT to_regclass('schema_version')")
+    if cursor.fetchone()[0] is None:
+        return set()
+    cursor.execute("SELECT version FROM schema_version")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _drop_invalid_index(cursor, statement: str):
+    """
+    A failed CREATE INDEX CONCURRENTLY leaves an INVALID index behind that
+    IF NOT EXISTS would happily skip; drop it so the retry rebuilds it.
+    """
+    match = _CONCURRENT_INDEX.search(statement)
+    if not match:
+        return
+    cursor.execute(
+        """
+        SELECT 1 FROM pg_index
+        JOIN pg_class ON pg_class.oid = pg_index.indexrelid
+        WHERE pg_class.relname = %s AND NOT pg_index.indisvalid
+        """,
+        (match.group(1),),
+    )
+    if cursor.fetchone():
+        cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {match.group(1)}")
+
+
+def _apply(conn, version: int, name: str, sql: str):
+    if sql.lstrip().startswith(NO_TRANSACTION):
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cursor:
+                for statement in _split_statements(sql):
+                    _drop_invalid_index(cursor, statement)
+                    cursor.execute(statement)
+                cursor.execute(
+                    "INSERT INTO schema_version (version, name) VALUES (%s, %s)",
+                    (version, name),
+                )
+        finally:
+            conn.autocommit = False
+        return
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(sql)
+            cursor.execute(
+                "INSERT INTO schema_version (version, name) VALUES (%s, %s)",
+                (version, name),
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def upgrade(dsn: str, target: int | None = None, echo=print):
+    """
+    Apply every pending migration up to `target` (all when None).
+    Runs on its own connection, switching to autocommit for
+    no-transaction migrations must not affect pooled connections.
+    Returns the applied versions.
+    """
+    conn = psycopg2.connect(dsn)
+    applied = []
+    try:
+        conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(%s)", (LOCK_KEY,))
+            _ensure_version_table(cursor)
+            done = applied_versions(cursor)
+        conn.set_isolation_level(extensions.ISOLATION_LEVEL_READ_COMMITTED)
+
+        for version, name, path in list_migrations():
+            if version in done or (target is not None and version > target):
+                continue
+            echo(f"Applying {version:04d}_{name}")
+            with open(path, encoding="utf-8") as file:
+                _apply(conn, version, name, file.read())
+            applied.append(version)
+    finally:
+        # closing the session releases the advisory lock
+        conn.close()
+    return applied
+
+
+def status(dsn: str):
+    """[(version, name, applied)] for every migration file."""
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cursor:
+            done = applied_versions(cursor)
+    finally:
+        conn.close()
+    return [
+        (version, name, version in done) for version, name, _ in list_migrations()
+    ]
@@ -1,23 +1,31 @@
-from app.db import get_connection
-from werkzeug.security import generate_password_hash
-from psycopg2.extras import RealDictCursor, execute_values
+from app.db import get_connection, dedicated_connection, commit, rollback, after_commit
+from app.cache import cached, invalidate
+from app.authz import notify_authz_changed, forget_principal
+from app.sessions import revoke_user_sessions, forget_sessions
+from app.counts import count_rows, count_tables, count_matching, scoped_count_sql
+from psycopg2.extras import RealDictCursor, Json
 from app.utils.exceptions import ValidationError
+from app.utils.pagination import decode_cursor, split_page
+from app.utils.listing import USER_LIST, ARTIST_LIST, MUSIC_LIST, where_clause
 from datetime import datetime
+import csv
+import io
 
 
 def dashboard_data():
     with get_connection() as conn:
         with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            cursor.execute("""
-                SELECT
-                    (SELECT COUNT(*) FROM users) AS total_users,
-                    (SELECT COUNT(*) FROM artist) AS total_artists,
-                    (SELECT COUNT(*) FROM music) AS total_music;
-            """)
-            return cursor.fetchone()
+            totals = count_tables(cursor, ("users", "artist", "music"))
+            return {
+                "total_users": totals["users"],
+                "total_artists": totals["artist"],
+                "total_music": totals["music"],
+            }
 
 
-def register_user(data: dict):
+def register_user(data: dict, password_hash: str):
+    # the caller hashes data["password"] before checking out a connection,
+    # a pooled connection shouldn't sit idle through the hash
     with get_connection() as conn:
         try:
             with conn.cursor(cursor_factory=RealDictCursor) as cursor:
@@ -37,7 +45,7 @@ def register_user(data: dict):
                         data["first_name"],
                         data["last_name"],
                         data["email"],
-                        generate_password_hash(data["password"]),
+                        password_hash,
                         data["phone"],
                         data["dob"],
                         data["gender"],
@@ -47,14 +55,24 @@ def register_user(data: dict):
                 )
 
                 user_id = cursor.fetchone()["id"]
-                conn.commit()
+                commit(conn)
                 return user_id
 
         except Exception:
-            conn.rollback()
+            rollback(conn)
             raise
 
 
+def update_password_hash(user_id: int, password_hash: str):
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "UPDATE users SET password = %s WHERE id = %s",
+                (password_hash, user_id),
+            )
+            commit(conn)
+
+
 def get_user_with_email(email: str):
     with get_connection() as conn:
         with conn.cursor(cursor_factory=RealDictCursor) as cursor:
@@ -62,12 +80,13 @@ def get_user_with_email(email: str):
             return cursor.fetchone()
 
 
+@cached("user")
 def get_user_by_id(user_id: int):
     with get_connection() as conn:
         with conn.cursor(cursor_factory=RealDictCursor) as cursor:
             cursor.execute(
                 """
-                SELECT id, first_name, last_name, email, password,
+                SELECT id, first_name, last_name, email,
                        phone, dob, gender, address,
                        created_at, updated_at, role
                 FROM users
@@ -78,35 +97,98 @@ def get_user_by_id(user_id: int):
             return cursor.fetchone()
 
 
-def fetch_list_users(page: int = 1, page_size: int = 10):
-    offset = (page - 1) * page_size
+def fetch_list_users(
+    page: int = 1,
+    page_size: int = 10,
+    after: str | None = None,
+    filters: dict | None = None,
+    sort: str | None = None,
+):
+    """
+    One page of users, `filters` and `sort` are whitelisted by USER_LIST
+    (app/utils/listing.py), anything else is ignored.
+    """
+    filters = USER_LIST.clean_filters(filters)
+    order = USER_LIST.sort(sort)
+    conditions, params = USER_LIST.conditions(filters)
+    cursor_key = decode_cursor(after, parse=order.parse)
+    offset = 0 if cursor_key else (page - 1) * page_size
+    keyset = [order.keyset()] if cursor_key else []
 
     with get_connection() as conn:
         with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            cursor.execute("SELECT COUNT(*) AS total FROM users")
-            total = cursor.fetchone()["total"]
+            if filters:
+                total = count_matching(cursor, "users", conditions, params)
+            else:
+                total = count_rows(cursor, "users")
 
             cursor.execute(
-                """
+                f"""
                 SELECT id, first_name, last_name, email, phone, dob, gender,
                        address, created_at, updated_at, role
                 FROM users
-                ORDER BY created_at DESC
+                {where_clause(conditions + keyset)}
+                ORDER BY {order.order_by()}
                 LIMIT %s OFFSET %s
                 """,
-                (page_size, offset),
+                (*params, *(cursor_key or ()), page_size + 1, offset),
             )
-            users = cursor.fetchall()
+            users, next_cursor = split_page(cursor.fetchall(), page_size, order.key)
 
     return {
         "users": users,
         "total": total,
+        "filters": filters,
+        "sort": USER_LIST.sort_name(sort),
         "page": page,
         "page_size": page_size,
         "total_pages": (total + page_size - 1) // page_size,
+        "after": after,
+        "next_cursor": next_cursor,
     }
 
 
+# never the password hash
+USER_EXPORT_COLUMNS = (
+    "first_name",
+    "last_name",
+    "email",
+    "phone",
+    "dob",
+    "gender",
+    "address",
+    "role",
+    "created_at",
+)
+USER_EXPORT_TYPES = (
+    "string",
+    "string",
+    "string",
+    "string",
+    "date",
+    "string",
+    "string",
+    "string",
+    "timestamp",
+)
+
+
+def iter_all_users(batch_size: int = 2000):
+    """Stream every user like iter_all_artists, tuples in USER_EXPORT_COLUMNS order."""
+    with dedicated_connection() as conn:
+        try:
+            with conn.cursor(name="user_export") as cursor:
+                cursor.itersize = batch_size
+                cursor.execute(f"""
+                    SELECT {", ".join(USER_EXPORT_COLUMNS)}
+                    FROM users
+                    ORDER BY id;
+                """)
+                yield from cursor
+        finally:
+            conn.rollback()
+
+
 def update_user(data: dict):
     with get_connection() as conn:
         try:
@@ -130,6 +212,7 @@ def update_user(data: dict):
                         gender = %s,
                         address = %s,
                         role = %s,
+                        authz_version = authz_version + 1,
                         updated_at = NOW()
                     WHERE id = %s
                     """,
@@ -149,11 +232,15 @@ def update_user(data: dict):
                 if cursor.rowcount == 0:
                     raise ValueError("User not found")
 
-            conn.commit()
+                notify_authz_changed(cursor, data["id"])
+
+            commit(conn)
+            after_commit(lambda: invalidate("user", data["id"]))
+            after_commit(lambda: forget_principal(data["id"]))
             return True
 
         except Exception:
-            conn.rollback()
+            rollback(conn)
             raise
 
 
@@ -169,107 +256,274 @@ def delete_user(user_id: int):
                 if cursor.rowcount == 0:
                     raise ValueError("User not found")
 
-            conn.commit()
+                notify_authz_changed(cursor, user_id)
+                revoke_user_sessions(cursor, user_id)
+
+            commit(conn)
+            # the user's artist profile and its music go with ON DELETE CASCADE
+            after_commit(lambda: invalidate("user", user_id))
+            after_commit(lambda: invalidate("artist"))
+            after_commit(lambda: invalidate("music"))
+            after_commit(lambda: forget_principal(user_id))
+            after_commit(forget_sessions)
             return True
 
         except Exception:
-            conn.rollback()
+            rollback(conn)
             raise
 
 
 # artist section
-def fetch_list_artist(page: int = 1, page_size: int = 10):
-    offset = (page - 1) * page_size
+def fetch_list_artist(
+    page: int = 1,
+    page_size: int = 10,
+    after: str | None = None,
+    filters: dict | None = None,
+    sort: str | None = None,
+):
+    """One page of artists, see ARTIST_LIST for the filters and sorts."""
+    filters = ARTIST_LIST.clean_filters(filters)
+    order = ARTIST_LIST.sort(sort)
+    conditions, params = ARTIST_LIST.conditions(filters)
+    cursor_key = decode_cursor(after, parse=order.parse)
+    offset = 0 if cursor_key else (page - 1) * page_size
+    keyset = [order.keyset()] if cursor_key else []
+
     with get_connection() as conn:
         with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            cursor.execute("SELECT COUNT(*) as total FROM artist")
-            total = cursor.fetchone()["total"]
+            if filters:
+                total = count_matching(cursor, "artist", conditions, params)
+            else:
+                total = count_rows(cursor, "artist")
 
             cursor.execute(
-                """
+                f"""
                 SELECT id, name, dob, gender, address, first_release_year, 
                     created_at, updated_at 
                 FROM artist 
-                ORDER BY created_at DESC
+                {where_clause(conditions + keyset)}
+                ORDER BY {order.order_by()}
                 LIMIT %s OFFSET %s
                 """,
-                (page_size, offset),
+                (*params, *(cursor_key or ()), page_size + 1, offset),
             )
-            artists = cursor.fetchall()
+            artists, next_cursor = split_page(cursor.fetchall(), page_size, order.key)
 
             return {
                 "artists": artists,
                 "total": total,
+                "filters": filters,
+                "sort": ARTIST_LIST.sort_name(sort),
                 "page": page,
                 "page_size": page_size,
                 "total_pages": (total + page_size - 1) // page_size,
+                "after": after,
+                "next_cursor": next_cursor,
             }
 
 
-def get_all_artists():
-    with get_connection() as conn:
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            cursor.execute("""
-                SELECT name, dob, gender, address,
-                       first_release_year, no_of_albums
-                FROM artist
-                ORDER BY name;
-            """)
-            return cursor.fetchall()
+def iter_all_artists(batch_size: int = 2000):
+    """
+    Stream every artist through a server-side (named) cursor, fetching
+    `batch_size` rows per round-trip, so exports run in constant memory.
+    Yields plain tuples in export column order.
+    """
+    # a dedicated connection: commits on the request/worker connection while
+    # streaming would close the named cursor.
+    with dedicated_connection() as conn:
+        try:
+            with conn.cursor(name="artist_export") as cursor:
+                cursor.itersize = batch_size
+                cursor.execute("""
+                    SELECT name, dob, gender, address,
+                           first_release_year, no_of_albums
+                    FROM artist
+                    ORDER BY name, id;
+                """)
+                yield from cursor
+        finally:
+            conn.rollback()
 
 
 def create_artist(data: dict):
     with get_connection() as conn:
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            statement = """
-                INSERT INTO artist
-                (name, dob, gender, address, first_release_year, no_of_albums, user_id)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                RETURNING id;
-            """
-            cursor.execute(
-                statement,
-                (
-                    data["name"],
-                    data["dob"],
-                    data["gender"],
-                    data["address"],
-                    data.get("first_release_year"),
-                    data.get("no_of_albums"),
-                    data.get("user_id"),
-                ),
-            )
-            artist_id = cursor.fetchone()["id"]
-            conn.commit()
-            return artist_id
+        try:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                statement = """
+                    INSERT INTO artist
+                    (name, dob, gender, address, first_release_year, no_of_albums, user_id)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    RETURNING id;
+                """
+                cursor.execute(
+                    statement,
+                    (
+                        data["name"],
+                        data["dob"],
+                        data["gender"],
+                        data["address"],
+                        data.get("first_release_year"),
+                        data.get("no_of_albums"),
+                        data.get("user_id"),
+                    ),
+                )
+                artist_id = cursor.fetchone()["id"]
+                commit(conn)
+                return artist_id
+
+        except Exception:
+            rollback(conn)
+            raise
 
 
-def create_artists_bulk(data_list: list[dict]):
+ARTIST_CSV_COLUMNS = (
+    "name",
+    "dob",
+    "gender",
+    "address",
+    "first_release_year",
+    "no_of_albums",
+)
+# column types for typed export formats (app.utils.export.iter_export)
+ARTIST_CSV_TYPES = ("string", "date", "string", "string", "int", "int")
+
+
+# pg_advisory_xact_lock key serialising artist import batches, see
+# copy_artists_batch (app.migrations uses 7_264_019_001)
+ARTIST_IMPORT_LOCK = 7_264_019_002
+
+
+def copy_artists_batch(rows: list[tuple], upsert: bool = False):
+    """
+    Load one batch of already validated rows (tuples in ARTIST_CSV_COLUMNS
+    order) with COPY into a per-connection staging table and move them into
+    artist in a single statement. Each batch is its own transaction.
+
+    By default every row is inserted as a new artist. With `upsert` rows
+    are matched to existing artists by (name, dob) (idx_artist_name_dob,
+    not a constraint: registration and the artist forms may create artists
+    sharing it): unknown keys are inserted, every artist of a known key
+    holding other values is updated, and artists equal to the row are
+    neither locked nor written. When the batch repeats a key the last row
+    wins. Upsert batches take a transaction level advisory lock so two
+    imports can't both insert the same new key.
+
+    Returns {"inserted", "updated", "unchanged", "duplicates"} counts:
+    inserted and updated are artist rows, unchanged the keys whose artists
+    were all up to date, duplicates the rows dropped for a repeated key.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows((line, *row) for line, row in enumerate(rows))
+    buffer.seek(0)
+
+    columns = ", ".join(ARTIST_CSV_COLUMNS)
+
     with get_connection() as conn:
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            statement = """
-                INSERT INTO artist 
-                (name, dob, gender, address, first_release_year, no_of_albums)
-                VALUES %s
-                RETURNING id;
-            """
-            values = [
-                (
-                    data["name"],
-                    data["dob"],
-                    data["gender"],
-                    data["address"],
-                    data.get("first_release_year"),
-                    data.get("no_of_albums"),
+        try:
+            with conn.cursor() as cursor:
+                if upsert:
+                    cursor.execute("SELECT pg_advisory_xact_lock(%s)", (ARTIST_IMPORT_LOCK,))
+                cursor.execute("""
+                    CREATE TEMP TABLE IF NOT EXISTS artist_import_staging (
+                        line INT,
+                        name VARCHAR(255),
+                        dob DATE,
+                        gender gender_enum,
+                        address VARCHAR(255),
+                        first_release_year INT,
+                        no_of_albums INT
+                    ) ON COMMIT DELETE ROWS;
+                """)
+                cursor.copy_expert(
+                    f"COPY artist_import_staging (line, {columns}) FROM STDIN WITH (FORMAT csv)",
+                    buffer,
                 )
-                for data in data_list
-            ]
-            execute_values(cursor, statement, values)
-            ids = [row["id"] for row in cursor.fetchall()]
-            conn.commit()
-            return ids
+                if not upsert:
+                    cursor.execute(f"""
+                        INSERT INTO artist ({columns})
+                        SELECT {columns} FROM artist_import_staging ORDER BY line;
+                    """)
+                    inserted = cursor.rowcount
+                    commit(conn)
+                    return {"inserted": inserted, "updated": 0, "unchanged": 0, "duplicates": 0}
+
+                # every part of the statement sees the artists as they were
+                # before it, so `known` and `differs` aren't affected by the
+                # rows it writes
+                cursor.execute(f"""
+                    WITH latest AS (
+                        SELECT DISTINCT ON (name, dob) {columns}
+                        FROM artist_import_staging
+                        ORDER BY name, dob, line DESC
+                    ),
+                    matched AS (
+                        SELECT latest.*,
+                               EXISTS (
+                                   SELECT 1 FROM artist
+                                   WHERE artist.name = latest.name
+                                     AND artist.dob = latest.dob
+                               ) AS known,
+                               EXISTS (
+                                   SELECT 1 FROM artist
+                                   WHERE artist.name = latest.name
+                                     AND artist.dob = latest.dob
+                                     AND (artist.gender, artist.address,
+                                          artist.first_release_year, artist.no_of_albums)
+                                         IS DISTINCT FROM
+                                         (latest.gender, latest.address,
+                                          latest.first_release_year, latest.no_of_albums)
+                               ) AS differs
+                        FROM latest
+                    ),
+                    inserted AS (
+                        INSERT INTO artist ({columns})
+                        SELECT {columns} FROM matched WHERE NOT known
+                        RETURNING 1
+                    ),
+                    updated AS (
+                        UPDATE artist
+                        SET gender = matched.gender,
+                            address = matched.address,
+                            first_release_year = matched.first_release_year,
+                            no_of_albums = matched.no_of_albums,
+                            updated_at = NOW()
+                        FROM matched
+                        WHERE matched.differs
+                          AND artist.name = matched.name
+                          AND artist.dob = matched.dob
+                          AND (artist.gender, artist.address,
+                               artist.first_release_year, artist.no_of_albums)
+                              IS DISTINCT FROM
+                              (matched.gender, matched.address,
+                               matched.first_release_year, matched.no_of_albums)
+                        RETURNING 1
+                    )
+                    SELECT
+                        (SELECT COUNT(*) FROM inserted),
+                        (SELECT COUNT(*) FROM updated),
+                        COUNT(*) FILTER (WHERE known AND NOT differs),
+                        (SELECT COUNT(*) FROM artist_import_staging) - COUNT(*)
+                    FROM matched;
+                """)
+                inserted, updated, unchanged, duplicates = cursor.fetchone()
+            commit(conn)
 
+        except Exception:
+            rollback(conn)
+            raise
 
+    if updated:
+        # the updated ids aren't worth returning for a per id invalidation
+        after_commit(lambda: invalidate("artist"))
+    return {
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": unchanged,
+        "duplicates": duplicates,
+    }
+
+
+@cached("artist")
 def get_artist_by_id(id: int):
     with get_connection() as conn:
         with conn.cursor(cursor_factory=RealDictCursor) as cursor:
@@ -287,50 +541,40 @@ def get_artist_by_id(id: int):
     return result
 
 
-def get_artist_by_user_id(user_id: int):
+def update_artist(data: dict):
     with get_connection() as conn:
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            cursor.execute(
+        try:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                statement = """
+                    UPDATE artist
+                    SET name=%s,
+                        dob=%s,
+                        gender=%s,
+                        address=%s,
+                        first_release_year=%s,
+                        no_of_albums=%s,
+                        updated_at=%s
+                    WHERE id=%s
                 """
-                SELECT id, name, dob, gender, address,
-                       created_at, updated_at, first_release_year, no_of_albums
-                FROM artist
-                WHERE user_id = %s
-                """,
-                (user_id,),
-            )
-            result = cursor.fetchone()
-    return result
-
+                cursor.execute(
+                    statement,
+                    (
+                        data["name"],
+                        data["dob"],
+                        data["gender"],
+                        data["address"],
+                        data["first_release_year"],
+                        data["no_of_albums"],
+                        datetime.now(),
+                        data["id"],
+                    ),
+                )
+                commit(conn)
 
-def update_artist(data: dict):
-    with get_connection() as conn:
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            statement = """
-                UPDATE artist
-                SET name=%s,
-                    dob=%s,
-                    gender=%s,
-                    address=%s,
-                    first_release_year=%s,
-                    no_of_albums=%s,
-                    updated_at=%s
-                WHERE id=%s
-            """
-            cursor.execute(
-                statement,
-                (
-                    data["name"],
-                    data["dob"],
-                    data["gender"],
-                    data["address"],
-                    data["first_release_year"],
-                    data["no_of_albums"],
-                    datetime.now(),
-                    data["id"],
-                ),
-            )
-            conn.commit()
+        except Exception:
+            rollback(conn)
+            raise
+    after_commit(lambda: invalidate("artist", data["id"]))
     return True
 
 
@@ -343,59 +587,154 @@ def delete_artist(artist_id: int):
                     raise ValueError("Artist not found")
 
                 cursor.execute("DELETE FROM artist WHERE id = %s", (artist_id,))
-                conn.commit()
+                commit(conn)
 
                 if cursor.rowcount == 0:
                     raise ValueError("No artist was deleted")
 
+            # the artist's music is removed by ON DELETE CASCADE
+            after_commit(lambda: invalidate("artist", artist_id))
+            after_commit(lambda: invalidate("music"))
+
         except Exception as e:
-            conn.rollback()
+            rollback(conn)
             raise e
 
 
+# ownership scoping
+#
+# Model functions taking `owner_id` only see/touch rows belonging to an
+# artist whose user_id is owner_id; None means every row (roles allowed to
+# manage any artist, see app.permissions.owner_scope). The predicate is part
+# of the statement itself so it costs no extra query and a guessed id just
+# matches nothing.
+
+
+def owner_predicate(owner_id: int | None, column: str = "artist.user_id"):
+    """SQL fragment and params limiting rows to owner_id ("" when unscoped)."""
+    if owner_id is None:
+        return "", ()
+    return f"AND {column} = %s", (owner_id,)
+
+
+def owned_artist_predicate(owner_id: int | None, column: str):
+    """Like owner_predicate for statements without a join on artist."""
+    if owner_id is None:
+        return "", ()
+    return (
+        f"AND {column} IN (SELECT artist.id FROM artist WHERE artist.user_id = %s)",
+        (owner_id,),
+    )
+
+
 # music section
 
 
-def fetch_list_music(artist_id: int, page: int = 1, page_size: int = 10):
-    offset = (page - 1) * page_size
+def fetch_artist_detail(
+    artist_id: int | None = None,
+    user_id: int | None = None,
+    page: int = 1,
+    page_size: int = 10,
+    after: str | None = None,
+    owner_id: int | None = None,
+    filters: dict | None = None,
+    sort: str | None = None,
+):
+    """
+    Artist (by id or by its user_id), one page of its music and the music
+    total in a single statement. Returns (artist, music) where music is
+    {"musics", "total", "filters", "sort", "page", "page_size",
+    "total_pages", "after", "next_cursor"}, or (None, None).
+    """
+    filters = MUSIC_LIST.clean_filters(filters)
+    order = MUSIC_LIST.sort(sort)
+    conditions, params = MUSIC_LIST.conditions(filters)
+    cursor_key = decode_cursor(after, parse=order.parse)
+    offset = 0 if cursor_key else (page - 1) * page_size
+    keyset = [order.keyset()] if cursor_key else []
+    owned, owned_params = owner_predicate(owner_id)
+    if filters:
+        # per artist counters don't know about filters, the filtered count
+        # is served by the (artist_id, genre, ...) indexes
+        total_sql = f"""(SELECT COUNT(*) FROM music
+                          WHERE music.artist_id = artist.id
+                          {where_clause(conditions, "AND")})"""
+        total_params = params
+    else:
+        total_sql, total_params = scoped_count_sql("music", "artist.id"), []
+    if artist_id is not None:
+        lookup, lookup_params = "artist.id = %s", (artist_id,)
+    else:
+        lookup, lookup_params = "artist.user_id = %s", (user_id,)
 
     with get_connection() as conn:
         with conn.cursor(cursor_factory=RealDictCursor) as cursor:
             cursor.execute(
-                "SELECT COUNT(*) as total FROM music WHERE artist_id = %s", (artist_id,)
-            )
-            total = cursor.fetchone()["total"]
-
-            cursor.execute(
-                """
-                SELECT id, artist_id, title, album_name, genre,
-                       created_at, updated_at
-                FROM music
-                WHERE artist_id = %s
-                ORDER BY created_at DESC
-                LIMIT %s OFFSET %s
+                f"""
+                SELECT artist.id, artist.name, artist.dob, artist.gender,
+                       artist.address, artist.created_at, artist.updated_at,
+                       artist.first_release_year, artist.no_of_albums,
+                       artist.user_id,
+                       {total_sql} AS music_total,
+                       COALESCE(page.musics, '[]') AS musics
+                FROM artist
+                LEFT JOIN LATERAL (
+                    SELECT json_agg(music ORDER BY {order.order_by()}) AS musics
+                    FROM (
+                        SELECT music.id, music.artist_id, music.title,
+                               music.album_name, music.genre,
+                               music.created_at, music.updated_at
+                        FROM music
+                        WHERE music.artist_id = artist.id
+                              {where_clause(conditions + keyset, "AND")}
+                        ORDER BY {order.order_by()}
+                        LIMIT %s OFFSET %s
+                    ) music
+                ) page ON TRUE
+                WHERE {lookup} {owned}
                 """,
-                (artist_id, page_size, offset),
+                (
+                    *total_params,
+                    *params,
+                    *(cursor_key or ()),
+                    page_size + 1,
+                    offset,
+                    *lookup_params,
+                    *owned_params,
+                ),
             )
-            musics = cursor.fetchall()
+            artist = cursor.fetchone()
 
-    return {
+    if artist is None:
+        return None, None
+
+    total = artist.pop("music_total")
+    musics, next_cursor = split_page(artist.pop("musics"), page_size, order.key)
+    return artist, {
         "musics": musics,
         "total": total,
+        "filters": filters,
+        "sort": MUSIC_LIST.sort_name(sort),
         "page": page,
         "page_size": page_size,
         "total_pages": (total + page_size - 1) // page_size,
+        "after": after,
+        "next_cursor": next_cursor,
     }
 
 
-def get_music_by_id(id: int):
+@cached("music")
+def get_music_row(id: int):
     with get_connection() as conn:
         with conn.cursor(cursor_factory=RealDictCursor) as cursor:
             cursor.execute(
                 """
-                SELECT id, artist_id, title, album_name, genre, created_at, updated_at
+                SELECT music.id, music.artist_id, music.title, music.album_name,
+                       music.genre, music.created_at, music.updated_at,
+                       artist.user_id AS owner_id
                 FROM music
-                WHERE id = %s
+                JOIN artist ON artist.id = music.artist_id
+                WHERE music.id = %s
                 """,
                 (id,),
             )
@@ -403,59 +742,563 @@ def get_music_by_id(id: int):
     return result
 
 
-def create_music(data: dict):
+def get_music_by_id(id: int, owner_id: int | None = None):
+    # the owner comes with the (cached) row, checking it costs no query
+    music = get_music_row(id)
+    if music and owner_id is not None and music["owner_id"] != owner_id:
+        return None
+    return music
+
+
+def create_music(data: dict, owner_id: int | None = None):
+    owned, owned_params = owner_predicate(owner_id)
     with get_connection() as conn:
         with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            statement = """
+            statement = f"""
                 INSERT INTO music (artist_id, title, album_name, genre)
-                VALUES (%s, %s, %s, %s) RETURNING id;
+                SELECT artist.id, %s, %s, %s
+                FROM artist
+                WHERE artist.id = %s {owned}
+                RETURNING id;
             """
             cursor.execute(
                 statement,
                 (
-                    data["artist_id"],
                     data["title"],
                     data["album_name"],
                     data["genre"],
+                    data["artist_id"],
+                    *owned_params,
                 ),
             )
-            record_id = cursor.fetchone()["id"]
-            conn.commit()
-            return record_id
-
-
-def update_music(data: dict):
+            row = cursor.fetchone()
+            if row is None:
+                rollback(conn)
+                raise ValueError("Artist not found")
+            commit(conn)
+            return row["id"]
+
+
+def update_music(music_id: int, data: dict, owner_id: int | None = None):
+    # both the new artist (joined) and the current one must belong to the owner
+    owned, owned_params = owner_predicate(owner_id)
+    owned_current, current_params = owned_artist_predicate(owner_id, "music.artist_id")
     with get_connection() as conn:
         with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            statement = """
+            statement = f"""
                 UPDATE music 
-                SET artist_id=%s, title=%s, album_name=%s, genre=%s, updated_at=%s
-                WHERE id=%s
+                SET artist_id=artist.id, title=%s, album_name=%s, genre=%s, updated_at=%s
+                FROM artist
+                WHERE music.id=%s AND artist.id=%s {owned} {owned_current}
             """
             cursor.execute(
                 statement,
                 (
-                    data["artist_id"],
                     data["title"],
                     data["album_name"],
                     data["genre"],
                     datetime.now(),
-                    data["id"],
+                    music_id,
+                    data["artist_id"],
+                    *owned_params,
+                    *current_params,
                 ),
             )
-            conn.commit()
+            if cursor.rowcount == 0:
+                rollback(conn)
+                raise ValueError("Music not found")
+            commit(conn)
+    after_commit(lambda: invalidate("music", music_id))
     return True
 
 
-def delete_music(music_id: int):
+def delete_music(music_id: int, owner_id: int | None = None):
+    owned, owned_params = owned_artist_predicate(owner_id, "music.artist_id")
     with get_connection() as conn:
         with conn.cursor() as cursor:
-            cursor.execute("SELECT id FROM music WHERE id = %s", (music_id,))
-            if not cursor.fetchone():
+            cursor.execute(
+                f"DELETE FROM music WHERE id = %s {owned}",
+                (music_id, *owned_params),
+            )
+            if cursor.rowcount == 0:
+                rollback(conn)
                 raise ValueError("Music not found")
+            commit(conn)
 
-            cursor.execute("DELETE FROM music WHERE id = %s", (music_id,))
-            conn.commit()
+    after_commit(lambda: invalidate("music", music_id))
 
-            if cursor.rowcount == 0:
-                raise ValueError("No music was deleted")
+
+# music file import/export
+MUSIC_CSV_COLUMNS = ("artist_id", "artist_name", "title", "album_name", "genre")
+MUSIC_CSV_TYPES = ("int", "string", "string", "string", "string")
+
+
+def iter_all_music(batch_size: int = 2000):
+    """
+    Stream every music row with its artist's name, like iter_all_artists.
+    Yields plain tuples in MUSIC_CSV_COLUMNS order, so an export can be
+    imported again as is.
+    """
+    with dedicated_connection() as conn:
+        try:
+            with conn.cursor(name="music_export") as cursor:
+                cursor.itersize = batch_size
+                cursor.execute("""
+                    SELECT music.artist_id, artist.name, music.title,
+                           music.album_name, music.genre
+                    FROM music
+                    JOIN artist ON artist.id = music.artist_id
+                    ORDER BY music.id;
+                """)
+                yield from cursor
+        finally:
+            conn.rollback()
+
+
+def copy_music_batch(rows: list[tuple]):
+    """
+    Load one batch of validated rows, tuples of (line, artist_id,
+    artist_name, title, album_name, genre) where artist_id or artist_name
+    may be "", into music. The artist is resolved for the whole batch in
+    the INSERT itself: by id when given, otherwise by name when exactly one
+    artist has that name. Rows whose artist can't be resolved are skipped.
+    Each batch is its own transaction.
+
+    Returns (inserted, [{"line", "artist_id", "artist_name", "matches"}])
+    for the skipped rows.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+
+    with get_connection() as conn:
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    CREATE TEMP TABLE IF NOT EXISTS music_import_staging (
+                        line INT,
+                        artist_id BIGINT,
+                        artist_name VARCHAR(255),
+                        title VARCHAR(255),
+                        album_name VARCHAR(255),
+                        genre genre_enum
+                    ) ON COMMIT DELETE ROWS;
+                """)
+                cursor.copy_expert(
+                    """
+                    COPY music_import_staging
+                    (line, artist_id, artist_name, title, album_name, genre)
+                    FROM STDIN WITH (FORMAT csv)
+                    """,
+                    buffer,
+                )
+                # names are looked up once per distinct name (idx_artist_name_id)
+                # and hash joined back, not per row
+                cursor.execute("""
+                    WITH by_name AS (
+                        SELECT artist.name, MIN(artist.id) AS id, COUNT(*) AS matches
+                        FROM artist
+                        WHERE artist.name IN (
+                            SELECT artist_name FROM music_import_staging
+                            WHERE artist_id IS NULL
+                        )
+                        GROUP BY artist.name
+                    ),
+                    resolved AS (
+                        SELECT staging.line, staging.title, staging.album_name,
+                               staging.genre, staging.artist_id AS given_id,
+                               staging.artist_name,
+                               COALESCE(by_name.matches, 0) AS matches,
+                               CASE
+                                   WHEN staging.artist_id IS NOT NULL THEN by_id.id
+                                   WHEN by_name.matches = 1 THEN by_name.id
+                               END AS artist_id
+                        FROM music_import_staging staging
+                        LEFT JOIN artist by_id ON by_id.id = staging.artist_id
+                        LEFT JOIN by_name
+                            ON staging.artist_id IS NULL
+                           AND by_name.name = staging.artist_name
+                    ),
+                    inserted AS (
+                        INSERT INTO music (artist_id, title, album_name, genre)
+                        SELECT artist_id, title, album_name, genre
+                        FROM resolved
+                        WHERE artist_id IS NOT NULL
+                        ORDER BY line
+                        RETURNING 1
+                    )
+                    SELECT
+                        (SELECT COUNT(*) FROM inserted),
+                        COALESCE(
+                            (SELECT json_agg(json_build_object(
+                                        'line', line,
+                                        'artist_id', given_id,
+                                        'artist_name', artist_name,
+                                        'matches', matches
+                                    ) ORDER BY line)
+                             FROM resolved WHERE artist_id IS NULL),
+                            '[]'
+                        );
+                """)
+                inserted, unresolved = cursor.fetchone()
+            commit(conn)
+            return inserted, unresolved
+
+        except Exception:
+            rollback(conn)
+            raise
+
+
+# search section
+#
+# Matches are rows whose search vector matches the query words, or whose
+# text is trigram-similar to (typos) or contains (partial words) the query;
+# all three are served by the GIN indexes of migration 0009. The search
+# vectors are the expressions indexed there, they must stay identical to
+# them or the planner falls back to a sequential scan. Results are
+# ranked by the best of text rank and similarity and paginated by
+# (rank, id). The rank is cast to float8 so the value round-tripped through
+# the cursor compares equal to the one recomputed on the next page.
+#
+# A trigram index can only serve ILIKE '%q%' when q has a full trigram, so
+# the contains branch is left out for shorter queries; they are matched by
+# words and similarity only, instead of scanning the whole table.
+
+MIN_CONTAINS_LENGTH = 3
+
+ARTIST_SEARCH_VECTOR = "to_tsvector('simple', name)"
+MUSIC_SEARCH_VECTOR = (
+    "(setweight(to_tsvector('simple', music.title), 'A')"
+    " || setweight(to_tsvector('simple', music.album_name), 'B'))"
+)
+
+
+def contains_pattern(text: str):
+    """ILIKE pattern matching `text` anywhere, with its wildcards escaped."""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def contains_condition(columns, text: str):
+    """`OR column ILIKE pattern` for each column, empty for short queries."""
+    if len(text) < MIN_CONTAINS_LENGTH:
+        return "", []
+    pattern = contains_pattern(text)
+    return "".join(f" OR {column} ILIKE %s" for column in columns), [pattern] * len(columns)
+
+
+def _search_page(rows, page, page_size, after, key):
+    rows, next_cursor = split_page(rows, page_size, sort_key="rank")
+    return {
+        key: rows,
+        "page": page,
+        "page_size": page_size,
+        "after": after,
+        "next_cursor": next_cursor,
+    }
+
+
+def search_artists(
+    q: str,
+    page: int = 1,
+    page_size: int = 10,
+    after: str | None = None,
+    filters: dict | None = None,
+):
+    filters = ARTIST_LIST.clean_filters(filters)
+    conditions, params = ARTIST_LIST.conditions(filters)
+    cursor_key = decode_cursor(after, parse=float)
+    offset = 0 if cursor_key else (page - 1) * page_size
+    keyset = "WHERE (rank, id) < (%s, %s)" if cursor_key else ""
+    contains, contains_params = contains_condition(("name",), q)
+
+    with get_connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(
+                f"""
+                SELECT * FROM (
+                    SELECT id, name, dob, gender, address, first_release_year,
+                           created_at, updated_at,
+                           GREATEST(
+                               ts_rank({ARTIST_SEARCH_VECTOR}, query),
+                               similarity(name, %s)
+                           )::float8 AS rank
+                    FROM artist, websearch_to_tsquery('simple', %s) query
+                    WHERE (
+                        {ARTIST_SEARCH_VECTOR} @@ query
+                        OR name %% %s{contains}
+                    ) {where_clause(conditions, "AND")}
+                ) matches
+                {keyset}
+                ORDER BY rank DESC, id DESC
+                LIMIT %s OFFSET %s
+                """,
+                (
+                    q,
+                    q,
+                    q,
+                    *contains_params,
+                    *params,
+                    *(cursor_key or ()),
+                    page_size + 1,
+                    offset,
+                ),
+            )
+            rows = cursor.fetchall()
+
+    data = _search_page(rows, page, page_size, after, "artists")
+    data["filters"] = filters
+    return data
+
+
+def search_music(
+    q: str,
+    page: int = 1,
+    page_size: int = 10,
+    after: str | None = None,
+    owner_id: int | None = None,
+):
+    cursor_key = decode_cursor(after, parse=float)
+    offset = 0 if cursor_key else (page - 1) * page_size
+    keyset = "WHERE (rank, id) < (%s, %s)" if cursor_key else ""
+    owned, owned_params = owner_predicate(owner_id)
+    contains, contains_params = contains_condition(
+        ("music.title", "music.album_name"), q
+    )
+
+    with get_connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(
+                f"""
+                SELECT * FROM (
+                    SELECT music.id, music.artist_id, music.title,
+                           music.album_name, music.genre, music.created_at,
+                           artist.name AS artist_name,
+                           GREATEST(
+                               ts_rank({MUSIC_SEARCH_VECTOR}, query),
+                               similarity(music.title, %s),
+                               similarity(music.album_name, %s)
+                           )::float8 AS rank
+                    FROM music
+                    JOIN artist ON artist.id = music.artist_id,
+                    websearch_to_tsquery('simple', %s) query
+                    WHERE (
+                        {MUSIC_SEARCH_VECTOR} @@ query
+                        OR music.title %% %s
+                        OR music.album_name %% %s{contains}
+                    ) {owned}
+                ) matches
+                {keyset}
+                ORDER BY rank DESC, id DESC
+                LIMIT %s OFFSET %s
+                """,
+                (
+                    q,
+                    q,
+                    q,
+                    q,
+                    q,
+                    *contains_params,
+                    *owned_params,
+                    *(cursor_key or ()),
+                    page_size + 1,
+                    offset,
+                ),
+            )
+            rows = cursor.fetchall()
+
+    return _search_page(rows, page, page_size, after, "musics")
+
+
+# job section
+
+
+def create_job(kind: str, created_by: int | None, input_path: str | None = None):
+    with get_connection() as conn:
+        try:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute(
+                    """
+                    INSERT INTO jobs (kind, created_by, input_path)
+                    VALUES (%s, %s, %s)
+                    RETURNING id;
+                    """,
+                    (kind, created_by, input_path),
+                )
+                job_id = cursor.fetchone()["id"]
+                commit(conn)
+                return job_id
+        except Exception:
+            rollback(conn)
+            raise
+
+
+def get_job_by_id(id: int):
+    with get_connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(
+                """
+                SELECT id, kind, status, input_path, result_path, progress, total,
+                       report, error, created_by, created_at, started_at, finished_at
+                FROM jobs
+                WHERE id = %s
+                """,
+                (id,),
+            )
+            result = cursor.fetchone()
+    return result
+
+
+def _update_job(statement: str, params: tuple):
+    with get_connection() as conn:
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(statement, params)
+            commit(conn)
+        except Exception:
+            rollback(conn)
+            raise
+
+
+def claim_next_job():
+    """
+    Mark the oldest pending job as running and return it.
+    SKIP LOCKED lets several workers poll the table without blocking each
+    other or picking the same job.
+    """
+    with get_connection() as conn:
+        try:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute("""
+                    UPDATE jobs
+                    SET status = 'running', started_at = NOW(),
+                        heartbeat_at = NOW(), attempts = attempts + 1
+                    WHERE id = (
+                        SELECT id FROM jobs
+                        WHERE status = 'pending'
+                        ORDER BY id
+                        FOR UPDATE SKIP LOCKED
+                        LIMIT 1
+                    )
+                    RETURNING id, kind, input_path, created_by;
+                """)
+                job = cursor.fetchone()
+                commit(conn)
+                return job
+        except Exception:
+            rollback(conn)
+            raise
+
+
+def update_job_progress(job_id: int, progress: int, total: int | None = None):
+    """Record progress, which is also the heartbeat of a running job."""
+    _update_job(
+        """
+        UPDATE jobs
+        SET progress = %s, total = COALESCE(%s, total), heartbeat_at = NOW()
+        WHERE id = %s
+        """,
+        (progress, total, job_id),
+    )
+
+
+def finish_job(job_id: int, result_path: str | None = None, report: dict | None = None):
+    _update_job(
+        """
+        UPDATE jobs
+        SET status = 'done', result_path = %s, report = %s,
+            finished_at = NOW()
+        WHERE id = %s
+        """,
+        (result_path, Json(report) if report is not None else None, job_id),
+    )
+
+
+def fail_job(job_id: int, error: str):
+    _update_job(
+        """
+        UPDATE jobs
+        SET status = 'failed', error = %s, finished_at = NOW()
+        WHERE id = %s
+        """,
+        (error, job_id),
+    )
+
+
+def recover_stale_jobs(stale_after: float, retry_kinds: tuple, max_attempts: int, error: str):
+    """
+    Running jobs without a heartbeat for `stale_after` seconds (their
+    worker died): kinds in `retry_kinds` that ran fewer than
+    `max_attempts` times go back to pending, the others fail with `error`.
+    Returns [{"id", "status", "input_path"}] of the recovered jobs.
+    """
+    with get_connection() as conn:
+        try:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute(
+                    """
+                    WITH stale AS (
+                        SELECT id,
+                               CASE WHEN kind = ANY(%s) AND attempts < %s
+                                    THEN 'pending' ELSE 'failed' END AS next_status
+                        FROM jobs
+                        WHERE status = 'running'
+                          AND COALESCE(heartbeat_at, started_at)
+                              < NOW() - make_interval(secs => %s)
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    UPDATE jobs
+                    SET status = stale.next_status,
+                        progress = CASE WHEN stale.next_status = 'pending' THEN 0
+                                        ELSE jobs.progress END,
+                        error = CASE WHEN stale.next_status = 'failed' THEN %s END,
+                        finished_at = CASE WHEN stale.next_status = 'failed' THEN NOW() END
+                    FROM stale
+                    WHERE jobs.id = stale.id
+                    RETURNING jobs.id, jobs.status, jobs.input_path;
+                    """,
+                    (list(retry_kinds), max_attempts, stale_after, error),
+                )
+                jobs = cursor.fetchall()
+                commit(conn)
+                return jobs
+        except Exception:
+            rollback(conn)
+            raise
+
+
+def delete_finished_jobs(older_than: float):
+    """
+    Delete done and failed jobs finished more than `older_than` seconds
+    ago. Returns the file paths they referenced, for the caller to remove.
+    """
+    with get_connection() as conn:
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    DELETE FROM jobs
+                    WHERE status IN ('done', 'failed')
+                      AND finished_at < NOW() - make_interval(secs => %s)
+                    RETURNING input_path, result_path;
+                    """,
+                    (older_than,),
+                )
+                paths = [path for row in cursor.fetchall() for path in row if path]
+                commit(conn)
+                return paths
+        except Exception:
+            rollback(conn)
+            raise
+
+
+def list_job_file_paths():
+    """Every input and result path still referenced by a job."""
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT input_path FROM jobs WHERE input_path IS NOT NULL
+                UNION
+                SELECT result_path FROM jobs WHERE result_path IS NOT NULL
+            """)
+            return {row[0] for row in cursor.fetchall()}
@@ -0,0 +1,186 @@
+from flask import current_app, flash, redirect, request, url_for
+
+from app.authz import load_principal
+
+# role -> permissions granted to it
+ROLE_PERMISSIONS = {
+    "super_admin": (
+        "dashboard.view",
+        "dashboard.stats",
+        "user.manage",
+        "artist.manage",
+        "artist.delete_with_account",
+        "music.manage",
+        "music.manage_any",
+        "job.view",
+        "job.view_all",
+        "metrics.view",
+    ),
+    "artist_manager": (
+        "dashboard.view",
+        "dashboard.stats",
+        "artist.manage",
+        "music.manage",
+        "music.manage_any",
+        "job.view",
+    ),
+    "artist": (
+        "dashboard.view",
+        "artist.own_profile",
+        "music.manage",
+    ),
+}
+
+# endpoint -> permissions it requires (all of them)
+ENDPOINT_PERMISSIONS = {
+    "dashboard": ("dashboard.view",),
+    "user.list_user_view": ("user.manage",),
+    "user.detail_user_view": ("user.manage",),
+    "user.update_user_view": ("user.manage",),
+    "user.delete_user_view": ("user.manage",),
+    "user.export_user_to_file": ("user.manage",),
+    "artist.list_artist_view": ("artist.manage",),
+    "artist.create_artist_view": ("artist.manage",),
+    "artist.create_artist_from_file": ("artist.manage",),
+    "artist.export_artist_to_file": ("artist.manage",),
+    "artist.export_artist_job": ("artist.manage",),
+    "artist.create_music_from_file": ("artist.manage", "music.manage_any"),
+    "artist.export_music_to_file": ("artist.manage", "music.manage_any"),
+    "artist.export_music_job": ("artist.manage", "music.manage_any"),
+    "artist.detail_artist_view": ("artist.manage",),
+    "artist.get_artist_by_user": ("artist.own_profile",),
+    "artist.update_artist_view": ("artist.manage",),
+    "artist.delete_artist_view": ("artist.manage",),
+    "music.search_music_view": ("music.manage",),
+    "music.create_music_for_artist_view": ("music.manage",),
+    "music.update_music_view": ("music.manage",),
+    "music.delete_music_view": ("music.manage",),
+    "job.detail_job_view": ("job.view",),
+    "job.download_job_result": ("job.view",),
+}
+
+# endpoints reachable without logging in; every other endpoint must be listed
+# in ENDPOINT_PERMISSIONS so a new route can't end up public by accident.
+# "metrics" checks its bearer token or metrics.view itself, scrapers can't
+# log in.
+PUBLIC_ENDPOINTS = frozenset(
+    {
+        "static",
+        "hello",
+        "home",
+        "metrics",
+        "auth.register",
+        "auth.login",
+        "auth.logout",
+    }
+)
+
+
+class PermissionTable:
+    """
+    The registry compiled to bitmasks: each permission is one bit, a role
+    and an endpoint are the OR of their permissions, so a check is a
+    single dict lookup and AND no matter how many rules exist.
+    """
+
+    def __init__(self, role_permissions: dict, endpoint_permissions: dict):
+        names = sorted(
+            {name for granted in role_permissions.values() for name in granted}
+        )
+        self.bits = {name: 1 << index for index, name in enumerate(names)}
+
+        for endpoint, required in endpoint_permissions.items():
+            unknown = set(required) - self.bits.keys()
+            if unknown:
+                raise ValueError(
+                    f"Endpoint '{endpoint}' requires unknown permissions {sorted(unknown)}"
+                )
+
+        self.role_masks = {
+            role: self.mask(granted) for role, granted in role_permissions.items()
+        }
+        self.endpoint_masks = {
+            endpoint: self.mask(required)
+            for endpoint, required in endpoint_permissions.items()
+        }
+
+    def mask(self, permissions):
+        value = 0
+        for name in permissions:
+            value |= self.bits[name]
+        return value
+
+    def names(self, mask: int):
+        return [name for name, bit in self.bits.items() if mask & bit]
+
+    def role_allows(self, role: str, required: int):
+        return self.role_masks.get(role, 0) & required == required
+
+    def roles_for(self, required: int):
+        return [role for role in self.role_masks if self.role_allows(role, required)]
+
+
+def compile_permissions(app):
+    """
+    Build the PermissionTable once all blueprints are registered and fail at
+    startup if an endpoint is neither public nor declared (or declared but
+    not routed, i.e. a typo).
+    """
+    table = PermissionTable(ROLE_PERMISSIONS, ENDPOINT_PERMISSIONS)
+
+    routed = set(app.view_functions)
+    undeclared = routed - PUBLIC_ENDPOINTS - table.endpoint_masks.keys()
+    if undeclared:
+        raise RuntimeError(f"No permissions declared for endpoints {sorted(undeclared)}")
+    unrouted = table.endpoint_masks.keys() - routed
+    if unrouted:
+        raise RuntimeError(f"Permissions declared for unknown endpoints {sorted(unrouted)}")
+
+    app.extensions["permissions"] = table
+    return table
+
+
+def has_permission(permission: str):
+    """Whether the logged in user holds `permission`, for checks inside a view."""
+    principal = load_principal()
+    if principal is None:
+        return False
+    table = current_app.extensions["permissions"]
+    return table.role_allows(principal["role"], table.bits[permission])
+
+
+def owner_scope(permission: str):
+    """
+    owner_id for the scoped model functions: None when the user holds
+    `permission` (every row), otherwise their own user id.
+    """
+    if has_permission(permission):
+        return None
+    return load_principal()["id"]
+
+
+def check_permissions():
+    """before_request hook enforcing ENDPOINT_PERMISSIONS."""
+    required = current_app.extensions["permissions"].endpoint_masks.get(
+        request.endpoint
+    )
+    if required is None:
+        # public endpoint, or a 404/405 without an endpoint
+        return None
+
+    principal = load_principal()
+    if principal is None:
+        flash("Please login first.", "error")
+        return redirect(url_for("auth.login", next=request.path))
+
+    table = current_app.extensions["permissions"]
+    if not table.role_allows(principal["role"], required):
+        flash("You are not authorized to access this page.", "error")
+        return redirect(url_for("dashboard"))
+    return None
+
+
+def init_permissions(app):
+    compile_permissions(app)
+    app.before_request(check_permissions)
+    app.jinja_env.globals["can"] = has_permission
@@ -0,0 +1,208 @@
+import threading
+import time
+from collections import deque
+
+import psycopg2
+from psycopg2 import extensions
+
+from app.utils.exceptions import PoolTimeoutError
+
+# upper bounds (seconds) of the checkout wait time histogram
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, float("inf"))
+
+
+class ConnectionPool:
+    """
+    Thread safe psycopg2 connection pool.
+
+    Unlike psycopg2's ThreadedConnectionPool a checkout waits (up to
+    `timeout` seconds) for a connection to be returned instead of raising
+    as soon as `maxconn` connections are in use. Connections are closed and
+    replaced after `max_uses` checkouts, and pinged before reuse when they
+    sat idle for more than `max_idle` seconds.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        minconn: int = 1,
+        maxconn: int = 10,
+        timeout: float = 5,
+        max_uses: int = 0,
+        max_idle: float = 0,
+    ):
+        self.dsn = dsn
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.max_uses = max_uses
+        self.max_idle = max_idle
+
+        self._cond = threading.Condition()
+        # LIFO of (conn, returned_at): hot connections are reused first and
+        # the rest go idle long enough to be recycled.
+        self._idle = deque()
+        self._uses = {}
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+
+        self._checkouts = 0
+        self._timeouts = 0
+        self._recycled = 0
+        self._wait_sum = 0.0
+        self._wait_buckets = [0] * len(WAIT_BUCKETS)
+
+        for _ in range(minconn):
+            conn = self._connect()
+            with self._cond:
+                self._size += 1
+                self._idle.append((conn, time.monotonic()))
+
+    def _connect(self):
+        conn = psycopg2.connect(self.dsn)
+        self._uses[id(conn)] = 0
+        return conn
+
+    def _discard(self, conn):
+        self._uses.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_alive(self, conn):
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def getconn(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        conn, returned_at = None, None
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeoutError("Connection pool is closed")
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                    break
+                if self._size < self.maxconn:
+                    # reserve the slot, the connection is opened outside the lock
+                    self._size += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"No database connection available after {self.timeout}s"
+                    )
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+            self._in_use += 1
+            self._record_wait(time.monotonic() - started)
+
+        try:
+            if conn is not None and (
+                conn.closed
+                or (
+                    self.max_idle
+                    and time.monotonic() - returned_at > self.max_idle
+                    and not self._is_alive(conn)
+                )
+            ):
+                self._discard(conn)
+                with self._cond:
+                    self._recycled += 1
+                conn = None
+            if conn is None:
+                conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        self._uses[id(conn)] = self._uses.get(id(conn), 0) + 1
+        return conn
+
+    def putconn(self, conn, close: bool = False):
+        discard = close or conn.closed
+        if not discard:
+            status = conn.info.transaction_status
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                discard = True
+            elif status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except Exception:
+                    discard = True
+
+        recycle = (
+            not discard
+            and self.max_uses
+            and self._uses.get(id(conn), 0) >= self.max_uses
+        )
+        if discard or recycle:
+            self._discard(conn)
+
+        with self._cond:
+            if recycle:
+                discard = True
+                self._recycled += 1
+            self._in_use -= 1
+            if discard or self._closed:
+                self._size -= 1
+                if not discard:
+                    self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._size -= 1
+                self._discard(conn)
+            self._cond.notify_all()
+
+    def _record_wait(self, seconds: float):
+        self._checkouts += 1
+        self._wait_sum += seconds
+        for index, bound in enumerate(WAIT_BUCKETS):
+            if seconds <= bound:
+                self._wait_buckets[index] += 1
+                break
+
+    def stats(self):
+        with self._cond:
+            cumulative, buckets = 0, {}
+            for bound, count in zip(WAIT_BUCKETS, self._wait_buckets):
+                cumulative += count
+                buckets[bound] = cumulative
+            return {
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "max": self.maxconn,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "recycled": self._recycled,
+                "wait_seconds_sum": self._wait_sum,
+                "wait_seconds_buckets": buckets,
+            }
@@ -0,0 +1,186 @@
+import threading
+import time
+
+from app.config import (
+    LOGIN_LIMIT_BACKEND,
+    LOGIN_LIMIT_WINDOW,
+    LOGIN_LIMIT_PER_IP,
+    LOGIN_LIMIT_PER_EMAIL,
+    LOGIN_LIMIT_MAX_KEYS,
+)
+from app.db import get_connection, commit, rollback
+
+
+def _estimate(window: float, index: int, now: float, previous: int, current: int):
+    """
+    Sliding window count approximated from two fixed windows: all hits of
+    the current window plus the share of the previous one still inside
+    the sliding window.
+    """
+    elapsed = now / window - index
+    return previous * (1 - elapsed) + current
+
+
+class MemoryCounter:
+    """
+    Per process counters, {key: [window index, previous hits, current hits]}.
+    Keys untouched for two windows are evicted by a sweep that runs at most
+    once per window, and the oldest keys go first above `max_keys`.
+    """
+
+    def __init__(self, window: float, max_keys: int):
+        self.window = window
+        self.max_keys = max_keys
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._swept = time.monotonic()
+
+    def _roll(self, key: str, index: int):
+        entry = self._counters.get(key)
+        if entry is None or entry[0] < index - 1:
+            return [index, 0, 0]
+        if entry[0] == index - 1:
+            return [index, entry[2], 0]
+        return entry
+
+    def count(self, key: str):
+        now = time.time()
+        index = int(now // self.window)
+        with self._lock:
+            _, previous, current = self._roll(key, index)
+        return _estimate(self.window, index, now, previous, current)
+
+    def hit(self, key: str):
+        now = time.time()
+        index = int(now // self.window)
+        with self._lock:
+            entry = self._roll(key, index)
+            entry[2] += 1
+            # re-inserted so dict order stays least recently hit first
+            self._counters.pop(key, None)
+            self._counters[key] = entry
+            self._sweep(index)
+
+    def reset(self, key: str):
+        with self._lock:
+            self._counters.pop(key, None)
+
+    def _sweep(self, index: int):
+        if (
+            len(self._counters) <= self.max_keys
+            and time.monotonic() - self._swept < self.window
+        ):
+            return
+        self._swept = time.monotonic()
+        for key in [key for key, entry in self._counters.items() if entry[0] < index - 1]:
+            del self._counters[key]
+        while len(self._counters) > self.max_keys:
+            del self._counters[next(iter(self._counters))]
+
+
+class PostgresCounter:
+    """
+    Counters shared by every worker through the UNLOGGED login_attempts
+    table (no WAL, it is lost on a crash which is fine for throttling).
+    Costs one query per check and per hit.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._swept = 0.0
+
+    def count(self, key: str):
+        now = time.time()
+        index = int(now // self.window)
+        with get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT
+                        COALESCE(SUM(hits) FILTER (WHERE window_index = %s), 0),
+                        COALESCE(SUM(hits) FILTER (WHERE window_index = %s), 0)
+                    FROM login_attempts
+                    WHERE key = %s AND window_index >= %s
+                    """,
+                    (index - 1, index, key, index - 1),
+                )
+                previous, current = cursor.fetchone()
+        return _estimate(self.window, index, now, previous, current)
+
+    def hit(self, key: str):
+        index = int(time.time() // self.window)
+        with get_connection() as conn:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        """
+                        INSERT INTO login_attempts (key, window_index, hits)
+                        VALUES (%s, %s, 1)
+                        ON CONFLICT (key, window_index)
+                        DO UPDATE SET hits = login_attempts.hits + 1
+                        """,
+                        (key, index),
+                    )
+                    if time.monotonic() - self._swept >= self.window:
+                        self._swept = time.monotonic()
+                        cursor.execute(
+                            "DELETE FROM login_attempts WHERE window_index < %s",
+                            (index - 1,),
+                        )
+                commit(conn)
+            except Exception:
+                rollback(conn)
+                raise
+
+    def reset(self, key: str):
+        with get_connection() as conn:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("DELETE FROM login_attempts WHERE key = %s", (key,))
+                commit(conn)
+            except Exception:
+                rollback(conn)
+                raise
+
+
+def create_counter(backend: str = LOGIN_LIMIT_BACKEND):
+    if backend == "memory":
+        return MemoryCounter(LOGIN_LIMIT_WINDOW, LOGIN_LIMIT_MAX_KEYS)
+    if backend == "postgres":
+        return PostgresCounter(LOGIN_LIMIT_WINDOW)
+    raise ValueError(f"Unknown LOGIN_LIMIT_BACKEND '{backend}'")
+
+
+counter = create_counter()
+
+
+def _ip_key(ip: str):
+    return f"ip:{ip}"
+
+
+def _email_key(email: str):
+    return f"email:{email.strip().lower()}"
+
+
+def login_blocked(ip: str, email: str):
+    """
+    True when `ip` made LOGIN_LIMIT_PER_IP attempts or `email` had
+    LOGIN_LIMIT_PER_EMAIL failed attempts within the last LOGIN_LIMIT_WINDOW
+    seconds. Checked before the user lookup and the password hash.
+    """
+    return (
+        counter.count(_ip_key(ip)) >= LOGIN_LIMIT_PER_IP
+        or counter.count(_email_key(email)) >= LOGIN_LIMIT_PER_EMAIL
+    )
+
+
+def record_login_attempt(ip: str):
+    counter.hit(_ip_key(ip))
+
+
+def record_login_failure(email: str):
+    counter.hit(_email_key(email))
+
+
+def clear_login_failures(email: str):
+    counter.reset(_email_key(email))
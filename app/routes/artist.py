@@ -5,47 +5,60 @@ from flask import (
     flash,
     redirect,
     url_for,
-    send_file,
     session,
 )
-from app.utils.decorators import role_required
+from app.db import atomic
 from app.models import (
     fetch_list_artist,
+    search_artists,
     create_artist,
-    create_artists_bulk,
     get_artist_by_id,
     update_artist,
-    fetch_list_music,
-    get_all_artists,
-    get_artist_by_user_id,
+    fetch_artist_detail,
+    iter_all_artists,
+    iter_all_music,
     delete_artist,
     delete_user,
+    create_job,
+    ARTIST_CSV_COLUMNS,
+    ARTIST_CSV_TYPES,
+    MUSIC_CSV_COLUMNS,
+    MUSIC_CSV_TYPES,
 )
 from app.services.artist import validate_artist
+from app.jobs import job_file_path
+from app.permissions import has_permission, owner_scope
 from app.utils.exceptions import ValidationError
-import io
-import csv
+from app.utils.export import export_response
 
 bp = Blueprint("artist", __name__, url_prefix="/artist")
 
 
 @bp.route("", methods=("GET",))
-@role_required("super_admin", "artist_manager")
 def list_artist_view():
     page = request.args.get("page", 1, type=int)
     page_size = request.args.get("page_size", 10, type=int)
-
-    data = fetch_list_artist(page, page_size)
+    after = request.args.get("after")
+    q = request.args.get("q", "").strip()
+
+    if q:
+        # ranked by relevance, ?sort= only applies to the plain list
+        data = search_artists(q, page, page_size, after, filters=request.args)
+        data["sort"] = None
+    else:
+        data = fetch_list_artist(
+            page, page_size, after, filters=request.args, sort=request.args.get("sort")
+        )
     print(data)
     return render_template(
         "artist/list_artist.j2",
         template_name="artist/list_artist.j2",
+        q=q or None,
         **data,
     )
 
 
 @bp.route("/create", methods=("GET", "POST"))
-@role_required("super_admin", "artist_manager")
 def create_artist_view():
     if request.method == "POST":
         try:
@@ -67,102 +80,99 @@ def create_artist_view():
 
 
 @bp.route("/file/create", methods=["POST"])
-@role_required("super_admin", "artist_manager")
 def create_artist_from_file():
-    REQUIRED_COLUMNS = {
-        "name",
-        "dob",
-        "gender",
-        "address",
-        "first_release_year",
-        "no_of_albums",
-    }
     file = request.files.get("file")
     if not file:
         flash("Please Upload File", "error")
         return redirect(url_for("artist.list_artist_view"))
     try:
-        stream = io.StringIO(file.stream.read().decode("UTF8"), newline=None)
-        csv_reader = csv.DictReader(stream)
-        csv_columns = set(csv_reader.fieldnames or [])
+        # the worker reads the file from the shared job storage, the request
+        # only streams the upload to disk and queues the job.
+        # "insert" adds every row, "upsert" updates artists already known
+        # by (name, dob) and adds the others
+        kind = "artist_upsert" if request.form.get("mode") == "upsert" else "artist_import"
+        input_path = job_file_path(".csv")
+        file.save(input_path)
+        job_id = create_job(kind, session.get("user_id"), input_path)
+
+        flash("Import started, you can follow its progress here.", "success")
+        return redirect(url_for("job.detail_job_view", job_id=job_id))
 
-        missing_columns = REQUIRED_COLUMNS - csv_columns
-        if missing_columns:
-            flash(f"Missing columns: {', '.join(missing_columns)}", "error")
-            return redirect(url_for("artist.list_artist_view"))
+    except Exception as e:
+        flash(str(e), "error")
+        return redirect(url_for("artist.list_artist_view"))
 
-        artists_to_insert = []
-
-        for row in csv_reader:
-            if not row.get("name"):
-                continue
-
-            artists_to_insert.append(
-                {
-                    "name": row.get("name"),
-                    "dob": row.get("dob"),
-                    "gender": row.get("gender"),
-                    "address": row.get("address"),
-                    "first_release_year": row.get("first_release_year"),
-                    "no_of_albums": row.get("no_of_albums"),
-                }
-            )
 
-        if not artists_to_insert:
-            flash("No valid records found.", "error")
-            return redirect(url_for("artist.list_artist_view"))
+@bp.route("/file/export", methods=["GET"])
+def export_artist_to_file():
+    # ?format=csv (default), csv.gz, ndjson, parquet or arrow
+    try:
+        return export_response(
+            request.args.get("format", "csv"),
+            "artists_export",
+            ARTIST_CSV_COLUMNS,
+            ARTIST_CSV_TYPES,
+            iter_all_artists(),
+        )
+
+    except Exception as e:
+        flash(str(e), "error")
+        return redirect(url_for("artist.list_artist_view"))
 
-        create_artists_bulk(artists_to_insert)
 
-        flash(f"{len(artists_to_insert)} artists created successfully!", "success")
+@bp.route("/file/export/job", methods=["POST"])
+def export_artist_job():
+    try:
+        job_id = create_job("artist_export", session.get("user_id"))
+        flash("Export started, the file can be downloaded when it is done.", "success")
+        return redirect(url_for("job.detail_job_view", job_id=job_id))
+
+    except Exception as e:
+        flash(str(e), "error")
         return redirect(url_for("artist.list_artist_view"))
 
+
+@bp.route("/music/file/create", methods=["POST"])
+def create_music_from_file():
+    file = request.files.get("file")
+    if not file:
+        flash("Please Upload File", "error")
+        return redirect(url_for("artist.list_artist_view"))
+    try:
+        input_path = job_file_path(".csv")
+        file.save(input_path)
+        job_id = create_job("music_import", session.get("user_id"), input_path)
+
+        flash("Import started, you can follow its progress here.", "success")
+        return redirect(url_for("job.detail_job_view", job_id=job_id))
+
     except Exception as e:
         flash(str(e), "error")
         return redirect(url_for("artist.list_artist_view"))
 
 
-@bp.route("/file/export", methods=["GET"])
-@role_required("super_admin", "artist_manager")
-def export_artist_to_file():
+@bp.route("/music/file/export", methods=["GET"])
+def export_music_to_file():
     try:
-        artists = get_all_artists()
-
-        output = io.StringIO()
-        writer = csv.writer(output)
-
-        # No ID column
-        writer.writerow(
-            [
-                "name",
-                "dob",
-                "gender",
-                "address",
-                "first_release_year",
-                "no_of_albums",
-            ]
+        return export_response(
+            request.args.get("format", "csv"),
+            "music_export",
+            MUSIC_CSV_COLUMNS,
+            MUSIC_CSV_TYPES,
+            iter_all_music(),
         )
 
-        for artist in artists:
-            writer.writerow(
-                [
-                    artist["name"],
-                    artist["dob"],
-                    artist["gender"],
-                    artist["address"],
-                    artist["first_release_year"],
-                    artist["no_of_albums"],
-                ]
-            )
+    except Exception as e:
+        flash(str(e), "error")
+        return redirect(url_for("artist.list_artist_view"))
 
-        output.seek(0)
 
-        return send_file(
-            io.BytesIO(output.getvalue().encode("utf-8")),
-            mimetype="text/csv",
-            as_attachment=True,
-            download_name="artists_export.csv",
-        )
+@bp.route("/music/file/export/job", methods=["POST"])
+def export_music_job():
+    try:
+        job_id = create_job("music_export", session.get("user_id"))
+        flash("Export started, the file can be downloaded when it is done.", "success")
+        return redirect(url_for("job.detail_job_view", job_id=job_id))
 
     except Exception as e:
         flash(str(e), "error")
@@ -170,13 +180,19 @@ def export_artist_to_file():
 
 
 @bp.route("/<int:artist_id>", methods=("GET",))
-@role_required("super_admin", "artist_manager")
 def detail_artist_view(artist_id: int):
     page = request.args.get("page", 1, type=int)
     page_size = request.args.get("page_size", 10, type=int)
-
-    artist = get_artist_by_id(artist_id)
-    music = fetch_list_music(artist_id, page, page_size)
+    after = request.args.get("after")
+
+    artist, music = fetch_artist_detail(
+        artist_id=artist_id,
+        page=page,
+        page_size=page_size,
+        after=after,
+        filters=request.args,
+        sort=request.args.get("sort"),
+    )
     if artist:
         return render_template(
             "artist/detail_artist.j2",
@@ -188,14 +204,22 @@ def detail_artist_view(artist_id: int):
 
 
 @bp.route("user/<int:user_id>", methods=("GET",))
-@role_required("artist")
 def get_artist_by_user(user_id: int):
     page = request.args.get("page", 1, type=int)
     page_size = request.args.get("page_size", 10, type=int)
-
-    artist = get_artist_by_user_id(user_id)
+    after = request.args.get("after")
+
+    # artists only ever see their own profile
+    artist, music = fetch_artist_detail(
+        user_id=user_id,
+        page=page,
+        page_size=page_size,
+        after=after,
+        owner_id=owner_scope("artist.manage"),
+        filters=request.args,
+        sort=request.args.get("sort"),
+    )
     if artist:
-        music = fetch_list_music(artist["id"], page, page_size)
         return render_template(
             "artist/detail_artist.j2",
             artist_id=artist["id"],
@@ -206,11 +230,8 @@ def get_artist_by_user(user_id: int):
 
 
 @bp.route("/<int:artist_id>/update", methods=("GET", "POST"))
-@role_required("super_admin", "artist_manager")
 def update_artist_view(artist_id):
-    artist = get_artist_by_id(artist_id)
     if request.method == "POST":
-        print()
         try:
             validate_artist(request.form)
             update_artist(request.form)
@@ -224,15 +245,17 @@ def update_artist_view(artist_id):
             return render_template(
                 "artist/form_artist.j2",
                 errors=e.errors,
-                artist_id=artist["id"],
+                artist_id=artist_id,
                 form=request.form,
             )
 
+    artist = get_artist_by_id(artist_id)
+    if not artist:
+        return render_template("404.j2")
     return render_template("artist/form_artist.j2", artist_id=artist["id"], form=artist)
 
 
 @bp.route("/<int:artist_id>/delete", methods=("POST",))
-@role_required("super_admin", "artist_manager")
 def delete_artist_view(artist_id):
     try:
         artist = get_artist_by_id(artist_id)
@@ -240,14 +263,15 @@ def delete_artist_view(artist_id):
         if not artist:
             flash("Artist not found.", "error")
             return redirect(url_for("artist.list_artist_view"))
-        if (
-            session.get("role") == "artist_manager"
-            and artist.get("user_id") is not None
+        if artist.get("user_id") is not None and not has_permission(
+            "artist.delete_with_account"
         ):
             flash("You cannot delete an artist who has a user account.", "error")
             return redirect(url_for("artist.list_artist_view"))
-        delete_artist(artist_id)
-        delete_user(artist.get("user_id"))
+        with atomic():
+            delete_artist(artist_id)
+            if artist.get("user_id") is not None:
+                delete_user(artist["user_id"])
         flash("Artist deleted successfully.", "success")
 
     except ValueError as e:
@@ -1,9 +1,23 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
 from app.services.auth import validate_registration, validate_login
-from app.models import register_user, get_user_with_email, create_artist
+from app.models import (
+    register_user,
+    get_user_with_email,
+    create_artist,
+    update_password_hash,
+)
+from app.services.password import hash_password, verify_password, needs_rehash
+from app.ratelimit import (
+    login_blocked,
+    record_login_attempt,
+    record_login_failure,
+    clear_login_failures,
+)
+from app.config import LOGIN_LIMIT_WINDOW
 from app.utils.exceptions import ValidationError
-from werkzeug.security import check_password_hash
 from app.utils.urls import is_safe_url
+from app.db import atomic, release_connection
+from app.sessions import rotate_session
 
 
 bp = Blueprint("auth", __name__, url_prefix="/auth")
@@ -15,19 +29,24 @@ def register():
         next_endpoint = request.form.get("next")
         try:
             validate_registration(request.form)
-            user_id = register_user(request.form)
             form_data = request.form
             role = form_data.get("role")
-            if role == "artist":
-                create_artist(
-                    {
-                        "name": f"{form_data['first_name']} {form_data['last_name']}",
-                        "dob": form_data["dob"],
-                        "gender": form_data["gender"],
-                        "address": form_data["address"],
-                        "user_id": user_id,
-                    }
-                )
+            # hash without holding a pooled connection (the session or the
+            # principal may have checked one out already)
+            release_connection()
+            password_hash = hash_password(form_data["password"])
+            with atomic():
+                user_id = register_user(form_data, password_hash)
+                if role == "artist":
+                    create_artist(
+                        {
+                            "name": f"{form_data['first_name']} {form_data['last_name']}",
+                            "dob": form_data["dob"],
+                            "gender": form_data["gender"],
+                            "address": form_data["address"],
+                            "user_id": user_id,
+                        }
+                    )
 
             if next_endpoint and is_safe_url(next_endpoint):
                 try:
@@ -58,16 +77,44 @@ def login():
     if request.method == "POST":
         try:
             validate_login(request.form)
-            user = get_user_with_email(request.form["email"])
-            if not user or not check_password_hash(
+            email = request.form["email"]
+            # rejected before the user lookup and the password hash
+            if login_blocked(request.remote_addr, email):
+                flash("Too many login attempts, please try again later.", "error")
+                return (
+                    render_template("auth/login.j2", form=request.form),
+                    429,
+                    {"Retry-After": str(int(LOGIN_LIMIT_WINDOW))},
+                )
+            record_login_attempt(request.remote_addr)
+
+            user = get_user_with_email(email)
+            # the hash takes a while, don't keep the connection meanwhile
+            release_connection()
+            if not user or not verify_password(
                 user["password"], request.form["password"]
             ):
+                record_login_failure(email)
                 flash("Username or Password is incorrect", "error")
                 return render_template("auth/login.j2", form=request.form)
+            clear_login_failures(email)
+
+            # the only moment the plain password is known: upgrade hashes
+            # made with older PASSWORD_HASH_METHOD settings
+            if needs_rehash(user["password"]):
+                update_password_hash(
+                    user["id"], hash_password(request.form["password"])
+                )
 
+            # a new id for the logged in session, an id planted or known
+            # before the login is not worth anything afterwards
+            session.clear()
+            rotate_session(session)
+            session.permanent = bool(request.form.get("remember"))
             session["user_id"] = user["id"]
             session["full_name"] = f"{user['first_name']} {user['last_name']}"
             session["role"] = user["role"]
+            session["authz_version"] = user["authz_version"]
 
             flash(f"Welcome, {user['first_name']}!", "success")
             if next_endpoint and is_safe_url(next_endpoint):
@@ -88,5 +135,6 @@ def login():
 @bp.route("/logout", methods=("GET", "POST"))
 def logout():
     session.clear()
+    rotate_session(session)
     flash("You have been logged out successfully.", "success")
     return redirect(url_for("auth.login"))
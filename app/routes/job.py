@@ -0,0 +1,56 @@
+from flask import Blueprint, render_template, flash, redirect, url_for, session, send_file
+from app.models import get_job_by_id
+from app.permissions import has_permission
+import os
+
+bp = Blueprint("job", __name__, url_prefix="/job")
+
+# download names for the result file of each job kind
+RESULT_FILE_NAMES = {
+    "artist_import": "artists_import_errors.csv",
+    "artist_upsert": "artists_import_errors.csv",
+    "artist_export": "artists_export.csv",
+    "music_import": "music_import_errors.csv",
+    "music_export": "music_export.csv",
+}
+
+
+def get_own_job(job_id: int):
+    """Jobs are visible to the user who started them and to super admins."""
+    job = get_job_by_id(job_id)
+    if job and (
+        has_permission("job.view_all")
+        or job["created_by"] == session.get("user_id")
+    ):
+        return job
+    return None
+
+
+@bp.route("/<int:job_id>", methods=("GET",))
+def detail_job_view(job_id: int):
+    job = get_own_job(job_id)
+    if job:
+        return render_template("job/detail_job.j2", job=job)
+    return render_template("404.j2")
+
+
+@bp.route("/<int:job_id>/download", methods=("GET",))
+def download_job_result(job_id: int):
+    job = get_own_job(job_id)
+    if not job:
+        return render_template("404.j2")
+
+    if job["status"] != "done" or not job["result_path"]:
+        flash("The job has no result to download yet.", "error")
+        return redirect(url_for("job.detail_job_view", job_id=job_id))
+
+    if not os.path.exists(job["result_path"]):
+        flash("The result file is no longer available.", "error")
+        return redirect(url_for("job.detail_job_view", job_id=job_id))
+
+    return send_file(
+        job["result_path"],
+        mimetype="text/csv",
+        as_attachment=True,
+        download_name=RESULT_FILE_NAMES.get(job["kind"], "result.csv"),
+    )
@@ -0,0 +1,55 @@
+import hmac
+
+from flask import Response, request
+
+from app.config import METRICS_TOKEN
+from app.db import pool_stats
+from app.permissions import has_permission
+
+
+def render_pool_metrics(stats: dict):
+    """Pool stats in the Prometheus text exposition format."""
+    lines = [
+        "# TYPE db_pool_connections gauge",
+        f'db_pool_connections{{state="in_use"}} {stats["in_use"]}',
+        f'db_pool_connections{{state="idle"}} {stats["idle"]}',
+        f'db_pool_connections{{state="open"}} {stats["size"]}',
+        f'db_pool_connections{{state="max"}} {stats["max"]}',
+        "# TYPE db_pool_waiting gauge",
+        f"db_pool_waiting {stats['waiting']}",
+        "# TYPE db_pool_timeouts_total counter",
+        f"db_pool_timeouts_total {stats['timeouts']}",
+        "# TYPE db_pool_recycled_total counter",
+        f"db_pool_recycled_total {stats['recycled']}",
+        "# TYPE db_pool_wait_seconds histogram",
+    ]
+    for bound, count in stats["wait_seconds_buckets"].items():
+        le = "+Inf" if bound == float("inf") else bound
+        lines.append(f'db_pool_wait_seconds_bucket{{le="{le}"}} {count}')
+    lines.append(f"db_pool_wait_seconds_sum {stats['wait_seconds_sum']}")
+    lines.append(f"db_pool_wait_seconds_count {stats['checkouts']}")
+    return "\n".join(lines) + "\n"
+
+
+def metrics_allowed():
+    """A matching bearer token (when METRICS_TOKEN is set) or metrics.view."""
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if METRICS_TOKEN and scheme.lower() == "bearer":
+        return hmac.compare_digest(token.encode(), METRICS_TOKEN.encode())
+    return has_permission("metrics.view")
+
+
+def register_metrics_routes(app):
+
+    @app.route("/metrics")
+    def metrics():
+        if not metrics_allowed():
+            return Response(
+                "Unauthorized\n",
+                401,
+                {"WWW-Authenticate": "Bearer"},
+                mimetype="text/plain",
+            )
+        stats = pool_stats()
+        body = render_pool_metrics(stats) if stats else "# pool not created yet\n"
+        return Response(body, mimetype="text/plain; version=0.0.4")
@@ -1,20 +1,38 @@
 from flask import render_template, request, flash, redirect, url_for, Blueprint
-from app.utils.decorators import role_required
 from app.utils.exceptions import ValidationError
-from app.models import create_music, delete_music, get_music_by_id, update_music
+from app.models import (
+    create_music,
+    delete_music,
+    get_music_by_id,
+    update_music,
+    search_music,
+)
+from app.permissions import owner_scope
 from app.services.music import validate_music
 from app.utils.urls import is_safe_url
 
 bp = Blueprint("music", __name__, url_prefix="/music")
 
 
+@bp.route("/search", methods=("GET",))
+def search_music_view():
+    page = request.args.get("page", 1, type=int)
+    page_size = request.args.get("page_size", 10, type=int)
+    after = request.args.get("after")
+    q = request.args.get("q", "").strip()
+
+    data = {"musics": [], "page": page, "page_size": page_size, "next_cursor": None}
+    if q:
+        data = search_music(q, page, page_size, after, owner_scope("music.manage_any"))
+    return render_template("music/search_music.j2", q=q or None, **data)
+
+
 @bp.route("/artist/<int:artist_id>/create", methods=("GET", "POST"))
-@role_required("super_admin", "artist_manager", "artist")
 def create_music_for_artist_view(artist_id):
     if request.method == "POST":
         try:
             validate_music(request.form)
-            create_music(request.form)
+            create_music(request.form, owner_scope("music.manage_any"))
             flash("Music created successfully", "success")
             next_endpoint = request.form.get("next")
             if next_endpoint and is_safe_url(next_endpoint):
@@ -32,6 +50,8 @@ def create_music_for_artist_view(artist_id):
                 errors=e.errors,
                 form=request.form,
             )
+        except ValueError:
+            return render_template("404.j2")
     next_endpoint = request.args.get("next")
     return render_template(
         "music/form_music_with_artist_id.j2", artist_id=artist_id, next=next_endpoint
@@ -39,13 +59,15 @@ def create_music_for_artist_view(artist_id):
 
 
 @bp.route("/<int:music_id>/update", methods=("GET", "POST"))
-@role_required("super_admin", "artist_manager", "artist")
 def update_music_view(music_id):
-    music = get_music_by_id(music_id)
+    owner_id = owner_scope("music.manage_any")
+    music = get_music_by_id(music_id, owner_id)
+    if not music:
+        return render_template("404.j2")
     if request.method == "POST":
         try:
             validate_music(request.form)
-            update_music(request.form)
+            update_music(music_id, request.form, owner_id)
 
             flash("Music updated successfully", "success")
             next_endpoint = request.form.get("next")
@@ -66,6 +88,8 @@ def update_music_view(music_id):
                 music_id=music["id"],
                 form=request.form,
             )
+        except ValueError:
+            return render_template("404.j2")
     next_endpoint = request.args.get("next")
     return render_template(
         "music/form_music_with_artist_id.j2",
@@ -77,15 +101,16 @@ def update_music_view(music_id):
 
 
 @bp.route("/<int:music_id>/delete", methods=("POST",))
-@role_required("super_admin", "artist_manager", "artist")
 def delete_music_view(music_id):
-    if request.method == "POST":
-        music = get_music_by_id(music_id)
-        try:
-            delete_music(music_id)
-            flash("Artist deleted successfully", "success")
-        except ValueError as e:
-            flash(str(e), "error")
+    owner_id = owner_scope("music.manage_any")
+    music = get_music_by_id(music_id, owner_id)
+    if not music:
+        return render_template("404.j2")
+    try:
+        delete_music(music_id, owner_id)
+        flash("Music deleted successfully", "success")
+    except ValueError as e:
+        flash(str(e), "error")
     next = request.args.get("next")
     if next and is_safe_url(next):
         return redirect(next)
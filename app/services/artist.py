@@ -1,20 +1,101 @@
-from app.utils.validator import Validator
+from app.utils.validator import compile_rules, INT_RANGE
+from app.utils.csv_import import iter_csv_columns, load_bisecting, stop_on_unreadable
 from app.utils.exceptions import ValidationError
+from app.models import ARTIST_CSV_COLUMNS, copy_artists_batch
+from app.config import IMPORT_BATCH_SIZE
+from psycopg2 import DataError
+
+ARTIST_RULES = {
+    "name": ["required", "min_length:3", "max_length:50"],
+    "dob": ["required", "date"],
+    "gender": ["required", "in:m,f,o"],
+    "address": ["required", "min_length: 3", "max_length: 255"],
+    "first_release_year": ["required", "numeric", INT_RANGE],
+    "no_of_albums": ["required", "numeric", INT_RANGE],
+}
+COMPILED_ARTIST_RULES = compile_rules(ARTIST_RULES)
 
 
 def validate_artist(request_data: dict):
-    rules = {
-        "name": ["required", "min_length:3", "max_length:50"],
-        "dob": ["required", "date"],
-        "gender": ["required"],
-        "address": ["required", "min_length: 3", "max_length: 255"],
-        "first_release_year": ["required", "numeric"],
-        "no_of_albums": ["required", "numeric"],
+    errors = COMPILED_ARTIST_RULES.errors(request_data)
+    if errors:
+        raise ValidationError(errors)
+
+    return True
+
+
+IMPORT_MODES = ("insert", "upsert")
+
+
+def import_artists(
+    text_stream,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    on_progress=None,
+    mode: str = "insert",
+):
+    """
+    Validate and load an artist CSV read incrementally from `text_stream`.
+    Each chunk of `batch_size` rows is validated column by column
+    (CompiledRules.validate_columns, same rules as validate_artist) and its
+    valid rows are copied; invalid rows are skipped and reported by line
+    number instead of failing the whole file. A batch the database still
+    rejects is retried in halves down to the offending rows, and a file
+    that can't be read past some line is reported with what was loaded
+    before it.
+    `on_progress(rows_processed)` is called after every batch.
+
+    "insert" adds every row as a new artist. "upsert" matches rows to
+    existing artists by (name, dob) and updates the ones that differ,
+    inserting only unknown keys, so re-uploading a corrected file is safe
+    (see copy_artists_batch).
+
+    Returns {"inserted", "updated", "unchanged", "duplicates": int,
+    "errors": [{"line": int, "errors": dict}]}.
+    """
+    if mode not in IMPORT_MODES:
+        raise ValueError(f"Unknown import mode '{mode}'")
+
+    report = {
+        "inserted": 0,
+        "updated": 0,
+        "unchanged": 0,
+        "duplicates": 0,
+        "errors": [],
     }
+    processed = 0
 
-    validator = Validator(request_data, rules)
+    chunks = iter_csv_columns(text_stream, ARTIST_CSV_COLUMNS, batch_size)
+    for lines, columns in stop_on_unreadable(chunks, report["errors"]):
+        processed += len(lines)
+        invalid = COMPILED_ARTIST_RULES.validate_columns(columns, len(lines))
+        for index, errors in invalid.items():
+            report["errors"].append({"line": lines[index], "errors": errors})
 
-    if not validator.validate():
-        raise ValidationError(validator.errors)
+        rows = zip(*(map(str.strip, columns[column]) for column in ARTIST_CSV_COLUMNS))
+        batch = [
+            (lines[index], row) for index, row in enumerate(rows) if index not in invalid
+        ]
 
-    return True
+        if batch:
+            results, rejected = load_bisecting(
+                lambda part: copy_artists_batch(
+                    [row for _, row in part], upsert=mode == "upsert"
+                ),
+                batch,
+                (DataError,),
+            )
+            for counts in results:
+                for name, count in counts.items():
+                    report[name] += count
+            for (line, _), e in rejected:
+                # passed validation but refused by the database anyway
+                message = (e.pgerror or str(e)).splitlines()[0]
+                report["errors"].append({"line": line, "errors": {"row": message}})
+        if on_progress:
+            on_progress(processed)
+
+    if processed == 0 and on_progress:
+        on_progress(0)
+
+    report["errors"].sort(key=lambda error: error["line"])
+    return report
@@ -1,4 +1,4 @@
-from app.utils.validator import Validator
+from app.utils.validator import compile_rules
 from app.utils.exceptions import ValidationError
 
 REGISTRATION_RULES = {
@@ -13,6 +13,25 @@ REGISTRATION_RULES = {
     "address": ["required", "min_length:3", "max_length:255"],
     "role": ["required"],
 }
+COMPILED_REGISTRATION_RULES = compile_rules(REGISTRATION_RULES)
+
+USER_UPDATE_RULES = {
+    "first_name": ["required", "min_length:3", "max_length:50"],
+    "last_name": ["required", "min_length:3", "max_length:50"],
+    "email": ["required", "email", "max_length:100"],
+    "phone": ["required", "numeric", "min_length:10", "max_length:15"],
+    "dob": ["required", "date"],
+    "gender": ["required"],
+    "address": ["required", "min_length: 3", "max_length: 255"],
+    "role": ["required"],
+}
+COMPILED_USER_UPDATE_RULES = compile_rules(USER_UPDATE_RULES)
+
+LOGIN_RULES = {
+    "email": ["required", "email"],
+    "password": ["required"],
+}
+COMPILED_LOGIN_RULES = compile_rules(LOGIN_RULES)
 
 
 def validate_registration_field(field: str, value, existing_data: dict):
@@ -22,52 +41,30 @@ def validate_registration_field(field: str, value, existing_data: dict):
     data = existing_data.copy()
     data[field] = value
 
-    rules = {field: REGISTRATION_RULES[field]}
-
-    validator = Validator(data, rules)
-
-    if not validator.validate():
-        raise ValidationError(validator.errors)
+    errors = COMPILED_REGISTRATION_RULES.errors(data, only={field})
+    if errors:
+        raise ValidationError(errors)
 
 
 def validate_registration(request_data: dict):
-    validator = Validator(request_data, REGISTRATION_RULES)
-
-    if not validator.validate():
-        raise ValidationError(validator.errors)
+    errors = COMPILED_REGISTRATION_RULES.errors(request_data)
+    if errors:
+        raise ValidationError(errors)
 
     return True
 
 
 def validate_user_update(request_data: dict):
-    rules = {
-        "first_name": ["required", "min_length:3", "max_length:50"],
-        "last_name": ["required", "min_length:3", "max_length:50"],
-        "email": ["required", "email", "max_length:100"],
-        "phone": ["required", "numeric", "min_length:10", "max_length:15"],
-        "dob": ["required", "date"],
-        "gender": ["required"],
-        "address": ["required", "min_length: 3", "max_length: 255"],
-        "role": ["required"],
-    }
-
-    validator = Validator(request_data, rules)
-
-    if not validator.validate():
-        raise ValidationError(validator.errors)
+    errors = COMPILED_USER_UPDATE_RULES.errors(request_data)
+    if errors:
+        raise ValidationError(errors)
 
     return True
 
 
 def validate_login(request_data: dict):
-    rules = {
-        "email": ["required", "email"],
-        "password": ["required"],
-    }
-
-    validator = Validator(request_data, rules)
-
-    if not validator.validate():
-        raise ValidationError(validator.errors)
+    errors = COMPILED_LOGIN_RULES.errors(request_data)
+    if errors:
+        raise ValidationError(errors)
 
     return True
@@ -1,18 +1,102 @@
-from app.utils.validator import Validator
+from app.utils.validator import compile_rules, INT_RANGE
 from app.utils.exceptions import ValidationError
+from app.utils.csv_import import iter_csv_columns, load_bisecting, stop_on_unreadable
+from app.models import MUSIC_CSV_COLUMNS, copy_music_batch
+from app.config import IMPORT_BATCH_SIZE
+from psycopg2 import DataError, IntegrityError
 
+# values of genre_enum
+GENRES = ("rnb", "country", "classic", "rock", "jazz")
 
-def validate_music(request_data: dict):
-    rules = {
-        "artist_id": ["required", "numeric"],
-        "title": ["required"],
-        "album_name": ["required"],
-        "genre": ["required"],
-    }
+MUSIC_RULES = {
+    "artist_id": ["required", "numeric", INT_RANGE],
+    "title": ["required"],
+    "album_name": ["required"],
+    "genre": ["required", f"in:{','.join(GENRES)}"],
+}
+COMPILED_MUSIC_RULES = compile_rules(MUSIC_RULES)
+
+# the artist is given by artist_id or by artist_name, see import_music
+MUSIC_IMPORT_RULES = {
+    "artist_id": ["numeric", INT_RANGE],
+    "artist_name": ["max_length:255"],
+    "title": ["required", "max_length:255"],
+    "album_name": ["required", "max_length:255"],
+    "genre": ["required", f"in:{','.join(GENRES)}"],
+}
+COMPILED_MUSIC_IMPORT_RULES = compile_rules(MUSIC_IMPORT_RULES)
 
-    validator = Validator(request_data, rules)
 
-    if not validator.validate():
-        raise ValidationError(validator.errors)
+def validate_music(request_data: dict):
+    errors = COMPILED_MUSIC_RULES.errors(request_data)
+    if errors:
+        raise ValidationError(errors)
 
     return True
+
+
+def _unresolved_error(row: dict):
+    if row["artist_id"] is not None:
+        return f"Artist {row['artist_id']} does not exist."
+    if row["matches"] > 1:
+        return f"{row['matches']} artists are named '{row['artist_name']}', use artist_id."
+    return f"No artist is named '{row['artist_name']}'."
+
+
+def import_music(text_stream, batch_size: int = IMPORT_BATCH_SIZE, on_progress=None):
+    """
+    Validate and load a music CSV (MUSIC_CSV_COLUMNS, artist_id or
+    artist_name may be left out) like import_artists. The artist of every
+    row of a batch is resolved by copy_music_batch in one statement; rows
+    with an unknown or ambiguous artist are reported like invalid rows.
+    Batches the database rejects are retried in halves, see load_bisecting.
+
+    Returns {"inserted": int, "errors": [{"line": int, "errors": dict}]}.
+    """
+    report = {"inserted": 0, "errors": []}
+    processed = 0
+
+    chunks = iter_csv_columns(
+        text_stream,
+        MUSIC_CSV_COLUMNS,
+        batch_size,
+        optional=("artist_id", "artist_name"),
+    )
+    for lines, columns in stop_on_unreadable(chunks, report["errors"]):
+        processed += len(lines)
+        invalid = COMPILED_MUSIC_IMPORT_RULES.validate_columns(columns, len(lines))
+
+        rows = zip(lines, *(map(str.strip, columns[column]) for column in MUSIC_CSV_COLUMNS))
+        batch = []
+        for index, row in enumerate(rows):
+            if not (row[1] or row[2]):
+                invalid.setdefault(index, {})["artist"] = "Artist id or name is required."
+            if index not in invalid:
+                batch.append(row)
+
+        for index, errors in sorted(invalid.items()):
+            report["errors"].append({"line": lines[index], "errors": errors})
+
+        if batch:
+            # an artist deleted meanwhile fails the batch on its foreign key
+            results, rejected = load_bisecting(
+                copy_music_batch, batch, (DataError, IntegrityError)
+            )
+            for inserted, unresolved in results:
+                report["inserted"] += inserted
+                for row in unresolved:
+                    report["errors"].append(
+                        {"line": row["line"], "errors": {"artist": _unresolved_error(row)}}
+                    )
+            for row, e in rejected:
+                message = (e.pgerror or str(e)).splitlines()[0]
+                report["errors"].append({"line": row[0], "errors": {"row": message}})
+        if on_progress:
+            on_progress(processed)
+
+    if processed == 0 and on_progress:
+        on_progress(0)
+
+    # unresolved artists are only known after the batch was loaded
+    report["errors"].sort(key=lambda error: error["line"])
+    return report
@@ -0,0 +1,95 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import lru_cache
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from app.config import PASSWORD_HASH_METHOD, PASSWORD_HASH_WORKERS, PASSWORD_HASH_TIMEOUT
+from app.utils.exceptions import PoolTimeoutError
+
+# hashes queued per worker process before callers wait (and eventually get
+# a 503) instead of piling up behind a login storm
+QUEUE_PER_WORKER = 4
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+_slots = None
+
+
+def _get_executor():
+    """
+    Process pool created on first use, once per process: gunicorn workers
+    must not share the master's pool. Workers are spawned, not forked, so
+    they never inherit locks or sockets held by request threads.
+    """
+    global _executor, _executor_pid, _slots
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ProcessPoolExecutor(
+                    max_workers=PASSWORD_HASH_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                _slots = threading.BoundedSemaphore(
+                    PASSWORD_HASH_WORKERS * QUEUE_PER_WORKER
+                )
+                _executor_pid = os.getpid()
+    return _executor
+
+
+def _run(fn, *args):
+    """
+    Run fn in the pool, waiting at most PASSWORD_HASH_TIMEOUT in total for
+    a slot and the result. A slot is held until the hash is actually done,
+    not until the caller gives up, so the slots bound the pool's queue.
+    """
+    if PASSWORD_HASH_WORKERS <= 0:
+        return fn(*args)
+
+    executor = _get_executor()
+    slots = _slots
+    deadline = time.monotonic() + PASSWORD_HASH_TIMEOUT
+    if not slots.acquire(timeout=PASSWORD_HASH_TIMEOUT):
+        raise PoolTimeoutError("No password hashing worker available")
+    try:
+        future = executor.submit(fn, *args)
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda future: slots.release())
+    try:
+        return future.result(timeout=max(0.0, deadline - time.monotonic()))
+    except FutureTimeoutError:
+        raise PoolTimeoutError("Password hashing timed out")
+
+
+def shutdown():
+    global _executor
+    with _executor_lock:
+        if _executor is not None and _executor_pid == os.getpid():
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def hash_password(password: str, method: str = PASSWORD_HASH_METHOD):
+    return _run(generate_password_hash, password, method)
+
+
+def verify_password(password_hash: str, password: str):
+    return _run(check_password_hash, password_hash, password)
+
+
+@lru_cache
+def method_prefix(method: str):
+    # werkzeug expands defaults ("scrypt" -> "scrypt:32768:8:1"); hash once
+    # to learn what a hash made with `method` starts with.
+    return generate_password_hash("", method).split("$", 1)[0]
+
+
+def needs_rehash(password_hash: str, method: str = PASSWORD_HASH_METHOD):
+    """True when password_hash was made with other settings than `method`."""
+    return password_hash.split("$", 1)[0] != method_prefix(method)
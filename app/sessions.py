@@ -0,0 +1,244 @@
+import marshal
+import secrets
+from datetime import datetime, timedelta
+
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+from app.cache import TTLCache
+from app.config import (
+    SESSION_BACKEND,
+    SESSION_LIFETIME,
+    SESSION_ANONYMOUS_LIFETIME,
+    SESSION_CACHE_SIZE,
+    SESSION_CACHE_TTL,
+)
+from app.db import get_connection, commit, rollback
+
+# sid -> (version, encoded data, expires_at)
+#
+# The cookie carries "<sid>.<version>" and every save picks a new version,
+# so a cached entry is only used while its version matches the cookie: a
+# session changed by another worker is never served stale. A revoked
+# session can still be read from another worker's cache for up to
+# SESSION_CACHE_TTL, load_principal rejects deleted users regardless.
+_front = TTLCache(SESSION_CACHE_SIZE, SESSION_CACHE_TTL)
+
+
+def encode(data: dict):
+    # marshal: compact and fast for the plain values stored in a session
+    # (ints, strings, flashed message tuples); never read from the client.
+    return marshal.dumps(data)
+
+
+def decode(raw: bytes):
+    try:
+        return marshal.loads(raw)
+    except (EOFError, ValueError, TypeError):
+        # written by another Python version
+        return {}
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, new=False, expires_at=None):
+        def on_update(session):
+            session.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.expires_at = expires_at
+        self.modified = False
+        # sid this session was loaded with, deleted when rotate() replaced it
+        self.replaced_sid = None
+
+    def rotate(self):
+        """
+        Move the data to a fresh random id (login and logout), the old id
+        is deleted on save so a cookie known before stops working.
+        """
+        if self.replaced_sid is None and not self.new:
+            self.replaced_sid = self.sid
+        self.sid = secrets.token_urlsafe(32)
+        self.new = True
+        self.expires_at = None
+        self.modified = True
+
+
+class PostgresSessionInterface(SessionInterface):
+    """
+    Sessions kept in the UNLOGGED sessions table, the cookie only holds a
+    random id and the version of the row. Rows are written when the session
+    changes or is past half of its lifetime, not on every request. Sessions
+    without a user (flashed messages) only live SESSION_ANONYMOUS_LIFETIME.
+    The cookie is dropped with the browser unless session.permanent is set
+    ("remember me").
+    """
+
+    def __init__(
+        self,
+        lifetime: float = SESSION_LIFETIME,
+        anonymous_lifetime: float = SESSION_ANONYMOUS_LIFETIME,
+    ):
+        self.lifetime = timedelta(seconds=lifetime)
+        self.anonymous_lifetime = timedelta(seconds=anonymous_lifetime)
+
+    def _new_session(self):
+        return ServerSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def open_session(self, app, request):
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if not cookie:
+            return self._new_session()
+
+        sid, _, version = cookie.partition(".")
+        cached = _front.get(sid)
+        if cached is not None and cached[0] == version and cached[2] > datetime.now():
+            return ServerSession(decode(cached[1]), sid=sid, expires_at=cached[2])
+
+        with get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT version, data, expires_at FROM sessions
+                    WHERE sid = %s AND version = %s AND expires_at > NOW()
+                    """,
+                    (sid, version),
+                )
+                row = cursor.fetchone()
+        if row is None:
+            # unknown or expired id, never adopt an id chosen by the client
+            return self._new_session()
+
+        version, raw, expires_at = row[0], bytes(row[1]), row[2]
+        _front.set(sid, (version, raw, expires_at))
+        return ServerSession(decode(raw), sid=sid, expires_at=expires_at)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.accessed:
+            response.vary.add("Cookie")
+
+        if session.replaced_sid is not None:
+            delete_session(session.replaced_sid)
+            session.replaced_sid = None
+
+        if not session:
+            if session.modified:
+                if not session.new:
+                    delete_session(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        lifetime = self.lifetime if session.get("user_id") else self.anonymous_lifetime
+        now = datetime.now()
+        refresh = (
+            session.expires_at is None
+            or session.expires_at - now < lifetime / 2
+        )
+        if not (session.modified or refresh):
+            return
+
+        expires_at = now + lifetime
+        version = secrets.token_hex(4)
+        raw = encode(dict(session))
+        with get_connection() as conn:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        """
+                        INSERT INTO sessions (sid, version, user_id, data, expires_at)
+                        VALUES (%s, %s, %s, %s, %s)
+                        ON CONFLICT (sid) DO UPDATE
+                        SET version = EXCLUDED.version,
+                            user_id = EXCLUDED.user_id,
+                            data = EXCLUDED.data,
+                            expires_at = EXCLUDED.expires_at
+                        """,
+                        (session.sid, version, session.get("user_id"), raw, expires_at),
+                    )
+                commit(conn)
+            except Exception:
+                rollback(conn)
+                raise
+        _front.set(session.sid, (version, raw, expires_at))
+
+        response.set_cookie(
+            name,
+            f"{session.sid}.{version}",
+            expires=expires_at if session.permanent else None,
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+
+def delete_session(sid: str):
+    with get_connection() as conn:
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("DELETE FROM sessions WHERE sid = %s", (sid,))
+            commit(conn)
+        except Exception:
+            rollback(conn)
+            raise
+    _front.delete(sid)
+
+
+def rotate_session(session):
+    """
+    Give the current session a new id, for the postgres backend. Flask's
+    cookie session holds no id: its content is signed and replaced as a
+    whole, there is nothing to rotate.
+    """
+    rotate = getattr(session, "rotate", None)
+    if rotate is not None:
+        rotate()
+
+
+def revoke_user_sessions(cursor, user_id: int):
+    """Delete every session of user_id, part of the caller's transaction."""
+    cursor.execute("DELETE FROM sessions WHERE user_id = %s", (user_id,))
+
+
+def forget_sessions():
+    """Drop this process' cached sessions (after revoking some)."""
+    _front.clear()
+
+
+def sweep_expired_sessions(conn, batch_size: int = 10000):
+    """
+    Delete expired sessions in batches, committing each one so no long
+    lock is held. Returns the number of deleted sessions.
+    """
+    deleted = 0
+    while True:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                DELETE FROM sessions
+                WHERE sid IN (
+                    SELECT sid FROM sessions
+                    WHERE expires_at <= NOW()
+                    LIMIT %s
+                )
+                """,
+                (batch_size,),
+            )
+            batch = cursor.rowcount
+        commit(conn)
+        deleted += batch
+        if batch < batch_size:
+            return deleted
+
+
+def init_sessions(app):
+    if SESSION_BACKEND == "postgres":
+        app.session_interface = PostgresSessionInterface()
+    elif SESSION_BACKEND != "cookie":
+        raise ValueError(f"Unknown SESSION_BACKEND '{SESSION_BACKEND}'")
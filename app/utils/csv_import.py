@@ -0,0 +1,103 @@
+import csv
+from operator import itemgetter
+
+from app.utils.exceptions import ValidationError
+
+
+def iter_csv_columns(
+    text_stream, columns: tuple, chunk_rows: int = 1000, optional: tuple = ()
+):
+    """
+    Read a CSV with a header row in chunks of `chunk_rows` data rows and
+    yield each chunk column-wise, as (line numbers, {column: [values]}),
+    for the given `columns` only. Blank lines are skipped and short rows
+    padded with "", like csv.DictReader does.
+    Raises ValidationError when a column is missing from the header, unless
+    it is `optional`; a missing optional column reads as "".
+    """
+    reader = csv.reader(text_stream)
+    header = next(reader, None) or []
+    positions = {name: index for index, name in enumerate(header)}
+
+    missing_columns = set(columns) - set(positions) - set(optional)
+    if missing_columns:
+        raise ValidationError(
+            {"file": f"Missing columns: {', '.join(sorted(missing_columns))}"}
+        )
+
+    absent = [column for column in columns if column not in positions]
+    columns = [column for column in columns if column in positions]
+    if not columns:
+        raise ValidationError({"file": "None of the expected columns is present"})
+
+    def as_columns(chunk):
+        data = dict(zip(columns, map(list, zip(*chunk))))
+        for column in absent:
+            data[column] = [""] * len(chunk)
+        return data
+
+    indexes = [positions[column] for column in columns]
+    width = max(indexes) + 1
+    # itemgetter of a single index returns the value, not a 1-tuple
+    pick = itemgetter(*indexes) if len(indexes) > 1 else lambda row: (row[indexes[0]],)
+
+    chunk, lines = [], []
+    for row in reader:
+        if not row:
+            continue
+        if len(row) < width:
+            row = row + [""] * (width - len(row))
+        chunk.append(pick(row))
+        lines.append(reader.line_num)
+        if len(chunk) >= chunk_rows:
+            yield lines, as_columns(chunk)
+            chunk, lines = [], []
+
+    if chunk:
+        yield lines, as_columns(chunk)
+
+
+def stop_on_unreadable(chunks, errors: list):
+    """
+    Pass the chunks of iter_csv_columns through until the file turns out
+    unreadable half way (bad encoding, broken quoting). The earlier chunks
+    are already loaded by then: the problem is appended to `errors` and
+    the import ends normally so its report still covers them.
+    """
+    last_line = 1
+    try:
+        for lines, columns in chunks:
+            last_line = lines[-1]
+            yield lines, columns
+    except (UnicodeDecodeError, csv.Error) as e:
+        errors.append(
+            {
+                "line": last_line + 1,
+                "errors": {"file": f"Import stopped after line {last_line}: {e}"},
+            }
+        )
+
+
+def load_bisecting(load, rows: list, rejected: tuple):
+    """
+    Call `load(rows)`; when it raises one of the `rejected` exceptions
+    (the database refused a row validation let through) load each half
+    again, down to single rows, so one bad row doesn't drop the batch.
+    `load` must roll back what it wrote before raising.
+    Returns ([load results], [(rejected row, exception)]).
+    """
+    results, failures = [], []
+    pending = [rows]
+    while pending:
+        part = pending.pop()
+        try:
+            results.append(load(part))
+        except rejected as e:
+            if len(part) == 1:
+                failures.append((part[0], e))
+                continue
+            middle = len(part) // 2
+            # first half first, rows are loaded in file order
+            pending.append(part[middle:])
+            pending.append(part[:middle])
+    return results, failures
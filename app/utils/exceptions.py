@@ -2,3 +2,10 @@ class ValidationError(Exception):
     def __init__(self, errors: dict):
         self.errors = errors
         super().__init__("Validation failed")
+
+
+class PoolTimeoutError(Exception):
+    """
+    No database connection (DB_POOL_TIMEOUT) or password hashing worker
+    (PASSWORD_HASH_TIMEOUT) became free in time.
+    """
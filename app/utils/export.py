@@ -0,0 +1,230 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from functools import lru_cache
+from itertools import chain
+
+from flask import Response, stream_with_context
+
+
+def iter_csv(header: list, rows, chunk_rows: int = 1000):
+    """
+    Yield CSV text in chunks of `chunk_rows` rows so a response can be
+    streamed without building the whole file in memory.
+    The header is yielded on its own so the first byte leaves immediately.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(header)
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate(0)
+
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % chunk_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_csv_gzip(header: list, rows, chunk_rows: int = 1000, level: int = 6):
+    """iter_csv compressed on the fly (a gzip stream), yields bytes."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+    for chunk in iter_csv(header, rows, chunk_rows):
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def iter_ndjson(header: list, rows, chunk_rows: int = 1000):
+    """One JSON object per row and line; dates are written as ISO strings."""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(header, row)), default=_json_value))
+        if len(lines) >= chunk_rows:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def _json_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class _Drain:
+    """Write-only file object whose content is taken out after each write."""
+
+    closed = False
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def _arrow_schema(pa, header: list, types: tuple):
+    arrow_types = {
+        "string": pa.string(),
+        "int": pa.int64(),
+        "date": pa.date32(),
+        "timestamp": pa.timestamp("us"),
+    }
+    return pa.schema(
+        [pa.field(name, arrow_types[kind]) for name, kind in zip(header, types)]
+    )
+
+
+def _arrow_batches(pa, schema, rows, chunk_rows: int):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_rows:
+            yield pa.record_batch(
+                [pa.array(column, type=field.type) for column, field in zip(zip(*chunk), schema)],
+                schema=schema,
+            )
+            chunk = []
+    if chunk:
+        yield pa.record_batch(
+            [pa.array(column, type=field.type) for column, field in zip(zip(*chunk), schema)],
+            schema=schema,
+        )
+
+
+def iter_parquet(header: list, rows, types: tuple, chunk_rows: int = 50000):
+    """
+    Parquet file written one row group per `chunk_rows` rows, yielding
+    each row group as soon as it is encoded (the footer comes last).
+    `types` gives the column types: "string", "int", "date" or "timestamp".
+    """
+    pa, parquet = _import_arrow()
+    schema = _arrow_schema(pa, header, types)
+    sink = _Drain()
+    with parquet.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for batch in _arrow_batches(pa, schema, rows, chunk_rows):
+            writer.write_batch(batch, row_group_size=chunk_rows)
+            yield sink.take()
+    yield sink.take()
+
+
+def iter_arrow(header: list, rows, types: tuple, chunk_rows: int = 50000):
+    """Arrow IPC stream, one record batch per `chunk_rows` rows, see iter_parquet."""
+    pa, _ = _import_arrow()
+    schema = _arrow_schema(pa, header, types)
+    sink = _Drain()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for batch in _arrow_batches(pa, schema, rows, chunk_rows):
+            writer.write_batch(batch)
+            yield sink.take()
+    yield sink.take()
+
+
+def _import_arrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError(
+            "Parquet and Arrow exports need pyarrow (install the 'export' extra)"
+        ) from None
+    return pyarrow, pyarrow.parquet
+
+
+# format -> (mimetype, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "csv.gz": ("application/gzip", "csv.gz"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+}
+
+
+# formats needing the optional pyarrow dependency
+ARROW_FORMATS = ("parquet", "arrow")
+
+
+@lru_cache(maxsize=None)
+def available_export_formats():
+    """The EXPORT_FORMATS this installation can write, for format pickers."""
+    try:
+        _import_arrow()
+    except ValueError:
+        return tuple(name for name in EXPORT_FORMATS if name not in ARROW_FORMATS)
+    return tuple(EXPORT_FORMATS)
+
+
+def export_response_args(format: str, name: str):
+    """
+    (mimetype, headers) for downloading an export as `name`.<extension>.
+    Raises ValueError for an unknown format, or a format whose optional
+    dependency is missing, before any row is read.
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{format}'")
+    if format in ARROW_FORMATS:
+        _import_arrow()
+    mimetype, extension = EXPORT_FORMATS[format]
+    return mimetype, {"Content-Disposition": f"attachment; filename={name}.{extension}"}
+
+
+def iter_export(format: str, header: list, rows, types: tuple):
+    """Chunks of `rows` encoded in `format` (a key of EXPORT_FORMATS)."""
+    if format == "csv":
+        return iter_csv(header, rows)
+    if format == "csv.gz":
+        return iter_csv_gzip(header, rows)
+    if format == "ndjson":
+        return iter_ndjson(header, rows)
+    if format == "parquet":
+        return iter_parquet(header, rows, types)
+    if format == "arrow":
+        return iter_arrow(header, rows, types)
+    raise ValueError(f"Unknown export format '{format}'")
+
+
+def export_response(format: str, name: str, header: list, types: tuple, rows):
+    """
+    Streaming download of `rows` (an iterator of tuples) as `name` in
+    `format`. The first row is fetched before the response starts, so an
+    unknown format or a database error still raises here, where the view
+    can turn it into a flash message instead of a broken download.
+    """
+    mimetype, headers = export_response_args(format, name)
+    first = next(rows, None)
+    rows = chain([first], rows) if first is not None else iter(())
+    return Response(
+        stream_with_context(iter_export(format, list(header), rows, types)),
+        mimetype=mimetype,
+        headers=headers,
+    )
@@ -0,0 +1,135 @@
+"""
+Filtering and sorting for the list queries in app.models.
+
+A ListQuery declares which query parameters may filter a list and which
+orders it can be sorted in; anything else is ignored, so column names
+never come from the request and values are always bound parameters. Every
+filter/sort pair declared here has a matching index (migration 0010), keep
+them in sync when adding one.
+"""
+
+from datetime import datetime
+
+
+def choice(*allowed: str):
+    """Parser accepting only the given values (enum columns)."""
+
+    def parse(value: str):
+        if value not in allowed:
+            raise ValueError(value)
+        return value
+
+    return parse
+
+
+class Sort:
+    """
+    ORDER BY `column`, id in one direction, paginated by the keyset
+    (column, id). `parse` turns the cursor value back into the column
+    type; the column must be NOT NULL for the keyset to be total.
+    """
+
+    def __init__(self, column: str, descending: bool = False, parse=str):
+        self.column = column
+        table, _, self.key = column.rpartition(".")
+        self.id_column = f"{table}.id" if table else "id"
+        self.descending = descending
+        self.parse = parse
+
+    def order_by(self):
+        direction = "DESC" if self.descending else "ASC"
+        return f"{self.column} {direction}, {self.id_column} {direction}"
+
+    def keyset(self):
+        operator = "<" if self.descending else ">"
+        return f"({self.column}, {self.id_column}) {operator} (%s, %s)"
+
+
+class ListQuery:
+    """
+    filters: {parameter: (sql condition with one %s, parser)}
+    sorts: {parameter value: Sort}
+    """
+
+    def __init__(self, filters: dict, sorts: dict, default_sort: str):
+        self.filters = filters
+        self.sorts = sorts
+        self.default_sort = default_sort
+
+    def clean_filters(self, values) -> dict:
+        """
+        The declared filters present in `values` (a dict or request.args)
+        parsed to their column type; blank and invalid values are dropped,
+        like an unknown cursor falls back to the first page.
+        """
+        cleaned = {}
+        for name, (_, parse) in self.filters.items():
+            raw = (values or {}).get(name)
+            if raw is None or raw == "":
+                continue
+            try:
+                cleaned[name] = parse(raw)
+            except (ValueError, TypeError):
+                continue
+        return cleaned
+
+    def sort_name(self, name: str | None):
+        return name if name in self.sorts else self.default_sort
+
+    def sort(self, name: str | None) -> Sort:
+        return self.sorts[self.sort_name(name)]
+
+    def conditions(self, filters: dict):
+        """([sql condition], [param]) for already cleaned filters."""
+        conditions, params = [], []
+        for name, value in filters.items():
+            conditions.append(self.filters[name][0])
+            params.append(value)
+        return conditions, params
+
+
+def where_clause(conditions: list, keyword: str = "WHERE"):
+    """`keyword` followed by the conditions joined with AND, or ""."""
+    if not conditions:
+        return ""
+    return f"{keyword} " + " AND ".join(conditions)
+
+
+USER_LIST = ListQuery(
+    filters={
+        "role": ("role = %s", choice("super_admin", "artist_manager", "artist")),
+        "gender": ("gender = %s", choice("m", "f", "o")),
+    },
+    sorts={
+        "newest": Sort("created_at", descending=True, parse=datetime.fromisoformat),
+        "oldest": Sort("created_at", parse=datetime.fromisoformat),
+        "email": Sort("email"),
+    },
+    default_sort="newest",
+)
+
+ARTIST_LIST = ListQuery(
+    filters={
+        "gender": ("gender = %s", choice("m", "f", "o")),
+        "first_release_year": ("first_release_year = %s", int),
+    },
+    sorts={
+        "newest": Sort("created_at", descending=True, parse=datetime.fromisoformat),
+        "oldest": Sort("created_at", parse=datetime.fromisoformat),
+        "name": Sort("name"),
+    },
+    default_sort="newest",
+)
+
+# always scoped to one artist, the indexes lead with music.artist_id
+MUSIC_LIST = ListQuery(
+    filters={
+        "genre": ("music.genre = %s", choice("rnb", "country", "classic", "rock", "jazz")),
+    },
+    sorts={
+        "newest": Sort("music.created_at", descending=True, parse=datetime.fromisoformat),
+        "oldest": Sort("music.created_at", parse=datetime.fromisoformat),
+        "title": Sort("music.title"),
+    },
+    default_sort="newest",
+)
@@ -0,0 +1,47 @@
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(sort_value, record_id: int):
+    """
+    Encode the (sort value, id) of the last row on a page, e.g.
+    (created_at, id), into an opaque url safe token used as the `after`
+    query parameter.
+    """
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+
+    raw = json.dumps([sort_value, record_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str | None, parse=datetime.fromisoformat):
+    """
+    Decode an `after` token back to (sort value, id), the sort value is
+    converted with `parse` (float for search ranks).
+    Returns None for a missing or tampered token so the caller falls back
+    to the first page.
+    """
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        sort_value, record_id = json.loads(base64.urlsafe_b64decode(padded))
+        return parse(sort_value), int(record_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def split_page(rows: list, page_size: int, sort_key: str = "created_at"):
+    """
+    Rows are fetched with LIMIT page_size + 1; the extra row only tells us
+    whether a next page exists.
+    Returns (rows_for_this_page, next_cursor).
+    """
+    if len(rows) <= page_size:
+        return rows, None
+
+    rows = rows[:page_size]
+    last = rows[-1]
+    return rows, encode_cursor(last[sort_key], last["id"])
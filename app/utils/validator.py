@@ -1,6 +1,6 @@
 import re
 from datetime import datetime
-
+from functools import lru_cache
 
 
 class Validator:
@@ -49,9 +49,22 @@ class Validator:
                         )
 
                 elif rule == "numeric":
-                    if value and not value.isdigit():
+                    # isdigit() alone accepts "²" and other non ASCII digits
+                    if value and not (value.isascii() and value.isdigit()):
                         self.add_error(field, f"{field.title()} must be numeric.")
 
+                elif rule.startswith("between:"):
+                    low, high = map(int, rule.split(":")[1].split(","))
+                    if (
+                        value
+                        and value.isascii()
+                        and value.isdigit()
+                        and not low <= int(value) <= high
+                    ):
+                        self.add_error(
+                            field, f"{field.title()} must be between {low} and {high}."
+                        )
+
                 elif rule == "date":
                     try:
                         if value:
@@ -69,3 +82,255 @@ class Validator:
     def add_error(self, field, message):
         if field not in self.errors:
             self.errors[field] = message
+
+
+# compiled rules
+#
+# Validator above interprets the rule strings on every call; compile_rules
+# parses a rules dict once into per field tuples of checks (bounds parsed,
+# patterns compiled) and caches the result per rules, so validating a row
+# is a loop over prebuilt callables. Messages and the first-error-per-field
+# behaviour are the same as Validator's, Validator is kept as the reference
+# implementation (see `flask validator-benchmark`).
+#
+# A check is called with (value, data) and returns an error message or None.
+
+# rule for numeric fields stored in a PostgreSQL INT column
+INT_RANGE = "between:0,2147483647"
+
+_EMAIL = re.compile(r"^[^@]+@[^@]+\.[^@]+$")
+# the exact syntax strptime(value, "%Y-%m-%d") accepts
+_DATE = re.compile(r"(\d{4})-(1[0-2]|0[1-9]|[1-9])-(3[01]|[12]\d|0[1-9]|[1-9]| [1-9])")
+
+
+def _required(field):
+    message = f"{field.replace('_', ' ').title()} is required."
+    return lambda value, data: None if value else message
+
+
+def _min_length(field, argument):
+    length = int(argument)
+    message = f"{field.title()} must be at least {length} characters."
+    return lambda value, data: message if value and len(value) < length else None
+
+
+def _max_length(field, argument):
+    length = int(argument)
+    message = f"{field.replace('_', ' ').title()} must not exceed {length} characters."
+    return lambda value, data: message if value and len(value) > length else None
+
+
+def _email(field):
+    match = _EMAIL.match
+    return lambda value, data: "Invalid email address." if value and not match(value) else None
+
+
+def _match(field, other_field):
+    message = f"{field.title()} does not match {other_field}."
+    return lambda value, data: message if value != data.get(other_field, "") else None
+
+
+def _numeric(field):
+    message = f"{field.title()} must be numeric."
+    return (
+        lambda value, data: message
+        if value and not (value.isascii() and value.isdigit())
+        else None
+    )
+
+
+def _between(field, argument):
+    # only checks numeric values, "numeric" reports the others
+    low, high = map(int, argument.split(","))
+    message = f"{field.title()} must be between {low} and {high}."
+
+    def check(value, data):
+        if value and value.isascii() and value.isdigit() and not low <= int(value) <= high:
+            return message
+        return None
+
+    return check
+
+
+def _date(field):
+    message = "Invalid date format (YYYY-MM-DD)."
+    fullmatch = _DATE.fullmatch
+
+    def check(value, data):
+        if not value:
+            return None
+        parts = fullmatch(value)
+        if parts is None:
+            return message
+        try:
+            datetime(int(parts[1]), int(parts[2]), int(parts[3]))
+        except ValueError:
+            return message
+        return None
+
+    return check
+
+
+def _in(field, argument):
+    allowed = frozenset(argument.split(","))
+    message = f"Invalid {field} selected."
+    return lambda value, data: None if value in allowed else message
+
+
+_RULES = {"required": _required, "email": _email, "numeric": _numeric, "date": _date}
+# rules whose outcome only depends on len(value)
+_LENGTH_RULES = {"required", "min_length", "max_length"}
+_RULES_WITH_ARGUMENT = {
+    "min_length": _min_length,
+    "max_length": _max_length,
+    "match": _match,
+    "in": _in,
+    "between": _between,
+}
+
+
+def _compile_rule(field: str, rule: str):
+    if rule in _RULES:
+        return _RULES[rule](field)
+    name, _, argument = rule.partition(":")
+    if name in _RULES_WITH_ARGUMENT:
+        return _RULES_WITH_ARGUMENT[name](field, argument)
+    raise ValueError(f"Unknown validation rule '{rule}' for '{field}'")
+
+
+class CompiledRules:
+    """A rules dict compiled by compile_rules."""
+
+    __slots__ = ("fields", "row_fields", "length_fields")
+
+    def __init__(
+        self,
+        fields: tuple,
+        row_fields: frozenset = frozenset(),
+        length_fields: frozenset = frozenset(),
+    ):
+        # ((field, (check, ...)), ...) in the rules dict order
+        self.fields = fields
+        # fields with a check reading other fields of the row ("match:")
+        self.row_fields = row_fields
+        # fields whose checks only look at the length of the value
+        self.length_fields = length_fields
+
+    def errors(self, data, only=None):
+        """{field: first error message} for `data`, empty when valid.
+        `only` limits the check to a set of fields."""
+        errors = {}
+        for field, checks in self.fields:
+            if only is not None and field not in only:
+                continue
+            value = data.get(field, "").strip()
+            for check in checks:
+                message = check(value, data)
+                if message is not None:
+                    errors[field] = message
+                    break
+        return errors
+
+    def is_valid(self, data):
+        return not self.errors(data)
+
+    def validate_many(self, rows):
+        """
+        Validate a list of rows in one pass.
+        Returns {row index: errors} for the invalid rows only.
+        """
+        invalid = {}
+        errors = self.errors
+        for index, row in enumerate(rows):
+            row_errors = errors(row)
+            if row_errors:
+                invalid[index] = row_errors
+        return invalid
+
+    def validate_columns(self, columns: dict, size: int):
+        """
+        Validate `size` rows given as {field: list of values}, one field at
+        a time (a missing field reads as "" like a missing key does).
+        The checks of a field only depend on the value, so they run once
+        per distinct value (or per distinct length for length-only rules);
+        columns of dates, enums or numbers repeat a lot and the rows are
+        then only scanned for the failing values.
+        Returns {row index: errors} for the invalid rows, like validate_many.
+        """
+        invalid = {}
+        for field, checks in self.fields:
+            column = columns.get(field)
+            if column is None:
+                column = [""] * size
+            column = list(map(str.strip, column))
+
+            if field in self.row_fields:
+                failing = self._row_failures(field, checks, column, columns)
+            elif field in self.length_fields:
+                failing = self._column_failures(
+                    checks, list(map(len, column)), lambda length: "x" * length
+                )
+            else:
+                failing = self._column_failures(checks, column)
+
+            for index, message in failing:
+                invalid.setdefault(index, {})[field] = message
+        # fields were checked in rule order, so each row's errors already are
+        return dict(sorted(invalid.items()))
+
+    @staticmethod
+    def _column_failures(checks, column, sample=None):
+        # `sample` turns a column entry into a value to check (a string of
+        # that length when the column holds lengths)
+        bad = {}
+        for entry in set(column):
+            value = entry if sample is None else sample(entry)
+            for check in checks:
+                message = check(value, None)
+                if message is not None:
+                    bad[entry] = message
+                    break
+        if not bad:
+            return ()
+        return [(index, bad[entry]) for index, entry in enumerate(column) if entry in bad]
+
+    @staticmethod
+    def _row_failures(field, checks, column, columns):
+        failing = []
+        for index, value in enumerate(column):
+            row = {name: values[index] for name, values in columns.items()}
+            for check in checks:
+                message = check(value, row)
+                if message is not None:
+                    failing.append((index, message))
+                    break
+        return failing
+
+
+def _freeze(rules: dict):
+    return tuple((field, tuple(rule_list)) for field, rule_list in rules.items())
+
+
+@lru_cache(maxsize=256)
+def _compile(frozen: tuple):
+    return CompiledRules(
+        tuple(
+            (field, tuple(_compile_rule(field, rule.strip()) for rule in rule_list))
+            for field, rule_list in frozen
+        ),
+        frozenset(
+            field
+            for field, rule_list in frozen
+            if any(rule.strip().startswith("match:") for rule in rule_list)
+        ),
+        frozenset(
+            field
+            for field, rule_list in frozen
+            if all(rule.strip().partition(":")[0] in _LENGTH_RULES for rule in rule_list)
+        ),
+    )
+
+
+def compile_rules(rules: dict) -> CompiledRules:
+    """Compiled form of a Validator rules dict, cached per distinct rules."""
+    return _compile(_freeze(rules))
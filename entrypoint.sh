@@ -15,5 +15,5 @@ python -m app.setup_db
 echo "Creating super admin..."
 flask create-default-admin || true
 
-echo "Starting Flask..."
-exec flask run --host=0.0.0.0 --port=5000
+echo "Starting Gunicorn..."
+exec gunicorn -c app/gunicorn_config.py app.wsgi:app
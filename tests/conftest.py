@@ -0,0 +1,98 @@
+import os
+import uuid
+
+import pytest
+
+# app.config reads the environment on import, before any test module does
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("SESSION_BACKEND", "cookie")
+os.environ.setdefault("AUTHZ_LISTEN", "False")
+os.environ.setdefault("CACHE_BACKEND", "none")
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+
+class Database:
+    """Rows created by a test in the TEST_DATABASE_URL database, deleted afterwards."""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.user_ids = []
+        # (sql, params) run after the test, for rows not owned by a user
+        self.cleanup = []
+
+    def execute(self, sql, params=()):
+        conn = self.pool.getconn()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params)
+                row = cursor.fetchone() if cursor.description else None
+            conn.commit()
+            return row
+        finally:
+            self.pool.putconn(conn)
+
+    def create_user(self, role="artist"):
+        (user_id,) = self.execute(
+            """
+            INSERT INTO users
+            (first_name, last_name, email, password, phone, dob, gender, address, role)
+            VALUES ('Test', 'User', %s, 'x', '9800000000', '1990-01-01', 'o', 'Test', %s)
+            RETURNING id
+            """,
+            (f"{uuid.uuid4().hex}@test.invalid", role),
+        )
+        self.user_ids.append(user_id)
+        return user_id
+
+    def create_artist(self, user_id):
+        (artist_id,) = self.execute(
+            """
+            INSERT INTO artist (name, dob, gender, address, user_id)
+            VALUES ('Test Artist', '1990-01-01', 'o', 'Test', %s)
+            RETURNING id
+            """,
+            (user_id,),
+        )
+        return artist_id
+
+    def create_music(self, artist_id, title="Song"):
+        (music_id,) = self.execute(
+            """
+            INSERT INTO music (artist_id, title, album_name, genre)
+            VALUES (%s, %s, 'Album', 'rock')
+            RETURNING id
+            """,
+            (artist_id, title),
+        )
+        return music_id
+
+
+@pytest.fixture
+def database(monkeypatch):
+    """
+    The models on a real PostgreSQL database, for tests of the SQL itself.
+    Skipped unless TEST_DATABASE_URL is set; pending migrations are applied
+    to it and the users created (with their artists and music) are deleted
+    after the test.
+    """
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    from app import db
+    from app.migrations import upgrade
+    from app.pool import ConnectionPool
+
+    upgrade(TEST_DATABASE_URL, echo=lambda *args: None)
+    pool = ConnectionPool(TEST_DATABASE_URL, minconn=1, maxconn=4)
+    monkeypatch.setattr(db, "get_pool", lambda: pool)
+    database = Database(pool)
+    try:
+        yield database
+    finally:
+        for sql, params in database.cleanup:
+            database.execute(sql, params)
+        if database.user_ids:
+            database.execute("DELETE FROM users WHERE id = ANY(%s)", (database.user_ids,))
+        pool.closeall()
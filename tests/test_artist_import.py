@@ -0,0 +1,71 @@
+"""copy_artists_batch on PostgreSQL (TEST_DATABASE_URL, see conftest)."""
+
+import uuid
+
+import pytest
+
+from app.models import copy_artists_batch
+
+
+@pytest.fixture
+def name(database):
+    """A name prefix no other artist uses; its artists are deleted afterwards."""
+    prefix = f"Import {uuid.uuid4().hex[:8]}"
+    database.cleanup.append(("DELETE FROM artist WHERE name LIKE %s", (f"{prefix}%",)))
+    return prefix
+
+
+def row(name, albums=1, address="Kathmandu"):
+    return (name, "1990-01-01", "m", address, 2001, albums)
+
+
+def albums_of(database, name):
+    conn = database.pool.getconn()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT no_of_albums FROM artist WHERE name = %s ORDER BY id", (name,)
+            )
+            return [albums for (albums,) in cursor.fetchall()]
+    finally:
+        database.pool.putconn(conn)
+
+
+def test_insert_mode_adds_every_row(database, name):
+    copy_artists_batch([row(name)])
+
+    counts = copy_artists_batch([row(name, albums=2), row(name, albums=3)])
+
+    assert counts == {"inserted": 2, "updated": 0, "unchanged": 0, "duplicates": 0}
+    assert albums_of(database, name) == [1, 2, 3]
+
+
+def test_upsert_inserts_unknown_keys_and_updates_the_others(database, name):
+    copy_artists_batch([row(name), row(f"{name} same")])
+
+    counts = copy_artists_batch(
+        [row(name, albums=5), row(f"{name} same"), row(f"{name} new")], upsert=True
+    )
+
+    assert counts == {"inserted": 1, "updated": 1, "unchanged": 1, "duplicates": 0}
+    assert albums_of(database, name) == [5]
+    assert albums_of(database, f"{name} new") == [1]
+
+
+def test_upsert_counts_every_artist_row_it_updates(database, name):
+    # registration may create two artists sharing the key
+    copy_artists_batch([row(name), row(name, albums=2)])
+
+    counts = copy_artists_batch([row(name, albums=7)], upsert=True)
+
+    assert counts["updated"] == 2
+    assert albums_of(database, name) == [7, 7]
+
+
+def test_upsert_keeps_the_last_row_of_a_repeated_key(database, name):
+    counts = copy_artists_batch(
+        [row(name, albums=1), row(name, albums=2), row(name, albums=3)], upsert=True
+    )
+
+    assert counts == {"inserted": 1, "updated": 0, "unchanged": 0, "duplicates": 2}
+    assert albums_of(database, name) == [3]
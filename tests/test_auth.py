@@ -0,0 +1,142 @@
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app import create_app, db, ratelimit
+from app.ratelimit import MemoryCounter
+from app.routes import auth
+
+REGISTRATION = {
+    "first_name": "Jane",
+    "last_name": "Doe",
+    "email": "jane@example.com",
+    "password": "correct horse",
+    "c_password": "correct horse",
+    "phone": "9800000000",
+    "dob": "1990-01-01",
+    "gender": "f",
+    "address": "Kathmandu",
+    "role": "artist_manager",
+}
+USER = {
+    "id": 1,
+    "first_name": "Jane",
+    "last_name": "Doe",
+    "role": "artist_manager",
+    "authz_version": 1,
+    "password": generate_password_hash("correct horse", "pbkdf2:sha256:1"),
+}
+
+
+class FakeConnection:
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class FakePool:
+    """Counts the connections checked out of it."""
+
+    def __init__(self):
+        self.checked_out = 0
+
+    def getconn(self):
+        self.checked_out += 1
+        return FakeConnection()
+
+    def putconn(self, conn):
+        self.checked_out -= 1
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = FakePool()
+    monkeypatch.setattr(db, "get_pool", lambda: pool)
+    return pool
+
+
+@pytest.fixture
+def client(pool):
+    return create_app().test_client()
+
+
+def checked_out_during(pool, fn, calls):
+    def wrapper(*args):
+        calls.append(pool.checked_out)
+        return fn(*args)
+
+    return wrapper
+
+
+def test_register_hashes_before_checking_out_a_connection(client, pool, monkeypatch):
+    calls, registered = [], []
+
+    def register_user(data, password_hash):
+        with db.get_connection():
+            registered.append(password_hash)
+        return 7
+
+    monkeypatch.setattr(auth, "hash_password", checked_out_during(pool, lambda password: "hashed", calls))
+    monkeypatch.setattr(auth, "register_user", register_user)
+
+    response = client.post("/auth/register", data=REGISTRATION)
+
+    assert response.status_code == 302
+    assert calls == [0]
+    assert registered == ["hashed"]
+    assert pool.checked_out == 0
+
+
+def test_login_returns_the_connection_before_verifying(client, pool, monkeypatch):
+    calls = []
+
+    def get_user_with_email(email):
+        with db.get_connection():
+            return dict(USER)
+
+    monkeypatch.setattr(auth, "get_user_with_email", get_user_with_email)
+    monkeypatch.setattr(auth, "verify_password", checked_out_during(pool, auth.verify_password, calls))
+    monkeypatch.setattr(auth, "needs_rehash", lambda password_hash: False)
+    monkeypatch.setattr(auth, "clear_login_failures", lambda email: None)
+
+    response = client.post("/auth/login", data={"email": "jane@example.com", "password": "correct horse"})
+
+    assert response.status_code == 302
+    assert calls == [0]
+    with client.session_transaction() as session:
+        assert session["user_id"] == 1
+
+
+@pytest.fixture
+def throttled(monkeypatch):
+    """Fresh login counters, and a record of the lookups and hashes run."""
+    calls = []
+    monkeypatch.setattr(ratelimit, "counter", MemoryCounter(window=300, max_keys=100))
+    monkeypatch.setattr(
+        auth, "get_user_with_email", lambda email: calls.append("lookup") or dict(USER)
+    )
+    monkeypatch.setattr(
+        auth, "verify_password", lambda password_hash, password: calls.append("verify") or False
+    )
+    monkeypatch.setattr(auth, "hash_password", lambda password: calls.append("hash"))
+    return calls
+
+
+def test_blocked_login_runs_no_query_and_no_hash(client, throttled):
+    for _ in range(ratelimit.LOGIN_LIMIT_PER_EMAIL):
+        ratelimit.record_login_failure("jane@example.com")
+
+    response = client.post("/auth/login", data={"email": "jane@example.com", "password": "guess"})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == str(int(ratelimit.LOGIN_LIMIT_WINDOW))
+    assert throttled == []
+
+
+def test_repeated_failures_end_in_the_throttled_response(client, throttled):
+    form = {"email": "jane@example.com", "password": "guess"}
+    statuses = [client.post("/auth/login", data=form).status_code for _ in range(ratelimit.LOGIN_LIMIT_PER_EMAIL + 1)]
+
+    assert statuses == [200] * ratelimit.LOGIN_LIMIT_PER_EMAIL + [429]
+    assert throttled.count("verify") == ratelimit.LOGIN_LIMIT_PER_EMAIL
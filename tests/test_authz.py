@@ -0,0 +1,123 @@
+import psycopg2
+import pytest
+
+from app import authz, create_app
+from app.models import delete_user, update_user
+from app.permissions import ENDPOINT_PERMISSIONS
+
+
+class Stop(BaseException):
+    """Ends _listen_forever at its reconnect pause."""
+
+
+class DeadConnection:
+    """A LISTEN connection whose peer vanished: quiet until pinged."""
+
+    notifies = []
+    closed = False
+
+    def set_isolation_level(self, level):
+        pass
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql):
+        if sql == "SELECT 1":
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+
+    def close(self):
+        self.closed = True
+
+
+def test_quiet_listener_pings_and_drops_a_dead_connection(monkeypatch, capsys):
+    conn = DeadConnection()
+    listening_while_quiet = []
+
+    def select(read, write, error, timeout):
+        listening_while_quiet.append(authz._listening.is_set())
+        if len(listening_while_quiet) > 1:
+            raise Stop  # still waiting on the dead connection
+        return [], [], []
+
+    def sleep(seconds):
+        raise Stop
+
+    monkeypatch.setattr(authz.psycopg2, "connect", lambda *args, **kwargs: conn)
+    monkeypatch.setattr(authz.select, "select", select)
+    monkeypatch.setattr(authz.time, "sleep", sleep)
+    authz._principals.set(1, {"id": 1, "role": "super_admin", "authz_version": 0})
+
+    with pytest.raises(Stop):
+        authz._listen_forever()
+
+    assert listening_while_quiet == [True]
+    # the cache is no longer trusted and the failure is not hidden
+    assert not authz._listening.is_set()
+    assert authz._principals.get(1) is None
+    assert conn.closed
+    assert "server closed the connection unexpectedly" in capsys.readouterr().err
+
+
+@pytest.fixture
+def client(database):
+    app = create_app()
+    for endpoint in ENDPOINT_PERMISSIONS:
+        app.view_functions[endpoint] = lambda **kwargs: "ok"
+    authz.forget_principal()
+    return app.test_client()
+
+
+def log_in(client, database, role):
+    user_id = database.create_user(role)
+    with client.session_transaction() as session:
+        session["user_id"] = user_id
+        session["role"] = role
+        session["authz_version"] = 0
+    return user_id
+
+
+def user_form(database, user_id, role):
+    (email,) = database.execute("SELECT email FROM users WHERE id = %s", (user_id,))
+    return {
+        "id": user_id,
+        "first_name": "Test",
+        "last_name": "User",
+        "email": email,
+        "phone": "9800000000",
+        "dob": "1990-01-01",
+        "gender": "o",
+        "address": "Test",
+        "role": role,
+    }
+
+
+def test_demoted_user_loses_access_on_the_next_request(client, database):
+    user_id = log_in(client, database, "super_admin")
+    assert client.get("/user").text == "ok"
+
+    update_user(user_form(database, user_id, "artist"))
+
+    response = client.get("/user")
+    assert response.headers["Location"] == "/dashboard"
+    with client.session_transaction() as session:
+        assert session["role"] == "artist"
+        assert session["authz_version"] == 1
+
+
+def test_deleted_user_is_logged_out(client, database):
+    user_id = log_in(client, database, "artist_manager")
+    assert client.get("/artist").text == "ok"
+
+    delete_user(user_id)
+
+    response = client.get("/artist")
+    assert response.headers["Location"].startswith("/auth/login")
+    with client.session_transaction() as session:
+        assert "user_id" not in session
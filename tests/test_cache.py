@@ -0,0 +1,50 @@
+import threading
+
+from app.cache import _MISSING, SqliteStore, TTLCache
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    first, second = SqliteStore(path, 60, 100), SqliteStore(path, 60, 100)
+
+    first.set("artist", "1", {"id": 1})
+    assert second.get("artist", "1") == {"id": 1}
+
+    second.delete("artist", "1")
+    assert first.get("artist", "1") is _MISSING
+
+
+def test_sqlite_store_prunes_to_maxsize(tmp_path):
+    store = SqliteStore(str(tmp_path / "cache.sqlite3"), 60, maxsize=10, prune_every=5)
+    for key in range(50):
+        store.set("artist", key, {"id": key})
+
+    count = store._connection().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+    assert count <= 10 + 5
+    # the most recently written rows expire last and are kept
+    assert store.get("artist", 49) == {"id": 49}
+
+
+def test_sqlite_store_deletes_expired_rows(tmp_path):
+    store = SqliteStore(str(tmp_path / "cache.sqlite3"), -1, maxsize=100)
+    store.set("artist", 1, {"id": 1})
+    assert store.get("artist", 1) is _MISSING
+
+    store.prune()
+    assert store._connection().execute("SELECT COUNT(*) FROM cache").fetchone()[0] == 0
+
+
+def test_ttl_cache_len_under_concurrent_writes():
+    cache = TTLCache(maxsize=100, ttl=60)
+
+    def write(offset):
+        for key in range(1000):
+            cache.set(offset + key, key)
+            assert len(cache) <= 100
+
+    threads = [threading.Thread(target=write, args=(n * 1000,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(cache) == 100
@@ -0,0 +1,90 @@
+import csv
+import io
+
+import pytest
+
+from app.utils.csv_import import iter_csv_columns, stop_on_unreadable
+from app.utils.exceptions import ValidationError
+
+
+def read(text, columns, **kwargs):
+    return list(iter_csv_columns(io.StringIO(text), columns, **kwargs))
+
+
+def test_columns_are_picked_by_header_name_in_the_requested_order():
+    text = "b,ignored,a\n1,x,2\n3,y,4\n"
+    assert read(text, ("a", "b")) == [([2, 3], {"a": ["2", "4"], "b": ["1", "3"]})]
+
+
+def test_chunks_carry_the_file_line_numbers():
+    text = "a\n1\n\n2\n\"multi\nline\"\n3\n"
+
+    chunks = read(text, ("a",), chunk_rows=2)
+
+    assert chunks == [
+        ([2, 4], {"a": ["1", "2"]}),
+        ([6, 7], {"a": ["multi\nline", "3"]}),
+    ]
+
+
+def test_short_rows_are_padded_like_dict_reader():
+    text = "a,b,c\n1\n1,2\n"
+    chunks = read(text, ("a", "c"))
+    expected = list(csv.DictReader(io.StringIO(text), restval=""))
+    assert chunks[0][1] == {
+        "a": [row["a"] for row in expected],
+        "c": [row["c"] for row in expected],
+    }
+
+
+def test_missing_required_column_is_reported():
+    with pytest.raises(ValidationError) as error:
+        read("a\n1\n", ("a", "c", "b"))
+    assert error.value.errors == {"file": "Missing columns: b, c"}
+
+
+def test_missing_optional_column_reads_as_empty():
+    chunks = read("a\n1\n2\n", ("a", "b"), optional=("b",))
+    assert chunks == [([2, 3], {"a": ["1", "2"], "b": ["", ""]})]
+
+
+def test_no_expected_column_at_all_is_refused():
+    with pytest.raises(ValidationError):
+        read("x\n1\n", ("a", "b"), optional=("a", "b"))
+
+
+def test_empty_file_and_header_only_file():
+    with pytest.raises(ValidationError):
+        read("", ("a",))
+    assert read("a,b\n", ("a",)) == []
+
+
+def test_unreadable_file_stops_after_the_last_good_chunk():
+    # well past the decoder's first read, so the bad byte surfaces mid-file
+    raw = b"a\n" + b"".join(b"%d\n" % index for index in range(5000)) + b"\xff\n"
+    stream = io.TextIOWrapper(io.BytesIO(raw), encoding="utf-8", newline="")
+    errors = []
+
+    chunks = list(stop_on_unreadable(iter_csv_columns(stream, ("a",), chunk_rows=100), errors))
+
+    last_line = chunks[-1][0][-1]
+    assert len(chunks) > 1
+    assert errors == [
+        {
+            "line": last_line + 1,
+            "errors": {"file": errors[0]["errors"]["file"]},
+        }
+    ]
+    assert errors[0]["errors"]["file"].startswith(f"Import stopped after line {last_line}:")
+
+
+def test_broken_quoting_stops_the_file():
+    # an unclosed quote swallows the rest of the file into one field,
+    # until csv refuses it as larger than field_size_limit()
+    stream = io.StringIO('a\n1\n"never closed\n' + "x" * (csv.field_size_limit() + 1))
+    errors = []
+
+    chunks = list(stop_on_unreadable(iter_csv_columns(stream, ("a",), chunk_rows=1), errors))
+
+    assert chunks == [([2], {"a": ["1"]})]
+    assert errors[0]["line"] == 3
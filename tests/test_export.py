@@ -0,0 +1,135 @@
+import csv
+import gzip
+import io
+import json
+from datetime import date, datetime
+
+import pytest
+from flask import Flask
+
+from app.utils import export
+
+HEADER = ["name", "dob", "albums", "created_at"]
+TYPES = ("string", "date", "int", "timestamp")
+ROWS = [
+    ("Ada", date(1990, 1, 2), 3, datetime(2024, 5, 6, 7, 8, 9)),
+    ("Bo, \"Jr\"", date(1985, 12, 31), None, datetime(2024, 1, 1)),
+    ("Ünïcode", date(2000, 2, 29), 0, datetime(2023, 3, 4, 5, 6, 7, 123456)),
+]
+
+
+def many_rows(count):
+    return [(f"Artist {index}", date(1990, 1, 1), index, datetime(2024, 1, 1)) for index in range(count)]
+
+
+def test_csv_streams_the_header_first():
+    chunks = list(export.iter_csv(HEADER, iter(ROWS), chunk_rows=2))
+    assert chunks[0] == "name,dob,albums,created_at\r\n"
+    assert len(chunks) == 3
+    parsed = list(csv.reader(io.StringIO("".join(chunks))))
+    assert parsed[2][0] == 'Bo, "Jr"'
+    assert len(parsed) == 4
+
+
+def test_csv_gzip_decompresses_to_the_csv():
+    plain = "".join(export.iter_csv(HEADER, iter(ROWS)))
+    compressed = b"".join(export.iter_csv_gzip(HEADER, iter(ROWS)))
+    assert gzip.decompress(compressed).decode("utf-8") == plain
+
+
+def test_ndjson_writes_one_object_per_line():
+    text = "".join(export.iter_ndjson(HEADER, iter(ROWS), chunk_rows=2))
+    lines = [json.loads(line) for line in text.splitlines()]
+    assert lines[0] == {
+        "name": "Ada",
+        "dob": "1990-01-02",
+        "albums": 3,
+        "created_at": "2024-05-06T07:08:09",
+    }
+    assert lines[1]["albums"] is None
+    assert len(lines) == 3
+
+
+def test_unknown_format_is_refused_before_reading_rows():
+    with pytest.raises(ValueError, match="Unknown export format"):
+        export.export_response_args("xlsx", "artists")
+
+
+@pytest.mark.parametrize("format", ["csv", "csv.gz", "ndjson"])
+def test_export_response_fetches_the_first_row_before_streaming(format):
+    def failing_rows():
+        raise RuntimeError("connection refused")
+        yield
+
+    with Flask(__name__).test_request_context():
+        with pytest.raises(RuntimeError, match="connection refused"):
+            export.export_response(format, "artists", HEADER, TYPES, failing_rows())
+
+
+def test_export_response_streams_the_prefetched_row_first():
+    with Flask(__name__).test_request_context():
+        response = export.export_response("csv", "artists", HEADER, TYPES, iter(ROWS))
+        body = response.get_data(as_text=True)
+    assert response.headers["Content-Disposition"] == "attachment; filename=artists.csv"
+    assert body.splitlines()[0] == "name,dob,albums,created_at"
+    assert body.splitlines()[1].startswith("Ada,")
+    assert len(body.splitlines()) == 4
+
+
+def test_arrow_formats_are_hidden_without_pyarrow(monkeypatch):
+    def missing():
+        raise ValueError("no pyarrow")
+
+    export.available_export_formats.cache_clear()
+    monkeypatch.setattr(export, "_import_arrow", missing)
+    try:
+        assert export.available_export_formats() == ("csv", "csv.gz", "ndjson")
+        with pytest.raises(ValueError):
+            export.export_response_args("parquet", "artists")
+    finally:
+        export.available_export_formats.cache_clear()
+
+
+def test_parquet_round_trip_one_row_group_per_chunk():
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as parquet
+
+    rows = many_rows(25)
+    chunks = list(export.iter_parquet(HEADER, iter(rows), TYPES, chunk_rows=10))
+    # every row group leaves as soon as it's written, then the footer
+    assert len([chunk for chunk in chunks if chunk]) >= 3
+
+    data = parquet.ParquetFile(io.BytesIO(b"".join(chunks)))
+    assert data.metadata.num_row_groups == 3
+    assert data.schema_arrow.names == HEADER
+    table = data.read()
+    assert table.to_pylist()[24] == dict(zip(HEADER, rows[24]))
+
+
+def test_parquet_keeps_types_and_nulls():
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as parquet
+
+    table = parquet.read_table(io.BytesIO(b"".join(export.iter_parquet(HEADER, iter(ROWS), TYPES))))
+    assert table.schema.field("dob").type == pa.date32()
+    assert table.schema.field("albums").type == pa.int64()
+    assert [tuple(row.values()) for row in table.to_pylist()] == ROWS
+
+
+def test_arrow_stream_round_trip():
+    pa = pytest.importorskip("pyarrow")
+
+    chunks = list(export.iter_arrow(HEADER, iter(many_rows(25)), TYPES, chunk_rows=10))
+    reader = pa.ipc.open_stream(io.BytesIO(b"".join(chunks)))
+    batches = list(reader)
+    assert [batch.num_rows for batch in batches] == [10, 10, 5]
+    assert pa.Table.from_batches(batches).column("albums").to_pylist() == list(range(25))
+
+
+def test_empty_export_is_still_a_valid_file():
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as parquet
+
+    table = parquet.read_table(io.BytesIO(b"".join(export.iter_parquet(HEADER, iter(()), TYPES))))
+    assert table.num_rows == 0
+    assert table.schema.names == HEADER
@@ -0,0 +1,98 @@
+import io
+
+import pytest
+from psycopg2 import DataError
+
+from app.services import artist as artist_service
+from app.services import music as music_service
+from app.utils.csv_import import load_bisecting
+
+ARTIST_HEADER = "name,dob,gender,address,first_release_year,no_of_albums\n"
+
+
+def artist_line(name, year="2001", albums="3"):
+    return f"{name},1990-01-01,m,Kathmandu,{year},{albums}\n"
+
+
+@pytest.fixture
+def loaded(monkeypatch):
+    """Rows handed to copy_artists_batch; a row named "Reject Me" fails its batch."""
+    loaded = []
+
+    def copy_artists_batch(rows, upsert=False):
+        if any(row[0] == "Reject Me" for row in rows):
+            raise DataError("value out of range")
+        loaded.extend(rows)
+        return {"inserted": len(rows), "updated": 0, "unchanged": 0, "duplicates": 0}
+
+    monkeypatch.setattr(artist_service, "copy_artists_batch", copy_artists_batch)
+    return loaded
+
+
+def test_load_bisecting_isolates_rejected_rows():
+    calls = []
+
+    def load(rows):
+        calls.append(len(rows))
+        if 13 in rows or 40 in rows:
+            raise ValueError
+        return len(rows)
+
+    results, rejected = load_bisecting(load, list(range(64)), (ValueError,))
+
+    assert sum(results) == 62
+    assert [row for row, _ in rejected] == [13, 40]
+    assert len(calls) < 64
+
+
+def test_out_of_range_and_non_ascii_numbers_fail_validation(loaded):
+    text = ARTIST_HEADER + artist_line("Too Many", albums="99999999999") + artist_line(
+        "Superscript", year="²"
+    ) + artist_line("Valid One")
+
+    report = artist_service.import_artists(io.StringIO(text), batch_size=10)
+
+    assert [row[0] for row in loaded] == ["Valid One"]
+    assert [error["line"] for error in report["errors"]] == [2, 3]
+    assert "between" in report["errors"][0]["errors"]["no_of_albums"]
+    assert "numeric" in report["errors"][1]["errors"]["first_release_year"]
+
+
+def test_database_rejection_only_drops_the_offending_row(loaded):
+    names = [f"Artist {index}" for index in range(20)]
+    names[7] = "Reject Me"
+    text = ARTIST_HEADER + "".join(artist_line(name) for name in names)
+
+    report = artist_service.import_artists(io.StringIO(text), batch_size=50)
+
+    assert report["inserted"] == 19
+    assert len(loaded) == 19
+    assert report["errors"] == [{"line": 9, "errors": {"row": "value out of range"}}]
+
+
+def test_unreadable_file_keeps_the_report_of_loaded_batches(loaded):
+    text = ARTIST_HEADER + "".join(artist_line(f"Artist {index}") for index in range(4))
+    raw = text.encode() + b"\xff\xfe broken\n"
+    stream = io.TextIOWrapper(io.BytesIO(raw), encoding="utf-8", newline="")
+
+    report = artist_service.import_artists(stream, batch_size=2)
+
+    assert report["inserted"] == len(loaded)
+    assert report["errors"][-1]["errors"]["file"].startswith("Import stopped after line")
+
+
+def test_music_import_retries_rejected_batches(monkeypatch):
+    def copy_music_batch(rows):
+        if any(row[3] == "Bad" for row in rows):
+            raise DataError("boom")
+        return len(rows), []
+
+    monkeypatch.setattr(music_service, "copy_music_batch", copy_music_batch)
+    text = "artist_id,title,album_name,genre\n" + "".join(
+        f"1,{title},Album,rock\n" for title in ("One", "Bad", "Three", "Four")
+    )
+
+    report = music_service.import_music(io.StringIO(text), batch_size=10)
+
+    assert report["inserted"] == 3
+    assert report["errors"] == [{"line": 3, "errors": {"row": "boom"}}]
@@ -0,0 +1,75 @@
+import os
+import time
+
+import pytest
+
+from app import jobs
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_STORAGE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def make_file(storage, name, age=0):
+    path = storage / name
+    path.write_text("x")
+    if age:
+        stamp = time.time() - age
+        os.utime(path, (stamp, stamp))
+    return str(path)
+
+
+def test_failed_job_removes_its_upload(storage, monkeypatch):
+    failed = []
+    monkeypatch.setattr(jobs, "fail_job", lambda job_id, error: failed.append(job_id))
+
+    def broken(job):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(jobs.JOB_HANDLERS, "artist_import", broken)
+    upload = make_file(storage, "upload.csv")
+
+    jobs.run_job({"id": 7, "kind": "artist_import", "input_path": upload})
+
+    assert failed == [7]
+    assert not os.path.exists(upload)
+
+
+def test_recovered_jobs_keep_the_upload_only_when_requeued(storage, monkeypatch):
+    requeued = make_file(storage, "requeued.csv")
+    failed = make_file(storage, "failed.csv")
+    calls = []
+
+    def recover_stale_jobs(stale_after, retry_kinds, max_attempts, error):
+        calls.append((stale_after, retry_kinds))
+        return [
+            {"id": 1, "status": "pending", "input_path": requeued},
+            {"id": 2, "status": "failed", "input_path": failed},
+        ]
+
+    monkeypatch.setattr(jobs, "recover_stale_jobs", recover_stale_jobs)
+
+    recovered = jobs.recover_jobs(60)
+
+    assert [job["id"] for job in recovered] == [1, 2]
+    assert calls[0][0] == 60 and "music_import" not in calls[0][1]
+    assert os.path.exists(requeued)
+    assert not os.path.exists(failed)
+
+
+def test_sweep_removes_old_jobs_and_old_orphans_only(storage, monkeypatch):
+    finished = make_file(storage, "finished.csv", age=100)
+    referenced = make_file(storage, "referenced.csv", age=100)
+    old_orphan = make_file(storage, "orphan.csv", age=100)
+    new_orphan = make_file(storage, "new.csv")
+    monkeypatch.setattr(jobs, "delete_finished_jobs", lambda older_than: [finished])
+    monkeypatch.setattr(jobs, "list_job_file_paths", lambda: {referenced})
+
+    assert jobs.sweep_job_files(50) == (1, 1)
+
+    assert not os.path.exists(finished)
+    assert not os.path.exists(old_orphan)
+    assert os.path.exists(referenced)
+    assert os.path.exists(new_orphan)
@@ -0,0 +1,95 @@
+import glob
+import os
+import re
+from datetime import datetime
+
+import pytest
+
+from app.migrations import MIGRATIONS_DIR
+from app.utils.listing import (
+    ARTIST_LIST,
+    MUSIC_LIST,
+    USER_LIST,
+    ListQuery,
+    Sort,
+    choice,
+    where_clause,
+)
+
+
+def test_choice_accepts_only_the_allowed_values():
+    parse = choice("m", "f")
+    assert parse("f") == "f"
+    with pytest.raises(ValueError):
+        parse("x")
+
+
+def test_clean_filters_keeps_declared_and_valid_values_only():
+    values = {
+        "gender": "f",
+        "first_release_year": "1999",
+        "role": "super_admin",  # not an artist filter
+        "sort": "name",
+    }
+    assert ARTIST_LIST.clean_filters(values) == {"gender": "f", "first_release_year": 1999}
+
+
+@pytest.mark.parametrize(
+    "values",
+    [None, {}, {"gender": ""}, {"gender": "x"}, {"first_release_year": "1999; DROP TABLE artist"}],
+)
+def test_clean_filters_drops_blank_and_invalid_values(values):
+    assert ARTIST_LIST.clean_filters(values) == {}
+
+
+def test_unknown_sort_falls_back_to_the_default():
+    assert USER_LIST.sort_name("email") == "email"
+    assert USER_LIST.sort_name("password") == "newest"
+    assert USER_LIST.sort_name(None) == "newest"
+    assert USER_LIST.sort("password").column == "created_at"
+
+
+def test_sort_orders_and_pages_by_column_then_id():
+    newest = Sort("created_at", descending=True, parse=datetime.fromisoformat)
+    assert newest.order_by() == "created_at DESC, id DESC"
+    assert newest.keyset() == "(created_at, id) < (%s, %s)"
+
+    title = Sort("music.title")
+    assert title.key == "title"
+    assert title.order_by() == "music.title ASC, music.id ASC"
+    assert title.keyset() == "(music.title, music.id) > (%s, %s)"
+
+
+def test_conditions_bind_every_value():
+    query = ListQuery({"a": ("a = %s", str), "b": ("b = %s", int)}, {}, "")
+    conditions, params = query.conditions({"a": "x", "b": 2})
+    assert conditions == ["a = %s", "b = %s"]
+    assert params == ["x", 2]
+    assert where_clause(conditions) == "WHERE a = %s AND b = %s"
+    assert where_clause(conditions, "AND") == "AND a = %s AND b = %s"
+    assert where_clause([]) == ""
+
+
+def migration_indexes():
+    """{table: [[column, ...], ...]} of every index the migrations create."""
+    pattern = re.compile(r"CREATE\s+(?:UNIQUE\s+)?INDEX.*?\s+ON\s+(\w+)\s*\(([^)]*)\)", re.S | re.I)
+    indexes = {}
+    for path in glob.glob(os.path.join(MIGRATIONS_DIR, "*.sql")):
+        with open(path) as migration:
+            for table, columns in pattern.findall(migration.read()):
+                names = [column.split()[0] for column in columns.split(",")]
+                indexes.setdefault(table, []).append(names)
+    return indexes
+
+
+@pytest.mark.parametrize(
+    "table, query, prefix",
+    [("users", USER_LIST, []), ("artist", ARTIST_LIST, []), ("music", MUSIC_LIST, ["artist_id"])],
+)
+def test_every_filter_and_sort_has_an_index(table, query, prefix):
+    indexes = migration_indexes()[table]
+    for sort in query.sorts.values():
+        for condition, _ in [(None, None), *query.filters.values()]:
+            filtered = [condition.split()[0].rpartition(".")[2]] if condition else []
+            expected = prefix + filtered + [sort.key, "id"]
+            assert expected in indexes, f"no index on {table} ({', '.join(expected)})"
@@ -0,0 +1,41 @@
+import pytest
+from flask import Flask
+
+from app.routes import metrics
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", "s3cret")
+    monkeypatch.setattr(metrics, "pool_stats", lambda: None)
+    monkeypatch.setattr(metrics, "has_permission", lambda permission: False)
+    app = Flask(__name__)
+    metrics.register_metrics_routes(app)
+    return app.test_client()
+
+
+def test_anonymous_requests_are_refused(client):
+    response = client.get("/metrics")
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Bearer"
+
+
+def test_wrong_token_is_refused(client):
+    response = client.get("/metrics", headers={"Authorization": "Bearer nope"})
+    assert response.status_code == 401
+
+
+def test_token_grants_access(client):
+    response = client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200
+
+
+def test_metrics_view_permission_grants_access(client, monkeypatch):
+    monkeypatch.setattr(metrics, "has_permission", lambda permission: permission == "metrics.view")
+    assert client.get("/metrics").status_code == 200
+
+
+def test_empty_token_never_matches(client, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", "")
+    response = client.get("/metrics", headers={"Authorization": "Bearer "})
+    assert response.status_code == 401
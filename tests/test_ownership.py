@@ -0,0 +1,83 @@
+"""Owner scoped music queries on PostgreSQL (TEST_DATABASE_URL, see conftest)."""
+
+import pytest
+
+from app import authz, create_app
+from app.models import delete_music, get_music_by_id, update_music
+
+FORM = {"title": "Renamed", "album_name": "Album", "genre": "jazz"}
+
+
+@pytest.fixture
+def owners(database):
+    owner = database.create_user()
+    other = database.create_user()
+    own_artist = database.create_artist(owner)
+    other_artist = database.create_artist(other)
+    return {
+        "owner": owner,
+        "own_artist": own_artist,
+        "own_music": database.create_music(own_artist),
+        "other_artist": other_artist,
+        "other_music": database.create_music(other_artist),
+    }
+
+
+def title_of(database, music_id):
+    row = database.execute("SELECT title FROM music WHERE id = %s", (music_id,))
+    return row and row[0]
+
+
+def test_other_owners_music_is_not_found(owners):
+    assert get_music_by_id(owners["other_music"], owners["owner"]) is None
+    assert get_music_by_id(owners["own_music"], owners["owner"])["id"] == owners["own_music"]
+    assert get_music_by_id(owners["other_music"])["id"] == owners["other_music"]
+
+
+def test_cross_owner_update_changes_no_row(database, owners):
+    for artist in ("own_artist", "other_artist"):
+        with pytest.raises(ValueError, match="Music not found"):
+            update_music(
+                owners["other_music"],
+                {**FORM, "artist_id": owners[artist]},
+                owners["owner"],
+            )
+    assert title_of(database, owners["other_music"]) == "Song"
+
+
+def test_music_cannot_be_moved_to_another_owners_artist(database, owners):
+    with pytest.raises(ValueError):
+        update_music(
+            owners["own_music"],
+            {**FORM, "artist_id": owners["other_artist"]},
+            owners["owner"],
+        )
+    assert title_of(database, owners["own_music"]) == "Song"
+
+
+def test_own_music_is_updated(database, owners):
+    update_music(owners["own_music"], {**FORM, "artist_id": owners["own_artist"]}, owners["owner"])
+    assert title_of(database, owners["own_music"]) == "Renamed"
+
+
+def test_cross_owner_delete_removes_no_row(database, owners):
+    with pytest.raises(ValueError, match="Music not found"):
+        delete_music(owners["other_music"], owners["owner"])
+    assert title_of(database, owners["other_music"]) == "Song"
+
+
+def test_update_view_writes_the_url_id_not_the_posted_one(database, owners, monkeypatch):
+    monkeypatch.setattr(authz, "AUTHZ_LISTEN", False)
+    client = create_app().test_client()
+    with client.session_transaction() as session:
+        session["user_id"] = owners["owner"]
+        session["authz_version"] = 0
+
+    response = client.post(
+        f"/music/{owners['own_music']}/update",
+        data={**FORM, "id": owners["other_music"], "artist_id": owners["own_artist"]},
+    )
+
+    assert response.status_code == 302
+    assert title_of(database, owners["own_music"]) == "Renamed"
+    assert title_of(database, owners["other_music"]) == "Song"
@@ -0,0 +1,52 @@
+from datetime import datetime
+
+import pytest
+
+from app.utils.pagination import decode_cursor, encode_cursor, split_page
+
+
+def test_cursor_round_trips_a_timestamp():
+    created_at = datetime(2024, 5, 6, 7, 8, 9, 123456)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+
+def test_cursor_round_trips_other_sort_values():
+    assert decode_cursor(encode_cursor("Zoë", 7), parse=str) == ("Zoë", 7)
+    assert decode_cursor(encode_cursor(0.0607927, 3), parse=float) == (0.0607927, 3)
+
+
+def test_cursor_is_url_safe():
+    token = encode_cursor("a/b+c?" * 10, 1)
+    assert "=" not in token
+    assert set(token) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        None,
+        "",
+        "not base64 at all!",
+        encode_cursor("not a date", 1),
+        encode_cursor("2024-01-01T00:00:00", "one"),
+        "WyIyMDI0LTAxLTAxIl0",  # ["2024-01-01"], no id
+        "e30",  # {}
+    ],
+)
+def test_missing_or_tampered_cursor_falls_back_to_the_first_page(token):
+    assert decode_cursor(token) is None
+
+
+def test_split_page_without_next_page():
+    rows = [{"id": 2, "created_at": datetime(2024, 1, 2)}]
+    assert split_page(rows, 1) == (rows, None)
+    assert split_page([], 10) == ([], None)
+
+
+def test_split_page_drops_the_probe_row_and_points_after_the_last_row():
+    rows = [{"id": index, "name": f"Artist {index}"} for index in range(4)]
+
+    page, next_cursor = split_page(rows, 3, sort_key="name")
+
+    assert page == rows[:3]
+    assert decode_cursor(next_cursor, parse=str) == ("Artist 2", 2)
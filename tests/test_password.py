@@ -0,0 +1,57 @@
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from app.services import password
+from app.utils.exceptions import PoolTimeoutError
+
+
+class ManualExecutor:
+    """Executor whose futures complete when the test says so."""
+
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        self.futures.append((future, fn, args))
+        return future
+
+    def finish_all(self):
+        for future, fn, args in self.futures:
+            future.set_result(fn(*args))
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    executor = ManualExecutor()
+    monkeypatch.setattr(password, "PASSWORD_HASH_WORKERS", 1)
+    monkeypatch.setattr(password, "PASSWORD_HASH_TIMEOUT", 0.2)
+    monkeypatch.setattr(password, "_get_executor", lambda: executor)
+    monkeypatch.setattr(password, "_slots", threading.BoundedSemaphore(1))
+    return executor
+
+
+def test_timed_out_hash_keeps_its_slot_until_done(executor):
+    with pytest.raises(PoolTimeoutError, match="timed out"):
+        password._run(len, "abc")
+
+    # the first hash is still running: no slot for a second one
+    with pytest.raises(PoolTimeoutError, match="No password hashing worker"):
+        password._run(len, "abc")
+
+    executor.finish_all()
+    assert password._slots.acquire(blocking=False)
+
+
+def test_timeout_covers_the_slot_wait_and_the_hash(executor):
+    holder = password._slots
+    holder.acquire()
+    threading.Timer(0.15, holder.release).start()
+
+    started = time.monotonic()
+    with pytest.raises(PoolTimeoutError):
+        password._run(len, "abc")
+    assert time.monotonic() - started < 0.35
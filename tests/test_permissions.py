@@ -0,0 +1,156 @@
+import pytest
+from flask import Flask
+
+from app import authz, create_app, permissions
+from app.permissions import (
+    ENDPOINT_PERMISSIONS,
+    PermissionTable,
+    compile_permissions,
+    owner_scope,
+)
+
+ROLES = ("super_admin", "artist_manager", "artist")
+
+
+@pytest.fixture
+def principal(monkeypatch):
+    """The principal load_principal finds for the logged in user_id."""
+    principal = {"id": 5, "role": None, "authz_version": 1}
+    monkeypatch.setattr(
+        authz, "get_principal", lambda user_id: dict(principal) if principal["role"] else None
+    )
+    return principal
+
+
+@pytest.fixture
+def app(principal):
+    app = create_app()
+    # the hook is under test, not the views: every protected view answers "ok"
+    for endpoint in ENDPOINT_PERMISSIONS:
+        app.view_functions[endpoint] = lambda **kwargs: "ok"
+    return app
+
+
+def request_as(app, principal, role, method, path):
+    client = app.test_client()
+    if role is not None:
+        principal["role"] = role
+        with client.session_transaction() as session:
+            session["user_id"] = principal["id"]
+            session["authz_version"] = 1
+    return client.open(path, method=method)
+
+
+@pytest.mark.parametrize(
+    "role, method, path",
+    [
+        ("super_admin", "GET", "/user"),
+        ("super_admin", "POST", "/user/3/delete"),
+        ("artist_manager", "GET", "/artist"),
+        ("artist_manager", "POST", "/artist/music/file/create"),
+        ("artist", "GET", "/music/search"),
+        ("artist", "GET", "/artist/user/5"),
+    ],
+)
+def test_role_reaches_its_endpoints(app, principal, role, method, path):
+    response = request_as(app, principal, role, method, path)
+    assert response.status_code == 200
+    assert response.text == "ok"
+
+
+@pytest.mark.parametrize(
+    "role, method, path",
+    [
+        ("super_admin", "GET", "/artist/user/5"),
+        ("artist_manager", "GET", "/user"),
+        ("artist_manager", "POST", "/user/3/delete"),
+        ("artist", "GET", "/artist"),
+        ("artist", "POST", "/artist/music/file/create"),
+        ("artist", "GET", "/job/1"),
+        ("retired_role", "GET", "/dashboard"),
+    ],
+)
+def test_role_is_sent_back_to_the_dashboard(app, principal, role, method, path):
+    response = request_as(app, principal, role, method, path)
+    assert response.status_code == 302
+    assert response.headers["Location"] == "/dashboard"
+
+
+def test_anonymous_user_is_sent_to_login(app, principal):
+    response = request_as(app, principal, None, "GET", "/artist/3")
+    assert response.status_code == 302
+    assert response.headers["Location"] == "/auth/login?next=/artist/3"
+
+
+def test_deleted_user_is_logged_out(app, principal):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["user_id"] = 99
+    response = client.get("/dashboard")
+    assert response.headers["Location"].startswith("/auth/login")
+    with client.session_transaction() as session:
+        assert "user_id" not in session
+
+
+def test_public_endpoints_need_no_login(app, principal):
+    assert request_as(app, principal, None, "GET", "/hello-world").status_code == 200
+
+
+@pytest.mark.parametrize(
+    "role, expected",
+    [("super_admin", None), ("artist_manager", None), ("artist", 5)],
+)
+def test_owner_scope_limits_roles_without_the_permission(app, principal, role, expected):
+    principal["role"] = role
+    with app.test_request_context():
+        from flask import session
+
+        session["user_id"] = principal["id"]
+        assert owner_scope("music.manage_any") == expected
+
+
+def test_role_masks_are_the_or_of_their_permissions():
+    table = PermissionTable(
+        {"admin": ("a.read", "a.write"), "reader": ("a.read",)},
+        {"page": ("a.read",), "form": ("a.read", "a.write")},
+    )
+    assert table.roles_for(table.endpoint_masks["page"]) == ["admin", "reader"]
+    assert table.roles_for(table.endpoint_masks["form"]) == ["admin"]
+    assert not table.role_allows("stranger", table.endpoint_masks["page"])
+    assert table.names(table.role_masks["admin"]) == ["a.read", "a.write"]
+
+
+def test_unknown_permission_is_refused():
+    with pytest.raises(ValueError, match="unknown permissions"):
+        PermissionTable({"admin": ("a.read",)}, {"page": ("a.raed",)})
+
+
+def small_app():
+    app = Flask(__name__)
+    app.add_url_rule("/home", "home", lambda: "")
+    app.add_url_rule("/page", "page", lambda: "")
+    return app
+
+
+def test_undeclared_endpoint_fails_at_startup(monkeypatch):
+    monkeypatch.setattr(permissions, "ENDPOINT_PERMISSIONS", {})
+    with pytest.raises(RuntimeError, match=r"No permissions declared for endpoints \['page'\]"):
+        compile_permissions(small_app())
+
+
+def test_declared_but_unrouted_endpoint_fails_at_startup(monkeypatch):
+    monkeypatch.setattr(
+        permissions,
+        "ENDPOINT_PERMISSIONS",
+        {"page": ("dashboard.view",), "pgae": ("dashboard.view",)},
+    )
+    with pytest.raises(RuntimeError, match=r"unknown endpoints \['pgae'\]"):
+        compile_permissions(small_app())
+
+
+def test_every_role_permission_is_required_somewhere():
+    required = {name for names in ENDPOINT_PERMISSIONS.values() for name in names}
+    # checked inside views with has_permission / owner_scope instead
+    in_views = {"dashboard.stats", "artist.delete_with_account", "job.view_all", "metrics.view"}
+    for role in ROLES:
+        assert set(permissions.ROLE_PERMISSIONS[role]) <= required | in_views
@@ -0,0 +1,94 @@
+import pytest
+
+from app import ratelimit
+from app.ratelimit import MemoryCounter
+
+
+class Clock:
+    """Stands in for the time module inside app.ratelimit."""
+
+    def __init__(self, now: float):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock(1000.0)
+    monkeypatch.setattr(ratelimit, "time", clock)
+    return clock
+
+
+def test_hits_count_within_the_window(clock):
+    counter = MemoryCounter(window=100, max_keys=10)
+    for _ in range(4):
+        counter.hit("ip:1")
+
+    assert counter.count("ip:1") == 4
+    assert counter.count("ip:2") == 0
+
+
+def test_previous_window_fades_out_as_the_window_slides(clock):
+    counter = MemoryCounter(window=100, max_keys=10)
+    for _ in range(4):
+        counter.hit("ip:1")
+
+    clock.now = 1150  # half way through the next window
+    assert counter.count("ip:1") == pytest.approx(2)
+    counter.hit("ip:1")
+    assert counter.count("ip:1") == pytest.approx(3)
+
+    clock.now = 1300  # two windows later nothing is left
+    assert counter.count("ip:1") == 0
+
+
+def test_reset_forgets_the_key(clock):
+    counter = MemoryCounter(window=100, max_keys=10)
+    counter.hit("email:a@b.c")
+    counter.reset("email:a@b.c")
+    assert counter.count("email:a@b.c") == 0
+
+
+def test_least_recently_hit_keys_are_evicted_above_max_keys(clock):
+    counter = MemoryCounter(window=100, max_keys=2)
+    counter.hit("a")
+    counter.hit("b")
+    counter.hit("a")
+    counter.hit("c")
+
+    assert set(counter._counters) == {"a", "c"}
+
+
+def test_idle_keys_are_swept_once_per_window(clock):
+    counter = MemoryCounter(window=100, max_keys=10)
+    counter.hit("old")
+
+    clock.now = 1210  # "old" last hit two windows ago
+    counter.hit("new")
+
+    assert set(counter._counters) == {"new"}
+
+
+def test_email_limit_counts_failures_of_any_spelling(clock, monkeypatch):
+    monkeypatch.setattr(ratelimit, "counter", MemoryCounter(window=300, max_keys=10))
+    for _ in range(ratelimit.LOGIN_LIMIT_PER_EMAIL):
+        assert not ratelimit.login_blocked("10.0.0.1", "Jane@Example.com ")
+        ratelimit.record_login_failure("Jane@Example.com ")
+
+    assert ratelimit.login_blocked("10.0.0.2", "jane@example.com")
+    ratelimit.clear_login_failures("JANE@example.com")
+    assert not ratelimit.login_blocked("10.0.0.2", "jane@example.com")
+
+
+def test_ip_limit_counts_every_attempt(clock, monkeypatch):
+    monkeypatch.setattr(ratelimit, "counter", MemoryCounter(window=300, max_keys=10))
+    for _ in range(ratelimit.LOGIN_LIMIT_PER_IP):
+        ratelimit.record_login_attempt("10.0.0.1")
+
+    assert ratelimit.login_blocked("10.0.0.1", "someone@example.com")
+    assert not ratelimit.login_blocked("10.0.0.2", "someone@example.com")
@@ -0,0 +1,11 @@
+from app.models import contains_condition
+
+
+def test_short_queries_skip_the_contains_branch():
+    assert contains_condition(("name",), "ab") == ("", [])
+
+
+def test_contains_branch_escapes_wildcards_for_every_column():
+    sql, params = contains_condition(("music.title", "music.album_name"), "50%_off")
+    assert sql == " OR music.title ILIKE %s OR music.album_name ILIKE %s"
+    assert params == ["%50\\%\\_off%"] * 2
@@ -0,0 +1,167 @@
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+from flask import Flask, flash, get_flashed_messages, session
+
+from app import sessions
+from app.sessions import PostgresSessionInterface, rotate_session
+
+
+class FakeSessionTable:
+    """The sessions table, for the three statements app.sessions runs."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def execute(self, sql, params):
+        statement = sql.split()[0]
+        self.result = None
+        if statement == "SELECT":
+            sid, version = params
+            row = self.rows.get(sid)
+            if row and row[0] == version and row[3] > datetime.now():
+                self.result = (row[0], row[2], row[3])
+        elif statement == "INSERT":
+            sid, version, user_id, data, expires_at = params
+            self.rows[sid] = (version, user_id, data, expires_at)
+        elif statement == "DELETE":
+            self.rows.pop(params[0], None)
+
+    def fetchone(self):
+        return self.result
+
+
+class FakeConnection:
+    def __init__(self, table):
+        self.table = table
+
+    @contextmanager
+    def cursor(self):
+        yield self.table
+
+
+@pytest.fixture
+def table(monkeypatch):
+    table = FakeSessionTable()
+
+    @contextmanager
+    def get_connection():
+        yield FakeConnection(table)
+
+    monkeypatch.setattr(sessions, "get_connection", get_connection)
+    monkeypatch.setattr(sessions, "commit", lambda conn: None)
+    monkeypatch.setattr(sessions, "rollback", lambda conn: None)
+    sessions.forget_sessions()
+    yield table
+    sessions.forget_sessions()
+
+
+@pytest.fixture
+def client(table):
+    app = Flask(__name__)
+    app.secret_key = "test"
+    app.session_interface = PostgresSessionInterface(lifetime=3600, anonymous_lifetime=60)
+
+    @app.route("/anonymous")
+    def anonymous():
+        flash("Please login first")
+        return ""
+
+    @app.route("/login")
+    def login():
+        session.clear()
+        rotate_session(session)
+        session.permanent = False
+        session["user_id"] = 1
+        return ""
+
+    @app.route("/remember")
+    def remember():
+        session.clear()
+        rotate_session(session)
+        session.permanent = True
+        session["user_id"] = 1
+        return ""
+
+    @app.route("/logout")
+    def logout():
+        session.clear()
+        rotate_session(session)
+        flash("Logged out")
+        return ""
+
+    @app.route("/whoami")
+    def whoami():
+        get_flashed_messages()
+        return str(session.get("user_id"))
+
+    return app.test_client()
+
+
+def cookie(client):
+    value = client.get_cookie("session")
+    return value.value if value else None
+
+
+def test_login_rotates_the_session_id(client, table):
+    client.get("/anonymous")
+    before = cookie(client)
+    assert before.partition(".")[0] in table.rows
+
+    client.get("/login")
+    after = cookie(client)
+
+    assert after.partition(".")[0] != before.partition(".")[0]
+    assert before.partition(".")[0] not in table.rows
+    assert client.get("/whoami").text == "1"
+
+
+def test_cookie_known_before_login_is_not_logged_in(client, table):
+    client.get("/anonymous")
+    planted = cookie(client)
+    client.get("/login")
+
+    client.set_cookie("session", planted)
+    assert client.get("/whoami").text == "None"
+
+
+def test_logout_invalidates_the_logged_in_cookie(client, table):
+    client.get("/login")
+    logged_in = cookie(client)
+    client.get("/logout")
+
+    assert cookie(client).partition(".")[0] != logged_in.partition(".")[0]
+    assert logged_in.partition(".")[0] not in table.rows
+    client.set_cookie("session", logged_in)
+    assert client.get("/whoami").text == "None"
+
+
+def test_stale_version_is_rejected(client, table):
+    client.get("/login")
+    sid, _, version = cookie(client).partition(".")
+    sessions.forget_sessions()
+
+    client.set_cookie("session", f"{sid}.{'0' * len(version)}")
+    assert client.get("/whoami").text == "None"
+
+
+def test_anonymous_sessions_are_short_lived(client, table):
+    client.get("/anonymous")
+    sid = cookie(client).partition(".")[0]
+    expires_at = table.rows[sid][3]
+    assert (expires_at - datetime.now()).total_seconds() <= 60
+
+
+def test_consumed_flash_deletes_the_anonymous_row(client, table):
+    client.get("/anonymous")
+    client.get("/whoami")
+    assert table.rows == {}
+
+
+def test_cookie_is_browser_session_scoped_unless_remembered(client, table):
+    response = client.get("/login")
+    assert "Expires=" not in response.headers["Set-Cookie"]
+
+    response = client.get("/remember")
+    assert "Expires=" in response.headers["Set-Cookie"]
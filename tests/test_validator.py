@@ -0,0 +1,115 @@
+"""compile_rules against Validator, the reference implementation."""
+
+import random
+
+import pytest
+
+from app.services.artist import ARTIST_RULES
+from app.services.auth import REGISTRATION_RULES, USER_UPDATE_RULES
+from app.services.music import MUSIC_RULES
+from app.utils.validator import Validator, compile_rules
+
+EVERY_RULE = {
+    "name": ["required", "min_length:3", "max_length:8"],
+    "email": ["email"],
+    "password": ["min_length:2"],
+    "confirm": ["required", "match:password"],
+    "count": ["numeric", "between:10,99"],
+    "dob": ["date"],
+    "gender": ["in:m,f,o"],
+}
+
+# values near the edges of every rule
+SAMPLES = [
+    "", " ", "  x ", "ab", "abc", "abcdefgh", "abcdefghi", " m", "f", "x", "m,f",
+    "a@b.c", "a@b", "@b.c", "a@@b.c", "a @b.co",
+    "0", "9", "10", "99", "100", "-5", "+12", "1.5", "²", "١٢", "２３", "0012",
+    "2147483647", "2147483648", "99999999999999999999",
+    "1990-01-02", "1990-1-2", "1990-01-2 ", "1990- 1-02", "1990-01- 2", "1990-1- 2",
+    "2000-02-29", "1900-02-29", "2024-13-01", "2024-00-10", "2024-04-31",
+    "0000-01-01", "0001-01-01", "90-01-02", "19900-01-02", "1990-01-02x",
+    "1990/01/02", "1990-001-02", "١٩٩٠-01-02",
+]
+
+
+def random_value(rng):
+    if rng.random() < 0.7:
+        return rng.choice(SAMPLES)
+    return "".join(rng.choice("0123456789- @.mfx²") for _ in range(rng.randint(0, 12)))
+
+
+def random_rows(rules, count, seed):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        row = {field: random_value(rng) for field in rules if rng.random() < 0.95}
+        if "password" in row and rng.random() < 0.5:
+            row["confirm" if "confirm" in rules else "c_password"] = row["password"]
+        rows.append(row)
+    return rows
+
+
+def reference_errors(rules, row):
+    validator = Validator(row, rules)
+    validator.validate()
+    return validator.errors
+
+
+RULE_SETS = {
+    "every_rule": EVERY_RULE,
+    "artist": ARTIST_RULES,
+    "music": MUSIC_RULES,
+    "registration": REGISTRATION_RULES,
+    "user_update": USER_UPDATE_RULES,
+}
+
+
+@pytest.mark.parametrize("name", RULE_SETS)
+def test_compiled_errors_match_validator(name):
+    rules = RULE_SETS[name]
+    compiled = compile_rules(rules)
+    for row in random_rows(rules, 2000, seed=name):
+        assert compiled.errors(row) == reference_errors(rules, row), row
+
+
+@pytest.mark.parametrize("name", RULE_SETS)
+def test_validate_many_and_validate_columns_match_validator(name):
+    rules = RULE_SETS[name]
+    compiled = compile_rules(rules)
+    rows = random_rows(rules, 500, seed=f"{name} columns")
+    # a column missing from the file reads as "", like a missing key
+    columns = {field: [row.get(field, "") for row in rows] for field in rules}
+    rows = [{field: values[index] for field, values in columns.items()} for index in range(len(rows))]
+
+    expected = {}
+    for index, row in enumerate(rows):
+        errors = reference_errors(rules, row)
+        if errors:
+            expected[index] = errors
+
+    assert compiled.validate_many(rows) == expected
+    assert compiled.validate_columns(columns, len(rows)) == expected
+    # dict order is the rule order in every row, like Validator's
+    for index, errors in compiled.validate_columns(columns, len(rows)).items():
+        assert list(errors) == list(expected[index])
+
+
+def test_missing_column_reads_as_empty():
+    compiled = compile_rules(ARTIST_RULES)
+    invalid = compiled.validate_columns({"name": ["Valid Name"]}, 1)
+    assert invalid[0]["dob"] == "Dob is required."
+    assert "name" not in invalid[0]
+
+
+def test_errors_can_be_limited_to_some_fields():
+    compiled = compile_rules(REGISTRATION_RULES)
+    assert compiled.errors({"email": "nope"}, only={"email"}) == {"email": "Invalid email address."}
+
+
+def test_unknown_rule_is_refused_when_compiling():
+    with pytest.raises(ValueError, match="Unknown validation rule"):
+        compile_rules({"name": ["required", "uppercase"]})
+
+
+def test_compiled_rules_are_cached_per_rules():
+    assert compile_rules(dict(ARTIST_RULES)) is compile_rules(ARTIST_RULES)